@@ -0,0 +1,115 @@
+"""
+对比同步 WSGI 与异步 ASGI 部署在大量并发（慢）客户端下的表现。
+
+先分别启动两种服务（各 1 个 worker），例如：
+
+    gunicorn ticket_django_backend.wsgi -w 1 --threads 8 -b 127.0.0.1:8001
+    uvicorn ticket_django_backend.asgi:application --workers 1 --port 8002
+
+再运行：
+
+    python -m benchmarks.async_load --token <JWT> \\
+        --target wsgi=http://127.0.0.1:8001/api/tickets/ \\
+        --target asgi=http://127.0.0.1:8002/api/async/tickets/ \\
+        --concurrency 200 --requests 4000
+
+客户端只用标准库 asyncio 实现，每个连接串行发送请求（keep-alive），输出吞吐量与延迟分位数。
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import time
+from urllib.parse import urlsplit
+
+
+async def _request(reader, writer, host, path, token):
+    writer.write(
+        f'GET {path} HTTP/1.1\r\nHost: {host}\r\nAuthorization: Bearer {token}\r\n'
+        f'Connection: keep-alive\r\n\r\n'.encode()
+    )
+    await writer.drain()
+    status_line = await reader.readline()
+    length, chunked = 0, False
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b''):
+            break
+        name, _, value = line.decode().partition(':')
+        if name.lower() == 'content-length':
+            length = int(value)
+        elif name.lower() == 'transfer-encoding' and 'chunked' in value.lower():
+            chunked = True
+    if chunked:
+        while True:
+            size = int((await reader.readline()).strip(), 16)
+            await reader.readexactly(size + 2)
+            if size == 0:
+                break
+    else:
+        await reader.readexactly(length)
+    return int(status_line.split()[1])
+
+
+async def run_target(url, token, concurrency, requests, think_time):
+    parts = urlsplit(url)
+    path = parts.path + (f'?{parts.query}' if parts.query else '')
+    latencies, errors = [], 0
+    remaining = requests
+
+    async def client():
+        nonlocal remaining, errors
+        reader, writer = await asyncio.open_connection(parts.hostname, parts.port or 80)
+        try:
+            while remaining > 0:
+                remaining -= 1
+                started = time.perf_counter()
+                status = await _request(reader, writer, parts.netloc, path, token)
+                latencies.append(time.perf_counter() - started)
+                if status != 200:
+                    errors += 1
+                if think_time:
+                    # 模拟慢客户端：连接保持但空闲
+                    await asyncio.sleep(think_time)
+        finally:
+            writer.close()
+
+    started = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+
+    def pct(p):
+        return latencies[min(len(latencies) - 1, int(len(latencies) * p))] * 1000
+
+    return {
+        'requests': len(latencies),
+        'errors': errors,
+        'rps': len(latencies) / elapsed,
+        'mean_ms': statistics.fmean(latencies) * 1000,
+        'p50_ms': pct(0.50),
+        'p95_ms': pct(0.95),
+        'p99_ms': pct(0.99),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--target', action='append', required=True, help='name=url')
+    parser.add_argument('--token', required=True)
+    parser.add_argument('--concurrency', type=int, default=200)
+    parser.add_argument('--requests', type=int, default=4000)
+    parser.add_argument('--think-time', type=float, default=0.0)
+    args = parser.parse_args()
+
+    results = {}
+    for target in args.target:
+        name, _, url = target.partition('=')
+        results[name] = asyncio.run(run_target(url, args.token, args.concurrency, args.requests, args.think_time))
+        print(f"{name:>6}: {results[name]['rps']:8.1f} req/s  p50 {results[name]['p50_ms']:.1f} ms  "
+              f"p99 {results[name]['p99_ms']:.1f} ms  errors {results[name]['errors']}")
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
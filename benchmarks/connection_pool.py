@@ -0,0 +1,106 @@
+"""
+对比有无持久连接 / 连接池时的请求吞吐量。
+
+需要一个本地 MySQL（通过 MYSQL_* 环境变量配置，库需已执行 migrate）：
+
+    python -m benchmarks.connection_pool --requests 2000 --concurrency 8
+
+每种模式在独立子进程中运行，直接调用 WSGIHandler，请求结束时与真实部署一样
+触发 request_finished -> close_old_connections。
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+
+MODES = {
+    'no-persistence': {'DB_POOL': '0', 'DB_CONN_MAX_AGE': '0'},
+    'persistent': {'DB_POOL': '0', 'DB_CONN_MAX_AGE': '60'},
+    'pool': {'DB_POOL': '1', 'DB_CONN_MAX_AGE': '0'},
+}
+
+
+def run_worker(requests, concurrency, path):
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'ticket_django_backend.settings')
+    import django
+
+    django.setup()
+
+    from io import BytesIO
+    from wsgiref.util import setup_testing_defaults
+
+    from django.core.handlers.wsgi import WSGIHandler
+    from django.db import connections
+
+    from tickets.models import User
+    from tickets.serializers import CustomTokenObtainPairSerializer
+
+    user, _ = User.objects.get_or_create(username='bench-pool', defaults={'role': 'TESTER'})
+    token = str(CustomTokenObtainPairSerializer.get_token(user).access_token)
+    connections.close_all()
+
+    handler = WSGIHandler()
+    per_thread = requests // concurrency
+    errors = []
+
+    def call():
+        environ = {'PATH_INFO': path, 'REQUEST_METHOD': 'GET', 'HTTP_AUTHORIZATION': f'Bearer {token}',
+                   'wsgi.input': BytesIO()}
+        setup_testing_defaults(environ)
+        statuses = []
+        response = handler(environ, lambda status, headers: statuses.append(status))
+        try:
+            for _ in response:
+                pass
+        finally:
+            response.close()
+        if not statuses[0].startswith('200'):
+            errors.append(statuses[0])
+
+    def loop():
+        for _ in range(per_thread):
+            call()
+
+    threads = [threading.Thread(target=loop) for _ in range(concurrency)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    total = per_thread * concurrency
+    print(json.dumps({'requests': total, 'seconds': elapsed, 'rps': total / elapsed, 'errors': len(errors)}))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--path', default='/api/tickets/')
+    parser.add_argument('--mode', choices=sorted(MODES), action='append')
+    parser.add_argument('--worker', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        run_worker(args.requests, args.concurrency, args.path)
+        return
+
+    results = {}
+    for mode in args.mode or MODES:
+        env = {**os.environ, **MODES[mode], 'DJANGO_SERVER_INTERFACE': 'wsgi'}
+        out = subprocess.run(
+            [sys.executable, '-m', 'benchmarks.connection_pool', '--worker',
+             '--requests', str(args.requests), '--concurrency', str(args.concurrency), '--path', args.path],
+            env=env, check=True, capture_output=True, text=True,
+        )
+        results[mode] = json.loads(out.stdout.strip().splitlines()[-1])
+        print(f"{mode:>15}: {results[mode]['rps']:8.1f} req/s "
+              f"({results[mode]['requests']} requests, {results[mode]['errors']} errors)")
+    return results
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,75 @@
+"""
+工单列表的 JSON 渲染与压缩开销：TicketSerializer 输出（含历史记录）分别用 DRF 自带的 JSONRenderer
+与 ORJSONRenderer 渲染，再用 gzip / br（安装了 Brotli 时）压缩，统计每次的 CPU 耗时与字节数。
+
+先用 benchmarks.seed 准备数据：
+
+    python -m benchmarks.json_rendering --tickets 100 --repeat 50
+
+序列化（模型 -> 字典）只做一次，计时只覆盖渲染与压缩，便于与请求级延迟分开看。
+"""
+import argparse
+import json
+import os
+import statistics
+import time
+
+
+def _measure(func, repeat):
+    """返回 (结果, 中位数毫秒)；用进程 CPU 时间，排除调度抖动"""
+    timings = []
+    for _ in range(repeat):
+        started = time.process_time()
+        result = func()
+        timings.append((time.process_time() - started) * 1000)
+    return result, statistics.median(timings)
+
+
+def run(tickets, repeat):
+    from rest_framework.renderers import JSONRenderer
+    from ticket_django_backend.compression import available_encoders
+    from tickets.models import Ticket
+    from tickets.renderers import ORJSONRenderer
+    from tickets.serializers import TicketSerializer
+
+    queryset = Ticket.objects.with_history().order_by('-created_at')[:tickets]
+    data = TicketSerializer(queryset, many=True).data
+    if not data:
+        raise SystemExit('No tickets found, run `python -m benchmarks.seed` first.')
+
+    renderers = {}
+    for name, renderer in (('drf', JSONRenderer()), ('orjson', ORJSONRenderer())):
+        body, render_ms = _measure(lambda: renderer.render(data), repeat)
+        result = {'render_ms': render_ms, 'bytes': len(body)}
+        for encoder_class in available_encoders():
+            compressed, compress_ms = _measure(lambda: encoder_class().compress(body), repeat)
+            result[encoder_class.name] = {
+                'compress_ms': compress_ms,
+                'bytes': len(compressed),
+                'ratio': len(compressed) / len(body),
+            }
+        renderers[name] = result
+
+    return {
+        'tickets': len(data),
+        'repeat': repeat,
+        'renderers': renderers,
+        'render_speedup': renderers['drf']['render_ms'] / renderers['orjson']['render_ms'],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--tickets', type=int, default=100, help='List size (one page of output).')
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'ticket_django_backend.settings')
+    import django
+
+    django.setup()
+    print(json.dumps(run(args.tickets, args.repeat), indent=2))
+
+
+if __name__ == '__main__':
+    main()
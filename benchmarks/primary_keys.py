@@ -0,0 +1,165 @@
+"""
+主键格式对比：uuid4 / uuid7 × char(32) / 二进制（BinaryUUIDField），插入吞吐量、主键点查与表/索引大小。
+
+每种组合建一张临时表，结构与历史记录表相同的要点：UUID 主键、引用父记录的 UUID 外键列（二级索引）、
+按时间的二级索引。按批插入 --rows 行（每批一个事务），再随机点查 --lookups 次，最后读取数据库统计的大小：
+
+    python -m benchmarks.primary_keys --rows 200000 --batch-size 1000 --output pk.json
+
+大小统计支持 MySQL（information_schema，先 ANALYZE TABLE）、PostgreSQL 与带 dbstat 的 SQLite，
+其他情况为 null。行数需明显超过缓冲池才能看出 uuid4 的页分裂与随机 I/O，默认值只够对比 CPU 开销。
+"""
+import argparse
+import json
+import os
+import random
+import time
+import uuid
+
+KINDS = ('uuid4', 'uuid7')
+STORAGES = ('char', 'binary')
+PARENTS = 1000
+
+
+def _table(kind, storage):
+    return f'bench_pk_{kind}_{storage}'
+
+
+def _field(storage):
+    from django.db import models
+    from tickets.ids import BinaryUUIDField
+
+    return BinaryUUIDField() if storage == 'binary' else models.UUIDField()
+
+
+def _generate(kind):
+    from tickets.ids import uuid7
+
+    return uuid.uuid4() if kind == 'uuid4' else uuid7()
+
+
+def _create(connection, table, column_type, index_prefix):
+    quote = connection.ops.quote_name
+    with connection.cursor() as cursor:
+        cursor.execute(f'DROP TABLE IF EXISTS {quote(table)}')
+        cursor.execute(
+            f'CREATE TABLE {quote(table)} (id {column_type} NOT NULL PRIMARY KEY, '
+            f'parent_id {column_type} NOT NULL, seq bigint NOT NULL, payload varchar(64) NOT NULL)'
+        )
+        cursor.execute(f'CREATE INDEX {quote(index_prefix + "_parent")} ON {quote(table)} (parent_id)')
+        cursor.execute(f'CREATE INDEX {quote(index_prefix + "_seq")} ON {quote(table)} (seq)')
+
+
+def _sizes(connection, table):
+    """(数据字节数, 索引字节数)；不支持时为 (None, None)"""
+    with connection.cursor() as cursor:
+        if connection.vendor == 'mysql':
+            cursor.execute(f'ANALYZE TABLE {connection.ops.quote_name(table)}')
+            cursor.fetchall()
+            cursor.execute('SELECT data_length, index_length FROM information_schema.tables '
+                           'WHERE table_schema = DATABASE() AND table_name = %s', [table])
+            return tuple(cursor.fetchone())
+        if connection.vendor == 'postgresql':
+            cursor.execute('SELECT pg_relation_size(%s), pg_indexes_size(%s)', [table, table])
+            return tuple(cursor.fetchone())
+        if connection.vendor == 'sqlite':
+            try:
+                cursor.execute('SELECT name, SUM(pgsize) FROM dbstat GROUP BY name')
+            except Exception:
+                return None, None
+            pages = dict(cursor.fetchall())
+            index = sum(size for name, size in pages.items() if name.startswith(f'sqlite_autoindex_{table}')
+                        or name.startswith(table + '_i'))
+            return pages.get(table), index
+    return None, None
+
+
+def run_variant(kind, storage, rows, batch_size, lookups, seed):
+    from django.db import connection, transaction
+
+    field = _field(storage)
+    table = _table(kind, storage)
+    quote = connection.ops.quote_name
+    _create(connection, table, field.db_type(connection), table + '_i')
+    prep = lambda value: field.get_db_prep_value(value, connection)
+
+    rng = random.Random(seed)
+    parents = [_generate(kind) for _ in range(PARENTS)]
+    ids = []
+    sql = f'INSERT INTO {quote(table)} (id, parent_id, seq, payload) VALUES (%s, %s, %s, %s)'
+    started = time.perf_counter()
+    for offset in range(0, rows, batch_size):
+        batch = []
+        for seq in range(offset, min(offset + batch_size, rows)):
+            key = _generate(kind)
+            ids.append(key)
+            batch.append((prep(key), prep(rng.choice(parents)), seq, f'row {seq}'))
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.executemany(sql, batch)
+    insert_seconds = time.perf_counter() - started
+
+    sample = [prep(key) for key in rng.sample(ids, min(lookups, len(ids)))]
+    found = 0
+    started = time.perf_counter()
+    with connection.cursor() as cursor:
+        for key in sample:
+            cursor.execute(f'SELECT seq FROM {quote(table)} WHERE id = %s', [key])
+            found += cursor.fetchone() is not None
+    lookup_seconds = time.perf_counter() - started
+
+    data_bytes, index_bytes = _sizes(connection, table)
+    return {
+        'rows': rows,
+        'column_type': field.db_type(connection),
+        'inserts_per_s': rows / insert_seconds if insert_seconds else None,
+        'lookups_per_s': len(sample) / lookup_seconds if lookup_seconds else None,
+        'lookups_found': found,
+        'data_bytes': data_bytes,
+        'index_bytes': index_bytes,
+    }
+
+
+def run(rows, batch_size=1000, lookups=1000, seed=0, keep=False):
+    from django.db import connection
+
+    results = {}
+    try:
+        for kind in KINDS:
+            for storage in STORAGES:
+                results[f'{kind}-{storage}'] = run_variant(kind, storage, rows, batch_size, lookups, seed)
+    finally:
+        if not keep:
+            with connection.cursor() as cursor:
+                for kind in KINDS:
+                    for storage in STORAGES:
+                        cursor.execute(f'DROP TABLE IF EXISTS {connection.ops.quote_name(_table(kind, storage))}')
+    return {'vendor': connection.vendor, 'variants': results}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=50000)
+    parser.add_argument('--batch-size', type=int, default=1000)
+    parser.add_argument('--lookups', type=int, default=2000)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--keep', action='store_true', help='Keep the bench_pk_* tables for inspection.')
+    parser.add_argument('--output', help='Write results as JSON.')
+    args = parser.parse_args()
+
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'ticket_django_backend.settings')
+    import django
+
+    django.setup()
+    results = run(args.rows, args.batch_size, args.lookups, args.seed, args.keep)
+    for name, result in results['variants'].items():
+        sizes = '-' if result['index_bytes'] is None else \
+            f"data {result['data_bytes'] / 2 ** 20:7.1f} MiB  index {result['index_bytes'] / 2 ** 20:7.1f} MiB"
+        print(f"{name:<14} {result['inserts_per_s']:10.0f} inserts/s  "
+              f"{result['lookups_per_s']:9.0f} lookups/s  {sizes}")
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,120 @@
+"""
+基准结果的汇总、保存与对比。
+
+每个场景汇总为延迟分位数（毫秒）、每请求 SQL 条数与吞吐量，连同运行环境一起保存为 JSON 基线。
+对比两份结果时，延迟或每请求查询数上升、吞吐量下降超过 --tolerance 记为回退，退出码为 1：
+
+    python -m benchmarks.report baseline.json results.json --tolerance 0.15
+"""
+import argparse
+import json
+import platform
+import statistics
+import subprocess
+import sys
+from datetime import datetime, timezone
+
+PERCENTILES = (50, 90, 99)
+# 指标 -> 越大越好
+METRICS = {
+    'p50_ms': False, 'p90_ms': False, 'p99_ms': False,
+    'queries_mean': False, 'queries_max': False,
+    'rps': True,
+}
+
+
+def percentile(sorted_values, p):
+    if not sorted_values:
+        return None
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * p / 100))]
+
+
+def summarize(samples, elapsed):
+    """samples 为 (耗时秒, SQL 条数, 是否成功)"""
+    latencies = sorted(latency * 1000 for latency, _, _ in samples)
+    queries = [count for _, count, _ in samples if count is not None]
+    result = {
+        'requests': len(samples),
+        'errors': sum(1 for _, _, ok in samples if not ok),
+        'rps': len(samples) / elapsed if elapsed else None,
+        'mean_ms': statistics.fmean(latencies) if latencies else None,
+    }
+    for p in PERCENTILES:
+        result[f'p{p}_ms'] = percentile(latencies, p)
+    result['max_ms'] = latencies[-1] if latencies else None
+    result['queries_mean'] = statistics.fmean(queries) if queries else None
+    result['queries_max'] = max(queries) if queries else None
+    return result
+
+
+def environment():
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                                check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    import django
+
+    return {
+        'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'commit': commit,
+        'python': platform.python_version(),
+        'django': django.get_version(),
+        'machine': platform.machine(),
+    }
+
+
+def save(path, results):
+    with open(path, 'w', encoding='utf-8') as fh:
+        json.dump(results, fh, indent=2, sort_keys=True)
+        fh.write('\n')
+
+
+def load(path):
+    with open(path, encoding='utf-8') as fh:
+        return json.load(fh)
+
+
+def compare(baseline, current, tolerance=0.1):
+    """逐场景、逐指标对比，返回 (行, 回退) 两个列表；行为 (场景, 指标, 基线值, 当前值, 相对变化)"""
+    rows, regressions = [], []
+    for name, before in sorted(baseline.get('scenarios', {}).items()):
+        after = current.get('scenarios', {}).get(name)
+        if after is None:
+            continue
+        for metric, higher_is_better in METRICS.items():
+            old, new = before.get(metric), after.get(metric)
+            if old is None or new is None:
+                continue
+            change = (new - old) / old if old else (0.0 if new == old else float('inf'))
+            row = (name, metric, old, new, change)
+            rows.append(row)
+            if (-change if higher_is_better else change) > tolerance:
+                regressions.append(row)
+    return rows, regressions
+
+
+def format_rows(rows):
+    lines = [f'{"scenario":<24} {"metric":<13} {"baseline":>10} {"current":>10} {"change":>8}']
+    for name, metric, old, new, change in rows:
+        lines.append(f'{name:<24} {metric:<13} {old:>10.2f} {new:>10.2f} {change:>+8.1%}')
+    return '\n'.join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('baseline')
+    parser.add_argument('current')
+    parser.add_argument('--tolerance', type=float, default=0.1, help='Allowed relative change (0.1 = 10%%).')
+    args = parser.parse_args()
+
+    rows, regressions = compare(load(args.baseline), load(args.current), args.tolerance)
+    print(format_rows(rows))
+    if regressions:
+        print(f'\n{len(regressions)} regression(s) beyond {args.tolerance:.0%}:', file=sys.stderr)
+        print(format_rows(regressions), file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,220 @@
+"""
+通过 API 回放典型请求，统计延迟分位数、每请求 SQL 条数与吞吐量。
+
+场景：list（游标分页列表，随机筛选）、detail（随机工单详情）、create（新建工单）、
+workflow（新建 -> 开发报告 -> QA 审核 -> 回归测试，完整走一遍处理流程，各步骤分别统计）。
+请求在进程内经完整的中间件栈处理（django.test.Client），SQL 条数取自 PerformanceMiddleware
+写入的 Server-Timing 响应头。先用 benchmarks.seed 准备数据：
+
+    python -m benchmarks.scenarios --requests 500 --concurrency 4 --output results.json
+    python -m benchmarks.scenarios --baseline baseline.json --tolerance 0.15
+
+给定 --baseline 时输出对比表，超过容差的回退使退出码为 1。
+"""
+import argparse
+import json
+import os
+import random
+import re
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+
+SCENARIOS = ('list', 'detail', 'create', 'workflow')
+QUERIES_RE = re.compile(r'desc="(\d+) queries"')
+TICKET_SAMPLE = 5000
+
+
+class Context:
+    """各场景共享：各角色的令牌与用户 id、用于详情请求的工单 id"""
+
+    def __init__(self, seed):
+        from tickets.models import Ticket, User
+        from tickets.serializers import CustomTokenObtainPairSerializer
+
+        self.users = {}
+        for role in ('TESTER', 'DEVELOPER', 'QA'):
+            users = list(User.objects.filter(role=role, username__startswith='bench-').order_by('username')[:50])
+            if not users:
+                raise SystemExit(f'No {role} users found, run `python -m benchmarks.seed` first.')
+            self.users[role] = [
+                (str(user.pk), f'Bearer {CustomTokenObtainPairSerializer.get_token(user).access_token}')
+                for user in users
+            ]
+        self.ticket_ids = [str(pk) for pk in Ticket.objects.order_by('id').values_list('id', flat=True)[:TICKET_SAMPLE]]
+        self.seed = seed
+
+    def user(self, rng, role):
+        return rng.choice(self.users[role])
+
+
+class Recorder:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.samples = {}
+
+    def add(self, name, latency, queries, ok):
+        with self.lock:
+            self.samples.setdefault(name, []).append((latency, queries, ok))
+
+
+def _call(client, recorder, name, method, path, token, data=None, expect=200):
+    kwargs = {'HTTP_AUTHORIZATION': token}
+    if data is not None:
+        kwargs.update(data=json.dumps(data), content_type='application/json')
+    start = time.perf_counter()
+    response = getattr(client, method)(path, **kwargs)
+    if getattr(response, 'streaming', False):
+        b''.join(response.streaming_content)
+    latency = time.perf_counter() - start
+    match = QUERIES_RE.search(response.get('Server-Timing', ''))
+    recorder.add(name, latency, int(match.group(1)) if match else None, response.status_code == expect)
+    return response
+
+
+# --- 场景：每次调用执行一次迭代 ---
+def scenario_list(client, ctx, rng, recorder):
+    params = rng.choice(['', '?severity=CRITICAL', '?current_status=OPEN', '?module=billing', '?page_size=100'])
+    _call(client, recorder, 'list', 'get', f'/api/tickets/{params}', ctx.user(rng, 'TESTER')[1])
+
+
+def scenario_detail(client, ctx, rng, recorder):
+    if not ctx.ticket_ids:
+        raise SystemExit('No tickets found, run `python -m benchmarks.seed` first.')
+    ticket_id = rng.choice(ctx.ticket_ids)
+    _call(client, recorder, 'detail', 'get', f'/api/tickets/{ticket_id}/', ctx.user(rng, 'TESTER')[1])
+
+
+def _create(client, ctx, rng, recorder, name, assignee=None):
+    payload = {
+        'title': f'bench ticket {rng.getrandbits(32):08x}',
+        'description': 'created by benchmarks.scenarios',
+        'software_name': 'ticket-web', 'software_version': '1.0',
+        'discovered_at': datetime.now(timezone.utc).isoformat(),
+        'severity': rng.choice(['HINT', 'NORMAL', 'SEVERE', 'CRITICAL']),
+        'module': rng.choice(['auth', 'billing', 'search']),
+    }
+    if assignee is not None:
+        payload['assignee'] = assignee
+    response = _call(client, recorder, name, 'post', '/api/tickets/', ctx.user(rng, 'TESTER')[1], payload,
+                     expect=201)
+    return response.json().get('id') if response.status_code == 201 else None
+
+
+def scenario_create(client, ctx, rng, recorder):
+    _create(client, ctx, rng, recorder, 'create')
+
+
+def scenario_workflow(client, ctx, rng, recorder):
+    developer_id, developer_token = ctx.user(rng, 'DEVELOPER')
+    tester_id, tester_token = ctx.user(rng, 'TESTER')
+    start = time.perf_counter()
+    ticket_id = _create(client, ctx, rng, recorder, 'workflow.create', assignee=developer_id)
+    steps = (
+        ('workflow.dev_report', 'dev-report', developer_token, {'root_cause': 'benchmark', 'self_test_report': 'ok'}),
+        ('workflow.qa_review', 'qa-review', ctx.user(rng, 'QA')[1],
+         {'agree_to_release': True, 'designated_tester': tester_id}),
+        ('workflow.regression', 'regression', tester_token, {'passed': True, 'report': 'ok'}),
+    )
+    ok = ticket_id is not None
+    for name, action, token, payload in steps:
+        if not ok:
+            break
+        ok = _call(client, recorder, name, 'post', f'/api/tickets/{ticket_id}/{action}/', token,
+                   payload).status_code == 200
+    # 整个流程作为一个样本；SQL 条数只在各步骤中统计
+    recorder.add('workflow', time.perf_counter() - start, None, ok)
+
+
+def run(scenarios=SCENARIOS, requests=200, concurrency=1, seed=0, warmup=10):
+    """按顺序运行各场景，返回 {'environment': ..., 'parameters': ..., 'scenarios': {名称: 汇总}}"""
+    from django.conf import settings
+    from django.db import connections
+    from django.test import Client, override_settings
+
+    from tickets.models import Ticket
+
+    from . import report
+
+    ctx = Context(seed)
+    summaries = {}
+    overrides = override_settings(PERF_SERVER_TIMING=True, ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver'])
+    with overrides:
+        for name in scenarios:
+            func = globals()[f'scenario_{name}']
+            recorder = Recorder()
+            warmup_client = Client()
+            warmup_rng = random.Random(f'{seed}-{name}-warmup')
+            for _ in range(warmup):
+                func(warmup_client, ctx, warmup_rng, Recorder())
+
+            per_thread = max(1, requests // concurrency)
+
+            def loop(index, func=func, name=name, recorder=recorder):
+                client, rng = Client(), random.Random(f'{seed}-{name}-{index}')
+                try:
+                    for _ in range(per_thread):
+                        func(client, ctx, rng, recorder)
+                finally:
+                    if concurrency > 1:
+                        connections.close_all()
+
+            started = time.perf_counter()
+            if concurrency == 1:
+                loop(0)
+            else:
+                threads = [threading.Thread(target=loop, args=(index,)) for index in range(concurrency)]
+                for thread in threads:
+                    thread.start()
+                for thread in threads:
+                    thread.join()
+            elapsed = time.perf_counter() - started
+            for label, samples in recorder.samples.items():
+                summaries[label] = report.summarize(samples, elapsed)
+
+    return {
+        'environment': {**report.environment(), 'database': connections['default'].vendor,
+                        'tickets': Ticket.objects.count()},
+        'parameters': {'requests': requests, 'concurrency': concurrency, 'seed': seed, 'warmup': warmup},
+        'scenarios': summaries,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--scenario', action='append', choices=SCENARIOS, help='Repeatable; default: all.')
+    parser.add_argument('--requests', type=int, default=200, help='Iterations per scenario.')
+    parser.add_argument('--concurrency', type=int, default=1)
+    parser.add_argument('--warmup', type=int, default=10)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help='Write results as JSON (usable as a baseline).')
+    parser.add_argument('--baseline', help='Compare against a previous result file.')
+    parser.add_argument('--tolerance', type=float, default=0.1)
+    args = parser.parse_args()
+
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'ticket_django_backend.settings')
+    import django
+
+    django.setup()
+    from . import report
+
+    results = run(args.scenario or SCENARIOS, args.requests, args.concurrency, args.seed, args.warmup)
+    for name, summary in results['scenarios'].items():
+        queries = summary['queries_mean']
+        print(f"{name:<22} {summary['rps']:8.1f} it/s  p50 {summary['p50_ms']:7.1f} ms  "
+              f"p90 {summary['p90_ms']:7.1f} ms  p99 {summary['p99_ms']:7.1f} ms  "
+              f"queries {'-' if queries is None else f'{queries:.1f}':>5}  errors {summary['errors']}")
+    if args.output:
+        report.save(args.output, results)
+    if args.baseline:
+        rows, regressions = report.compare(report.load(args.baseline), results, args.tolerance)
+        print()
+        print(report.format_rows(rows))
+        if regressions:
+            print(f'\n{len(regressions)} regression(s) beyond {args.tolerance:.0%}.', file=sys.stderr)
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,158 @@
+"""
+生成可复现的基准测试数据：用户、工单及较长的处理历史（开发报告 -> QA 审核 -> 回归测试，可多轮往返）。
+
+同一 --seed 产生完全相同的数据。工单以 import_tickets 的行格式生成，交给 tickets.importer 分批写入，
+状态日志、统计计数与搜索索引一并建立；中断后以相同参数重新执行会从断点继续。请使用独立的数据库：
+
+    python -m benchmarks.seed --tickets 100000 --max-cycles 4 --seed 42
+"""
+import argparse
+import os
+import random
+import sys
+from datetime import timedelta
+
+ROLES = {'TESTER': 0.5, 'DEVELOPER': 0.35, 'QA': 0.15}
+SEVERITIES = (('HINT', 0.1), ('NORMAL', 0.6), ('SEVERE', 0.22), ('CRITICAL', 0.08))
+MODULES = ('auth', 'billing', 'search', 'reports', 'upload', 'notifications', 'admin', 'api', 'mobile', 'sync')
+SOFTWARE = ('ticket-web', 'ticket-android', 'ticket-ios', 'ticket-desktop')
+WORDS = (
+    'crash', 'timeout', 'login', 'button', 'layout', 'export', 'permission', 'slow', 'null', 'encoding',
+    'upload', 'report', 'session', 'cache', 'sync', 'retry', 'duplicate', 'missing', 'overflow', 'locale',
+)
+
+
+def usernames(users, seed):
+    """按角色比例生成用户名，确定性"""
+    rng = random.Random(f'{seed}-users')
+    names = {role: [] for role in ROLES}
+    for index in range(users):
+        role = rng.choices(list(ROLES), weights=list(ROLES.values()))[0]
+        names[role].append(f'bench-{role.lower()}-{index}')
+    # 每种角色至少一个用户
+    for role, members in names.items():
+        if not members:
+            members.append(f'bench-{role.lower()}-extra')
+    return names
+
+
+def _sentence(rng, words):
+    return ' '.join(rng.choice(WORDS) for _ in range(words))
+
+
+def ticket_rows(tickets, users, seed, max_cycles=4, days=365, now=None):
+    """生成 import_tickets 行（dict），每张工单 0..max_cycles 轮 开发 -> 审核 -> 回归"""
+    from django.utils import timezone
+    from tickets.ids import uuid7
+
+    rng = random.Random(seed)
+    now = now or timezone.now()
+    start = now - timedelta(days=days)
+    step = timedelta(days=days) / max(tickets, 1)
+    for index in range(tickets):
+        created_at = start + step * index + timedelta(seconds=rng.randint(0, 3600))
+        developer = rng.choice(users['DEVELOPER'])
+        row = {
+            'id': str(uuid7(created_at, rng.getrandbits(74))),
+            'title': f'{_sentence(rng, 4)} #{index}',
+            'description': _sentence(rng, rng.randint(10, 60)),
+            'software_name': rng.choice(SOFTWARE),
+            'software_version': f'{rng.randint(1, 5)}.{rng.randint(0, 20)}',
+            'discovered_at': (created_at - timedelta(hours=rng.randint(0, 72))).isoformat(),
+            'severity': rng.choices([s for s, _ in SEVERITIES], weights=[w for _, w in SEVERITIES])[0],
+            'module': rng.choice(MODULES),
+            'submitter': rng.choice(users['TESTER']),
+            'assignee': developer if rng.random() < 0.85 else None,
+            'qa_reviewer': None,
+            'regressor': None,
+            'created_at': created_at.isoformat(),
+            'dev_reports': [],
+            'qa_reviews': [],
+            'regression_tests': [],
+        }
+
+        status, at = 'OPEN', created_at
+        for _ in range(rng.randint(0, max_cycles)):
+            at += timedelta(hours=rng.expovariate(1 / 30))
+            row['dev_reports'].append({
+                'issue_type': rng.choice(('logic', 'ui', 'performance', 'data')),
+                'root_cause': _sentence(rng, 8), 'self_test_report': _sentence(rng, 12),
+                'module': row['module'], 'assigned_developer': developer, 'created_at': at.isoformat(),
+            })
+            status = 'UNDER_REVIEW'
+            at += timedelta(hours=rng.expovariate(1 / 12))
+            qa, tester = rng.choice(users['QA']), rng.choice(users['TESTER'])
+            agree = rng.random() < 0.7
+            row['qa_reviews'].append({
+                'comment': _sentence(rng, 6), 'agree_to_release': agree,
+                'release_qa': qa, 'designated_tester': tester, 'created_at': at.isoformat(),
+            })
+            row['qa_reviewer'] = qa
+            if not agree:
+                status = 'IN_MODIFICATION'
+                continue
+            row['regressor'] = tester
+            at += timedelta(hours=rng.expovariate(1 / 20))
+            passed = rng.random() < 0.8
+            row['regression_tests'].append({
+                'regression_version': row['software_version'], 'passed': passed, 'report': _sentence(rng, 10),
+                'assign_tester': tester, 'created_at': at.isoformat(),
+            })
+            status = 'CLOSED' if passed else 'UNDER_REVIEW'
+            if passed:
+                break
+        if at > now:
+            # 历史记录不能晚于当前时间，截断的工单保持 OPEN
+            row.update(dev_reports=[], qa_reviews=[], regression_tests=[], qa_reviewer=None, regressor=None)
+            status, at = 'OPEN', created_at
+        row['current_status'] = status
+        row['updated_at'] = at.isoformat()
+        yield row
+
+
+def create_users(names):
+    from django.contrib.auth.hashers import make_password
+
+    from tickets.models import User
+
+    password = make_password('bench-password')
+    User.objects.bulk_create([
+        User(username=username, role=role, password=password)
+        for role, members in names.items() for username in members
+    ], ignore_conflicts=True, batch_size=1000)
+
+
+def seed(tickets, users=200, max_cycles=4, days=365, seed_value=42, batch_size=1000, index=True, log=None):
+    from tickets.importer import TicketImporter
+
+    names = usernames(users, seed_value)
+    create_users(names)
+    importer = TicketImporter(batch_size=batch_size, index=index, log=log)
+    return importer.run(
+        ticket_rows(tickets, names, seed_value, max_cycles=max_cycles, days=days),
+        f'bench-seed-{seed_value}-{tickets}-{max_cycles}',
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--tickets', type=int, default=100000)
+    parser.add_argument('--users', type=int, default=200)
+    parser.add_argument('--max-cycles', type=int, default=4, help='Max dev/review/regression rounds per ticket.')
+    parser.add_argument('--days', type=int, default=365, help='Spread ticket creation over this many days.')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--batch-size', type=int, default=1000)
+    parser.add_argument('--no-index', action='store_true', help='Skip search indexing.')
+    args = parser.parse_args()
+
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'ticket_django_backend.settings')
+    import django
+
+    django.setup()
+    imported, errors = seed(args.tickets, args.users, args.max_cycles, args.days, args.seed, args.batch_size,
+                            index=not args.no_index, log=lambda message: print(message, file=sys.stderr))
+    print(f'Seeded {imported} tickets ({len(errors)} rows rejected).')
+
+
+if __name__ == '__main__':
+    main()
@@ -12,5 +12,16 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'ticket_django_backend.settings')
+# 数据库连接参数按入口分别调优，见 settings.DATABASES
+os.environ.setdefault('DJANGO_SERVER_INTERFACE', 'asgi')
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+from tickets.push import websocket_application  # noqa: E402  需在 Django 初始化之后导入
+
+
+async def application(scope, receive, send):
+    # WebSocket 连接（/ws/events/）交给工单推送，其余请求由 Django 处理
+    if scope['type'] == 'websocket':
+        return await websocket_application(scope, receive, send)
+    return await django_application(scope, receive, send)
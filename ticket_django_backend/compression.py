@@ -0,0 +1,166 @@
+"""
+响应压缩：按 Accept-Encoding 协商 br（安装了 Brotli 时）或 gzip。
+
+- 只压缩 COMPRESS_TYPES 中的文本类型，且响应体不小于 COMPRESS_MIN_SIZE 字节；图片等已压缩的文件、
+  SSE（text/event-stream，需逐条即时送达）和支持 Range 的文件响应不压缩；
+- 流式响应（导出）逐块压缩并 flush，客户端可以边下载边解析；
+- 强 ETag 改为弱 ETag（RFC 9110 8.8.1），If-None-Match 仍可匹配；
+- 默认不压缩 text/html：admin 与可浏览 API 页面带有 CSRF token，压缩后的长度会泄露其内容（BREACH）。
+
+放在 PerformanceMiddleware 之内，/metrics 中的响应字节数即实际传输的字节数。
+"""
+import zlib
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+
+try:
+    import brotli
+except ImportError:  # 可选依赖
+    brotli = None
+
+DEFAULT_TYPES = (
+    'application/json', 'application/x-ndjson', 'text/csv', 'text/plain',
+    'text/css', 'application/javascript', 'text/javascript',
+)
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+class GzipEncoder:
+    name = 'gzip'
+
+    def __init__(self):
+        # wbits=31：带 gzip 头
+        self.compressor = zlib.compressobj(_setting('COMPRESS_GZIP_LEVEL', 6), zlib.DEFLATED, 31)
+
+    def chunk(self, data):
+        # Z_SYNC_FLUSH：已压缩的数据立即可被解压，流式响应不会积压在压缩器里
+        return self.compressor.compress(data) + self.compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self):
+        return self.compressor.flush()
+
+    def compress(self, data):
+        return self.compressor.compress(data) + self.compressor.flush()
+
+
+class BrotliEncoder:
+    name = 'br'
+
+    def __init__(self):
+        # 动态内容用中等质量，11 级压缩率更高但 CPU 开销大一个数量级
+        self.compressor = brotli.Compressor(quality=_setting('COMPRESS_BROTLI_QUALITY', 5))
+
+    def chunk(self, data):
+        return self.compressor.process(data) + self.compressor.flush()
+
+    def finish(self):
+        return self.compressor.finish()
+
+    def compress(self, data):
+        return self.compressor.process(data) + self.compressor.finish()
+
+
+def available_encoders():
+    # 同等 q 值时按此顺序优先
+    return [BrotliEncoder, GzipEncoder] if brotli is not None else [GzipEncoder]
+
+
+def negotiate(accept_encoding):
+    """按 Accept-Encoding 的 q 值选择编码器类，都不可接受时返回 None"""
+    weights = {}
+    for part in accept_encoding.split(','):
+        coding, *params = [item.strip() for item in part.split(';')]
+        q = 1.0
+        for param in params:
+            key, _, value = param.partition('=')
+            if key.strip() == 'q':
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        if coding:
+            weights[coding.lower()] = q
+    best, best_q = None, 0.0
+    for encoder in available_encoders():
+        q = weights.get(encoder.name, weights.get('*', 0.0))
+        if q > best_q:
+            best, best_q = encoder, q
+    return best
+
+
+def _compress_iterator(iterator, encoder):
+    for chunk in iterator:
+        if chunk:
+            yield encoder.chunk(chunk)
+    yield encoder.finish()
+
+
+async def _acompress_iterator(iterator, encoder):
+    async for chunk in iterator:
+        if chunk:
+            yield encoder.chunk(chunk)
+    yield encoder.finish()
+
+
+class CompressionMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        response = self.get_response(request)
+        return self.process_response(request, response)
+
+    async def __acall__(self, request):
+        response = await self.get_response(request)
+        return self.process_response(request, response)
+
+    @staticmethod
+    def _compressible(response):
+        if response.has_header('Content-Encoding') or response.has_header('Accept-Ranges'):
+            return False
+        content_type = response.get('Content-Type', '').split(';')[0].strip().lower()
+        return content_type in _setting('COMPRESS_TYPES', DEFAULT_TYPES)
+
+    def process_response(self, request, response):
+        if not self._compressible(response):
+            return response
+        patch_vary_headers(response, ('Accept-Encoding',))
+        if not response.streaming and len(response.content) < _setting('COMPRESS_MIN_SIZE', 1024):
+            return response
+        encoder_class = negotiate(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+        if encoder_class is None:
+            return response
+
+        encoder = encoder_class()
+        if response.streaming:
+            if response.is_async:
+                response.streaming_content = _acompress_iterator(response.streaming_content, encoder)
+            else:
+                response.streaming_content = _compress_iterator(response.streaming_content, encoder)
+            # 压缩后的长度要等流结束才知道
+            del response.headers['Content-Length']
+        else:
+            compressed = encoder.compress(response.content)
+            if len(compressed) >= len(response.content):
+                return response
+            response.content = compressed
+            response.headers['Content-Length'] = str(len(compressed))
+
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response.headers['ETag'] = 'W/' + etag
+        response.headers['Content-Encoding'] = encoder.name
+        return response
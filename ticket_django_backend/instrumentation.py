@@ -0,0 +1,302 @@
+"""
+请求级性能埋点。
+
+PerformanceMiddleware 为每个请求记录总耗时、SQL 条数与耗时（connection.execute_wrapper）、
+序列化耗时和响应大小，按 DRF 视图与 action 打标签（如 TicketViewSet.qa_review）：
+
+- 序列化耗时需要替换 BaseSerializer.data（整个进程生效），只在 PERF_SERIALIZER_TIMING 开启时
+  由 TicketsConfig.ready() 安装，关闭后恢复原实现；中间件本身不修改任何全局状态；
+
+- PERF_SERVER_TIMING 开启时写入 Server-Timing 响应头，浏览器开发者工具可直接查看；
+- 汇总到进程内的指标（另含应用层缓存的命中/未命中次数，见 Registry.observe_cache），由 /metrics 以 Prometheus 文本格式输出（每个 worker 进程各自统计，需 PERF_METRICS_TOKEN）；
+- 单条 SQL 超过 PERF_SLOW_QUERY_MS 记为慢查询，同一条 SQL 在一个请求内执行超过
+  PERF_N_PLUS_ONE_THRESHOLD 次记为疑似 N+1；PERF_STRICT 开启时抛出 PerformanceError，测试中可直接失败。
+
+ASGI 下中间件以异步方式运行；异步视图经 sync_to_async（thread_sensitive，默认）执行的查询同样计入 SQL 统计。
+"""
+import bisect
+import hmac
+import logging
+import threading
+import time
+from collections import Counter, defaultdict
+from contextlib import ExitStack
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import connections
+from django.http import HttpResponse, HttpResponseForbidden
+from rest_framework import serializers
+
+logger = logging.getLogger(__name__)
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_current = ContextVar('request_metrics', default=None)
+
+
+class PerformanceError(AssertionError):
+    pass
+
+
+class RequestMetrics:
+    def __init__(self):
+        self.view = None
+        self.queries = 0
+        self.db_time = 0.0
+        self.serializer_time = 0.0
+        self.statements = Counter()
+        self.slow_queries = []
+        self._serializer_depth = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        # connection.execute_wrapper 回调
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - start
+            self.queries += 1
+            self.db_time += elapsed
+            self.statements[sql] += 1
+            if elapsed * 1000 >= _setting('PERF_SLOW_QUERY_MS', 200):
+                self.slow_queries.append((sql, elapsed))
+
+    def n_plus_one(self):
+        threshold = _setting('PERF_N_PLUS_ONE_THRESHOLD', 10)
+        return [(sql, count) for sql, count in self.statements.items() if count > threshold]
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+# --- 序列化耗时 ---
+_original_data = serializers.BaseSerializer.data
+
+
+def _timed_data(self):
+    metrics = _current.get()
+    if metrics is None:
+        return _original_data.fget(self)
+    # 嵌套序列化器只计最外层
+    metrics._serializer_depth += 1
+    start = time.perf_counter()
+    try:
+        return _original_data.fget(self)
+    finally:
+        metrics._serializer_depth -= 1
+        if not metrics._serializer_depth:
+            metrics.serializer_time += time.perf_counter() - start
+
+
+def install_serializer_timing():
+    if serializers.BaseSerializer.data is _original_data:
+        serializers.BaseSerializer.data = property(_timed_data)
+
+
+def uninstall_serializer_timing():
+    serializers.BaseSerializer.data = _original_data
+
+
+def configure_serializer_timing():
+    # AppConfig.ready() 与 setting_changed 中调用
+    if _setting('PERF_SERIALIZER_TIMING', False):
+        install_serializer_timing()
+    else:
+        uninstall_serializer_timing()
+
+
+# --- 进程内指标 ---
+class Registry:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self.requests = Counter()
+        self.durations = defaultdict(lambda: [0] * (len(DURATION_BUCKETS) + 1))
+        self.duration_sum = Counter()
+        self.queries = Counter()
+        self.db_time = Counter()
+        self.serializer_time = Counter()
+        self.response_bytes = Counter()
+        self.slow_queries = Counter()
+        self.n_plus_one = Counter()
+        self.cache_requests = Counter()
+
+    def observe(self, view, method, status, wall, metrics, size):
+        with self.lock:
+            self.requests[(view, method, str(status))] += 1
+            self.durations[view][bisect.bisect_left(DURATION_BUCKETS, wall)] += 1
+            self.duration_sum[view] += wall
+            self.queries[view] += metrics.queries
+            self.db_time[view] += metrics.db_time
+            self.serializer_time[view] += metrics.serializer_time
+            self.response_bytes[view] += size
+            self.slow_queries[view] += len(metrics.slow_queries)
+            self.n_plus_one[view] += len(metrics.n_plus_one())
+
+    def observe_cache(self, cache, hits=0, misses=0):
+        # 应用层缓存（如 tickets/cache.py）的命中统计，与请求指标一起由 /metrics 输出
+        with self.lock:
+            self.cache_requests[(cache, 'hit')] += hits
+            self.cache_requests[(cache, 'miss')] += misses
+
+    def cache_stats(self, cache):
+        with self.lock:
+            return {'hits': self.cache_requests[(cache, 'hit')], 'misses': self.cache_requests[(cache, 'miss')]}
+
+    def reset_cache(self, cache):
+        with self.lock:
+            for result in ('hit', 'miss'):
+                self.cache_requests.pop((cache, result), None)
+
+    def render(self):
+        lines = []
+
+        def family(name, kind, help_text, samples):
+            lines.append(f'# HELP {name} {help_text}')
+            lines.append(f'# TYPE {name} {kind}')
+            lines.extend(samples)
+
+        def labels(**values):
+            return ','.join(f'{key}="{_escape(value)}"' for key, value in values.items())
+
+        with self.lock:
+            family('ticket_http_requests_total', 'counter', 'Requests by view, method and status.', [
+                f'ticket_http_requests_total{{{labels(view=v, method=m, status=s)}}} {n}'
+                for (v, m, s), n in sorted(self.requests.items())
+            ])
+            samples = []
+            for view, buckets in sorted(self.durations.items()):
+                total = 0
+                for bound, count in zip((*DURATION_BUCKETS, '+Inf'), buckets):
+                    total += count
+                    samples.append(
+                        f'ticket_http_request_duration_seconds_bucket{{{labels(view=view, le=bound)}}} {total}'
+                    )
+                samples.append(f'ticket_http_request_duration_seconds_sum{{{labels(view=view)}}} '
+                               f'{self.duration_sum[view]:.6f}')
+                samples.append(f'ticket_http_request_duration_seconds_count{{{labels(view=view)}}} {total}')
+            family('ticket_http_request_duration_seconds', 'histogram', 'Request wall time.', samples)
+            for name, kind, help_text, counter, fmt in (
+                ('ticket_db_queries_total', 'counter', 'SQL statements executed.', self.queries, '{}'),
+                ('ticket_db_query_seconds_total', 'counter', 'Time spent in SQL.', self.db_time, '{:.6f}'),
+                ('ticket_serializer_seconds_total', 'counter', 'Time spent in DRF serializers.',
+                 self.serializer_time, '{:.6f}'),
+                ('ticket_http_response_bytes_total', 'counter', 'Response body bytes.', self.response_bytes, '{}'),
+                ('ticket_db_slow_queries_total', 'counter', 'Queries slower than PERF_SLOW_QUERY_MS.',
+                 self.slow_queries, '{}'),
+                ('ticket_db_n_plus_one_total', 'counter', 'Statements repeated more than PERF_N_PLUS_ONE_THRESHOLD '
+                 'times in one request.', self.n_plus_one, '{}'),
+            ):
+                family(name, kind, help_text, [
+                    f'{name}{{{labels(view=view)}}} {fmt.format(value)}' for view, value in sorted(counter.items())
+                ])
+            family('ticket_cache_requests_total', 'counter', 'Application cache lookups by cache and result.', [
+                f'ticket_cache_requests_total{{{labels(cache=c, result=r)}}} {n}'
+                for (c, r), n in sorted(self.cache_requests.items())
+            ])
+        return '\n'.join(lines) + '\n'
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+registry = Registry()
+
+
+def view_label(view_func):
+    # DRF：as_view() 返回的函数带有 cls（ViewSet 还带有 actions: {method: action}）
+    cls = getattr(view_func, 'cls', None) or getattr(view_func, 'view_class', None)
+    if cls is None:
+        return f'{view_func.__module__}.{view_func.__name__}'
+    return cls.__name__
+
+
+def _wrap_connections(stack, metrics):
+    for alias in connections:
+        stack.enter_context(connections[alias].execute_wrapper(metrics))
+
+
+class PerformanceMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        # ASGI 下整条中间件链保持异步，避免每个请求在这里切换一次线程
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        metrics, start = RequestMetrics(), time.perf_counter()
+        token = _current.set(metrics)
+        try:
+            with ExitStack() as stack:
+                _wrap_connections(stack, metrics)
+                response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self._finish(request, response, metrics, start)
+
+    async def __acall__(self, request):
+        metrics, start = RequestMetrics(), time.perf_counter()
+        token = _current.set(metrics)
+        stack = ExitStack()
+        try:
+            # 数据库连接是线程局部的，异步视图的查询在本请求的 sync_to_async 线程上执行，execute_wrapper 挂在那里
+            await sync_to_async(_wrap_connections)(stack, metrics)
+            try:
+                response = await self.get_response(request)
+            finally:
+                await sync_to_async(stack.close)()
+        finally:
+            _current.reset(token)
+        return self._finish(request, response, metrics, start)
+
+    def _finish(self, request, response, metrics, start):
+        wall = time.perf_counter() - start
+        view = metrics.view or 'unmatched'
+        size = 0 if response.streaming else len(response.content)
+        registry.observe(view, request.method, response.status_code, wall, metrics, size)
+        if _setting('PERF_SERVER_TIMING', False):
+            response['Server-Timing'] = (
+                f'db;dur={metrics.db_time * 1000:.1f};desc="{metrics.queries} queries", '
+                f'ser;dur={metrics.serializer_time * 1000:.1f}, '
+                f'total;dur={wall * 1000:.1f};desc="{view}"'
+            )
+        self._check(request, view, metrics)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        metrics = _current.get()
+        if metrics is not None:
+            label = view_label(view_func)
+            action = (getattr(view_func, 'actions', None) or {}).get(request.method.lower())
+            metrics.view = f'{label}.{action}' if action else label
+
+    @staticmethod
+    def _check(request, view, metrics):
+        problems = [f'slow query ({elapsed * 1000:.0f} ms): {sql}' for sql, elapsed in metrics.slow_queries]
+        problems += [f'possible N+1, executed {count} times: {sql}' for sql, count in metrics.n_plus_one()]
+        if not problems:
+            return
+        for problem in problems:
+            logger.warning('%s %s [%s] %s', request.method, request.path, view, problem)
+        if _setting('PERF_STRICT', False):
+            raise PerformanceError(f'{request.method} {request.path} [{view}]: ' + '; '.join(problems))
+
+
+def metrics_view(request):
+    """Prometheus 抓取接口：需携带 Authorization: Bearer <PERF_METRICS_TOKEN>；未设置令牌时始终关闭（DEBUG 下也是）"""
+    token = _setting('PERF_METRICS_TOKEN', '')
+    if not token or not hmac.compare_digest(request.headers.get('Authorization', ''), f'Bearer {token}'):
+        return HttpResponseForbidden()
+    return HttpResponse(registry.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
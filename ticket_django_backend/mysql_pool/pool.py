@@ -0,0 +1,96 @@
+"""
+与数据库驱动无关的连接池实现，供 mysql_pool 后端使用。
+"""
+import threading
+import time
+from collections import deque
+
+DEFAULT_POOL_OPTIONS = {
+    'MAX_SIZE': 10,
+    'MAX_IDLE': 300,
+    'RECYCLE': 3600,
+    'PING_AFTER': 10,
+}
+
+
+class ConnectionPool:
+    def __init__(self, max_size, max_idle, recycle, ping_after):
+        self.max_size = max_size
+        self.max_idle = max_idle
+        self.recycle = recycle
+        self.ping_after = ping_after
+        self._idle = deque()
+        self._lock = threading.Lock()
+        self.created = 0
+        self.reused = 0
+
+    def acquire(self, connect):
+        while True:
+            with self._lock:
+                item = self._idle.pop() if self._idle else None
+            if item is None:
+                break
+            conn, created_at, released_at = item
+            now = time.monotonic()
+            if now - created_at > self.recycle or now - released_at > self.max_idle:
+                self._discard(conn)
+                continue
+            if now - released_at > self.ping_after:
+                try:
+                    conn.ping()
+                except Exception:
+                    self._discard(conn)
+                    continue
+            with self._lock:
+                self.reused += 1
+            conn._pool_created_at = created_at
+            return conn
+
+        conn = connect()
+        conn._pool_created_at = time.monotonic()
+        with self._lock:
+            self.created += 1
+        return conn
+
+    def release(self, conn):
+        try:
+            # 丢弃未提交的事务，保证下一个使用者拿到干净的连接
+            conn.rollback()
+        except Exception:
+            self._discard(conn)
+            return
+        with self._lock:
+            if len(self._idle) < self.max_size:
+                self._idle.append((conn, conn._pool_created_at, time.monotonic()))
+                return
+        self._discard(conn)
+
+    def clear(self):
+        with self._lock:
+            idle, self._idle = self._idle, deque()
+        for conn, _, _ in idle:
+            self._discard(conn)
+
+    @staticmethod
+    def _discard(conn):
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(alias, options):
+    with _pools_lock:
+        if alias not in _pools:
+            merged = {**DEFAULT_POOL_OPTIONS, **(options or {})}
+            _pools[alias] = ConnectionPool(
+                max_size=merged['MAX_SIZE'],
+                max_idle=merged['MAX_IDLE'],
+                recycle=merged['RECYCLE'],
+                ping_after=merged['PING_AFTER'],
+            )
+        return _pools[alias]
@@ -0,0 +1,145 @@
+"""
+主从读写分离。
+
+- 写操作、select_for_update（Django 以写库路由）始终走 default；
+- 安全方法（GET/HEAD/OPTIONS）的读操作随机分配到 settings.DATABASE_REPLICAS 中的从库；
+- 非安全方法的整个请求固定在主库；写成功后，同一客户端在 DATABASE_REPLICA_STICKY_SECONDS
+  秒内的读也固定在主库，避免复制延迟导致读不到自己刚写入的数据。该标记记录在
+  DATABASE_REPLICA_PIN_CACHE 中，后续请求可能落在其他 worker 进程上，因此必须是共享缓存；
+- 请求之外读取刚写入数据或需与主库锁保持一致的代码（后台任务、统计重算）用 use_primary() 包住；
+  流式响应体用 preserve_routing() 包装，沿用请求时的选择。
+"""
+import contextlib
+import hashlib
+import random
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.exceptions import ImproperlyConfigured
+
+PRIMARY = 'default'
+
+_pinned = ContextVar('db_pinned_to_primary', default=False)
+
+
+def replicas():
+    return getattr(settings, 'DATABASE_REPLICAS', [])
+
+
+@contextlib.contextmanager
+def use_primary():
+    token = _pinned.set(True)
+    try:
+        yield
+    finally:
+        _pinned.reset(token)
+
+
+def preserve_routing(iterable):
+    """流式响应体在中间件返回之后才被迭代，此时已不在请求的路由上下文中；
+    捕获当前是否固定主库，并在每次取下一块时恢复"""
+    if not _pinned.get():
+        return iterable
+
+    def iterate():
+        iterator = iter(iterable)
+        while True:
+            # 不跨 yield 持有 ContextVar token，服务器可在不同上下文中逐块读取
+            with use_primary():
+                try:
+                    chunk = next(iterator)
+                except StopIteration:
+                    return
+            yield chunk
+
+    return iterate()
+
+
+class PrimaryReplicaRouter:
+    def db_for_read(self, model, **hints):
+        aliases = replicas()
+        if _pinned.get() or not aliases:
+            return PRIMARY
+        return random.choice(aliases)
+
+    def db_for_write(self, model, **hints):
+        return PRIMARY
+
+    def allow_relation(self, obj1, obj2, **hints):
+        aliases = {PRIMARY, *replicas()}
+        if obj1._state.db in aliases and obj2._state.db in aliases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # 从库由复制同步，不单独迁移
+        return db == PRIMARY
+
+
+def pin_cache():
+    return caches[getattr(settings, 'DATABASE_REPLICA_PIN_CACHE', 'default')]
+
+
+def _sticky_seconds():
+    return getattr(settings, 'DATABASE_REPLICA_STICKY_SECONDS', 5)
+
+
+def _client_key(request):
+    # 以 Authorization 头（JWT）或会话 cookie 识别客户端，无需先完成认证
+    ident = request.META.get('HTTP_AUTHORIZATION') or request.COOKIES.get(settings.SESSION_COOKIE_NAME)
+    if not ident:
+        ident = request.META.get('REMOTE_ADDR', '')
+    return 'db-pin:' + hashlib.sha256(ident.encode()).hexdigest()
+
+
+class ReplicaRoutingMiddleware:
+    sync_capable = True
+    async_capable = True
+    safe_methods = ('GET', 'HEAD', 'OPTIONS')
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+        if replicas() and isinstance(pin_cache(), (LocMemCache, DummyCache)):
+            # 进程内缓存只对同一 worker 生效，写后读会被分到从库而读不到刚写入的数据
+            raise ImproperlyConfigured('DATABASE_REPLICAS requires DATABASE_REPLICA_PIN_CACHE to be a cache '
+                                       'shared by all workers (e.g. set REDIS_URL), not a local-memory cache.')
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        if not replicas():
+            return self.get_response(request)
+
+        key = _client_key(request)
+        unsafe = request.method not in self.safe_methods
+        token = _pinned.set(unsafe or bool(pin_cache().get(key)))
+        try:
+            response = self.get_response(request)
+        finally:
+            _pinned.reset(token)
+        if unsafe and response.status_code < 400:
+            pin_cache().set(key, 1, _sticky_seconds())
+        return response
+
+    async def __acall__(self, request):
+        # _pinned 随上下文传入 sync_to_async 执行的查询
+        if not replicas():
+            return await self.get_response(request)
+
+        key = _client_key(request)
+        unsafe = request.method not in self.safe_methods
+        token = _pinned.set(unsafe or bool(await pin_cache().aget(key)))
+        try:
+            response = await self.get_response(request)
+        finally:
+            _pinned.reset(token)
+        if unsafe and response.status_code < 400:
+            await pin_cache().aset(key, 1, _sticky_seconds())
+        return response
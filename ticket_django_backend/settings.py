@@ -9,6 +9,7 @@ https://docs.djangoproject.com/en/5.2/topics/settings/
 For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
+import importlib.util
 import os
 from datetime import timedelta
 from pathlib import Path
@@ -31,19 +32,30 @@ DEBUG = True
 
 ALLOWED_HOSTS = []
 
+# JSON 渲染/解析：默认使用 orjson（tickets/renderers.py），JSON_BACKEND=stdlib 或未安装 orjson 时使用 DRF 自带实现
+JSON_BACKEND = os.environ.get('JSON_BACKEND', 'orjson' if importlib.util.find_spec('orjson') else 'stdlib')
+
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        # 用户取自缓存的快照，避免每个请求查询用户表（见 tickets/authentication.py）
+        'tickets.authentication.CachedUserJWTAuthentication',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
     ],
+    'DEFAULT_RENDERER_CLASSES': [
+        'tickets.renderers.ORJSONRenderer' if JSON_BACKEND == 'orjson' else 'rest_framework.renderers.JSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
     # 显式启用 multipart 解析器（默认已包含，此处为明确配置）
     'DEFAULT_PARSER_CLASSES': [
-        'rest_framework.parsers.JSONParser',
+        'tickets.renderers.ORJSONParser' if JSON_BACKEND == 'orjson' else 'rest_framework.parsers.JSONParser',
         'rest_framework.parsers.FormParser',
         'rest_framework.parsers.MultiPartParser',
     ],
+    'DEFAULT_THROTTLE_RATES': {
+        'login': os.environ.get('LOGIN_THROTTLE_RATE', '20/min'),
+    },
 }
 # Application definition
 
@@ -60,7 +72,12 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # 最外层，统计包括其他中间件在内的整个请求（见 ticket_django_backend/instrumentation.py）
+    'ticket_django_backend.instrumentation.PerformanceMiddleware',
+    # 在其余中间件之外压缩，埋点记录的是压缩后的字节数（见 ticket_django_backend/compression.py）
+    'ticket_django_backend.compression.CompressionMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'ticket_django_backend.routers.ReplicaRoutingMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -102,17 +119,94 @@ MYSQL_USER = os.environ.get('MYSQL_USERNAME')
 MYSQL_PASSWORD = os.environ.get('MYSQL_PASSWORD')
 MYSQL_HOST = os.environ.get('MYSQL_HOST')
 
+# 连接生命周期与连接池，可分别为 WSGI / ASGI 入口调优：
+# asgi.py / wsgi.py 设置 DJANGO_SERVER_INTERFACE，带 ASGI_ / WSGI_ 前缀的变量优先于无前缀的变量，
+# 例如 ASGI_DB_POOL=1、WSGI_DB_CONN_MAX_AGE=120。
+SERVER_INTERFACE = os.environ.get('DJANGO_SERVER_INTERFACE', 'wsgi').upper()
+
+
+def db_env(name, default):
+    return os.environ.get(f'{SERVER_INTERFACE}_{name}', os.environ.get(name, default))
+
+
+def env_bool(value):
+    return str(value).lower() in ('1', 'true', 'yes', 'on')
+
+
+# ASGI 下请求在不同线程执行，持久连接难以复用，默认改用连接池并在请求结束时归还
+DB_DEFAULTS = {
+    'WSGI': {'DB_CONN_MAX_AGE': 60, 'DB_POOL': False},
+    'ASGI': {'DB_CONN_MAX_AGE': 0, 'DB_POOL': True},
+}.get(SERVER_INTERFACE, {'DB_CONN_MAX_AGE': 60, 'DB_POOL': False})
+
+DB_POOL = env_bool(db_env('DB_POOL', DB_DEFAULTS['DB_POOL']))
+
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.mysql',
+        # 连接池后端见 ticket_django_backend/mysql_pool
+        'ENGINE': 'ticket_django_backend.mysql_pool' if DB_POOL else 'django.db.backends.mysql',
         'NAME': MYSQL_DATABASE,  # 数据库名
         'USER': MYSQL_USER,  # MySQL 用户名
         'PASSWORD': MYSQL_PASSWORD,  # MySQL 密码
         'HOST': MYSQL_HOST,  # 远程 MySQL 服务器 IP 或域名
-        'PORT': '3306',  # MySQL 端口，默认为 3306
+        'PORT': os.environ.get('MYSQL_PORT', '3306'),  # MySQL 端口，默认为 3306
+        # 持久连接秒数，0 表示每个请求结束后关闭（启用连接池时为归还）
+        'CONN_MAX_AGE': int(db_env('DB_CONN_MAX_AGE', DB_DEFAULTS['DB_CONN_MAX_AGE'])),
+        # 复用持久连接前先检查是否可用
+        'CONN_HEALTH_CHECKS': env_bool(db_env('DB_CONN_HEALTH_CHECKS', True)),
+        'POOL': {
+            'MAX_SIZE': int(db_env('DB_POOL_MAX_SIZE', 10)),
+            'MAX_IDLE': int(db_env('DB_POOL_MAX_IDLE', 300)),
+            'RECYCLE': int(db_env('DB_POOL_RECYCLE', 3600)),
+            'PING_AFTER': int(db_env('DB_POOL_PING_AFTER', 10)),
+        },
     }
 }
 
+# 只读从库：DB_REPLICA_HOSTS=host1,host2 生成 replica_0、replica_1 等别名，
+# 账号、库名与主库一致，路由规则见 ticket_django_backend/routers.py
+DATABASE_REPLICAS = []
+for index, host in enumerate(h.strip() for h in os.environ.get('DB_REPLICA_HOSTS', '').split(',') if h.strip()):
+    alias = f'replica_{index}'
+    DATABASES[alias] = {
+        **DATABASES['default'],
+        'HOST': host,
+        'TEST': {'MIRROR': 'default'},
+    }
+    DATABASE_REPLICAS.append(alias)
+
+DATABASE_ROUTERS = ['ticket_django_backend.routers.PrimaryReplicaRouter']
+# 写请求成功后，同一客户端的读请求在该秒数内固定走主库
+DATABASE_REPLICA_STICKY_SECONDS = int(os.environ.get('DB_REPLICA_STICKY_SECONDS', 5))
+# 记录上述固定标记的缓存，须为各 worker 共享的缓存（Redis 等）；配置了从库而该缓存为 locmem 时无法启动
+DATABASE_REPLICA_PIN_CACHE = 'default'
+
+
+# Cache
+# 默认使用进程内 locmem；生产环境设置 REDIS_URL 使用 Redis
+REDIS_URL = os.environ.get('REDIS_URL')
+
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'OPTIONS': {'MAX_ENTRIES': 10000},
+        }
+    }
+
+# 工单序列化结果缓存（tickets/cache.py）
+TICKET_CACHE_ALIAS = 'default'
+TICKET_CACHE_TIMEOUT = int(os.environ.get('TICKET_CACHE_TIMEOUT', 300))
+# 认证使用的用户快照缓存时间（秒）；default 为 locmem 时停用/降级/吊销要等该时间后才在其他 worker 生效（tickets.W001）
+AUTH_USER_CACHE_TIMEOUT = int(os.environ.get('AUTH_USER_CACHE_TIMEOUT', 60))
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -134,6 +228,10 @@ AUTH_PASSWORD_VALIDATORS = [
 
 AUTH_USER_MODEL = 'tickets.User'
 
+AUTHENTICATION_BACKENDS = [
+    'tickets.backends.UsernameOrEmailBackend',
+]
+
 # Internationalization
 # https://docs.djangoproject.com/en/5.2/topics/i18n/
 
@@ -155,7 +253,49 @@ STATIC_URL = 'static/'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# 受保护媒体文件的下发方式（tickets/media.py）：'x-accel-redirect'（nginx）、'x-sendfile'（Apache），
+# 为空时由 Django 直接返回文件。MEDIA_ACCEL_PREFIX 需与 nginx 中 internal location 一致
+MEDIA_SENDFILE = os.environ.get('MEDIA_SENDFILE', '')
+MEDIA_ACCEL_PREFIX = os.environ.get('MEDIA_ACCEL_PREFIX', '/protected-media/')
+
+# 分块上传（tickets/uploads.py）：单文件上限、每次读写的块大小、未完成分块的本地暂存目录
+UPLOAD_MAX_SIZE = int(os.environ.get('UPLOAD_MAX_SIZE', 20 * 1024 * 1024))
+UPLOAD_CHUNK_SIZE = 64 * 1024
+UPLOAD_PARTIAL_DIR = os.environ.get('UPLOAD_PARTIAL_DIR', str(MEDIA_ROOT / 'uploads' / 'partial'))
+# 超过该秒数未收到新分块的会话由 manage.py expire_uploads 清理
+UPLOAD_SESSION_EXPIRY = int(os.environ.get('UPLOAD_SESSION_EXPIRY', 24 * 3600))
+
+# 后台任务（缩略图等），见 tickets/tasks.py
+TICKET_TASK_BACKEND = os.environ.get('TICKET_TASK_BACKEND', 'tickets.tasks.ThreadQueueBackend')
+TICKET_TASK_WORKERS = int(os.environ.get('TICKET_TASK_WORKERS', 2))
+
+# 性能埋点：Server-Timing 响应头、慢查询阈值（毫秒）、同一 SQL 单请求内重复次数阈值（疑似 N+1），
+# PERF_STRICT 开启时超过阈值直接抛出 PerformanceError（测试用）；/metrics 的访问令牌，
+# 未设置时 /metrics 一律返回 403（本地调试也需设置）；PERF_SERIALIZER_TIMING 关闭时不替换
+# DRF 的 BaseSerializer.data，序列化耗时记为 0
+PERF_SERVER_TIMING = env_bool(os.environ.get('PERF_SERVER_TIMING', DEBUG))
+PERF_SERIALIZER_TIMING = env_bool(os.environ.get('PERF_SERIALIZER_TIMING', True))
+PERF_SLOW_QUERY_MS = float(os.environ.get('PERF_SLOW_QUERY_MS', 200))
+PERF_N_PLUS_ONE_THRESHOLD = int(os.environ.get('PERF_N_PLUS_ONE_THRESHOLD', 10))
+PERF_STRICT = env_bool(os.environ.get('PERF_STRICT', False))
+PERF_METRICS_TOKEN = os.environ.get('PERF_METRICS_TOKEN', '')
+
+# 响应压缩：不小于 COMPRESS_MIN_SIZE 字节的文本响应按 Accept-Encoding 使用 br（需安装 Brotli）或 gzip
+COMPRESS_MIN_SIZE = int(os.environ.get('COMPRESS_MIN_SIZE', 1024))
+COMPRESS_GZIP_LEVEL = int(os.environ.get('COMPRESS_GZIP_LEVEL', 6))
+COMPRESS_BROTLI_QUALITY = int(os.environ.get('COMPRESS_BROTLI_QUALITY', 5))
+
+# 工单变更推送（tickets/push.py）：默认进程内分发，多 worker 部署设置 REDIS_URL 后经 Redis 广播；
+# 心跳间隔（秒）、每个连接的待发送队列长度、单个连接可订阅的频道数
+PUSH_BACKEND = os.environ.get('PUSH_BACKEND', 'tickets.push.RedisBroker' if REDIS_URL else 'tickets.push.LocalBroker')
+PUSH_HEARTBEAT = float(os.environ.get('PUSH_HEARTBEAT', 15))
+PUSH_QUEUE_SIZE = int(os.environ.get('PUSH_QUEUE_SIZE', 100))
+PUSH_MAX_CHANNELS = int(os.environ.get('PUSH_MAX_CHANNELS', 100))
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
+
+# 工单全文检索后端：TokenIndexBackend（任何数据库）或 MySQLFullTextBackend（InnoDB FULLTEXT）
+TICKET_SEARCH_BACKEND = os.environ.get('TICKET_SEARCH_BACKEND', 'tickets.search.TokenIndexBackend')
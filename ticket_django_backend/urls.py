@@ -16,24 +16,37 @@ Including another URLconf
 """
 from django.contrib import admin
 from django.urls import path, include
-from django.conf import settings
-from django.conf.urls.static import static
 from rest_framework.routers import DefaultRouter
-from tickets.views import UserViewSet, TicketViewSet
+from tickets import async_views
+from ticket_django_backend.instrumentation import metrics_view
+from tickets.views import (
+    UserViewSet, TicketViewSet, UploadViewSet, DevReportScreenshotView, StoredFileView,
+    StatsView, TimeInStatusView, LeadTimeView,
+)
 from tickets.serializers import CustomTokenObtainPairView
 from rest_framework_simplejwt.views import TokenRefreshView
 
 router = DefaultRouter()
 router.register(r'users', UserViewSet)
 router.register(r'tickets', TicketViewSet)
+router.register(r'uploads', UploadViewSet, basename='upload')
 
 urlpatterns = [
     path('admin/', admin.site.urls),
+    path('metrics', metrics_view, name='metrics'),
     path('api/login/', CustomTokenObtainPairView.as_view(), name='token_obtain_pair'),
     path('api/token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
     path('api/', include(router.urls)),
+    path('api/stats/', StatsView.as_view(), name='ticket_stats'),
+    path('api/stats/time-in-status/', TimeInStatusView.as_view(), name='ticket_time_in_status'),
+    path('api/stats/lead-time/', LeadTimeView.as_view(), name='ticket_lead_time'),
+    # 需登录的媒体文件，生产环境经 X-Accel-Redirect / X-Sendfile 由前端服务器发送
+    path('api/dev-reports/<uuid:pk>/screenshot/', DevReportScreenshotView.as_view(), name='dev_report_screenshot'),
+    path('api/files/<uuid:pk>/', StoredFileView.as_view(), name='stored_file'),
+    # 异步只读接口，ASGI 部署时不占用线程
+    path('api/async/tickets/', async_views.ticket_list, name='async_ticket_list'),
+    path('api/async/tickets/<uuid:pk>/', async_views.ticket_detail, name='async_ticket_detail'),
+    path('api/async/users/<uuid:pk>/', async_views.user_detail, name='async_user_detail'),
+    # 工单变更推送（SSE），WebSocket 入口 /ws/events/ 见 asgi.py
+    path('api/events/', async_views.ticket_events, name='ticket_events'),
 ]
-
-# 开发环境下提供媒体文件访问（生产环境应使用对象存储或专门的静态服务器）
-if settings.DEBUG:
-    urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
@@ -0,0 +1,190 @@
+"""
+基于 TicketStatusEvent 的周期分析：各状态停留时长、从创建到关闭的前置时间（lead time）的分位数。
+
+事件按 (ticket_id, at, id) 顺序分页读取（命中 status_event_ticket_at_idx），相邻两条事件构成一个状态区间，
+区间时长写入对数分桶的 QuantileSketch。内存占用只与分桶数有关，与事件表大小无关。
+"""
+import math
+from collections import Counter
+from itertools import islice
+
+from django.db.models import Q
+
+from .models import TicketStatusEvent
+
+CHUNK_SIZE = 2000
+DEFAULT_PERCENTILES = (50, 90, 99)
+
+
+class QuantileSketch:
+    """流式分位数估计：按 gamma 的幂对数分桶，估计值相对误差不超过 accuracy"""
+
+    def __init__(self, accuracy=0.01):
+        self.gamma = (1 + accuracy) / (1 - accuracy)
+        self.log_gamma = math.log(self.gamma)
+        self.buckets = Counter()
+        self.zeros = 0
+        self.count = 0
+        self.total = 0.0
+        self.min = self.max = None
+
+    def add(self, value):
+        self.count += 1
+        self.total += value
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+        if value <= 0:
+            self.zeros += 1
+        else:
+            self.buckets[math.ceil(math.log(value) / self.log_gamma)] += 1
+
+    def quantile(self, q):
+        if not self.count:
+            return None
+        rank = q * (self.count - 1)
+        seen = self.zeros
+        if rank < seen:
+            return 0.0
+        for index in sorted(self.buckets):
+            seen += self.buckets[index]
+            if seen > rank:
+                estimate = 2 * self.gamma ** index / (self.gamma + 1)
+                return min(max(estimate, self.min), self.max)
+        return self.max
+
+    def summary(self, percentiles=DEFAULT_PERCENTILES):
+        result = {'count': self.count, 'mean': self.total / self.count if self.count else None}
+        for percentile in percentiles:
+            result[f'p{percentile:g}'] = self.quantile(percentile / 100)
+        return result
+
+
+# --- 事件记录 ---
+def record(ticket_id, from_status, to_status, at):
+    TicketStatusEvent.objects.create(ticket_id=ticket_id, from_status=from_status, to_status=to_status, at=at)
+
+
+def record_created(tickets):
+    TicketStatusEvent.objects.bulk_create([
+        TicketStatusEvent(ticket_id=ticket.pk, to_status=ticket.current_status, at=ticket.created_at)
+        for ticket in tickets
+    ], batch_size=1000)
+
+
+def ticket_saved(ticket, created):
+    """post_save：新建写入初始事件；直接保存修改了状态时补记一次流转（须在 stats.ticket_saved 之前调用）"""
+    if created:
+        record_created([ticket])
+        return
+    loaded = getattr(ticket, '_loaded_stat_values', None)
+    if loaded is not None and loaded['current_status'] != ticket.current_status:
+        record(ticket.pk, loaded['current_status'], ticket.current_status, ticket.status_changed_at)
+
+
+# --- 流式聚合 ---
+def iter_keyset(queryset, keys, chunk_size=None):
+    """按 keys 升序（最后一个键唯一）分页读取 values() 行，每页一条走索引的范围查询
+
+    不用 .iterator()：MySQLdb 会把整个结果集读入客户端内存，起不到流式读取的作用。
+    """
+    chunk_size = chunk_size or CHUNK_SIZE
+    queryset = queryset.order_by(*keys)
+    last = None
+    while True:
+        page = queryset
+        if last is not None:
+            # (k1, k2, k3) > (v1, v2, v3) 展开为 k1 > v1 OR (k1 = v1 AND k2 > v2) OR ...
+            after = Q()
+            for index, key in enumerate(keys):
+                after |= Q(**{k: last[k] for k in keys[:index]}, **{f'{key}__gt': last[key]})
+            page = page.filter(after)
+        rows = list(page[:chunk_size])
+        yield from rows
+        if len(rows) < chunk_size:
+            return
+        last = rows[-1]
+
+
+def ordered_events(queryset=None):
+    queryset = TicketStatusEvent.objects.all() if queryset is None else queryset
+    rows = iter_keyset(queryset.values('ticket_id', 'to_status', 'at', 'id'), ('ticket_id', 'at', 'id'))
+    return ((row['ticket_id'], row['to_status'], row['at']) for row in rows)
+
+
+def intervals(events, until=None):
+    """把按 (ticket_id, at) 排序的事件转为 (ticket_id, status, entered_at, left_at)
+
+    给定 until 时，每个工单最后一个尚未结束的状态区间截止到 until；否则不产出未结束的区间。
+    """
+    previous = None
+    for ticket_id, to_status, at in events:
+        if previous is not None:
+            if previous[0] == ticket_id:
+                yield previous[0], previous[1], previous[2], at
+            elif until is not None:
+                yield previous[0], previous[1], previous[2], until
+        previous = (ticket_id, to_status, at)
+    if previous is not None and until is not None:
+        yield previous[0], previous[1], previous[2], until
+
+
+def time_in_status(since=None, until=None, statuses=None, open_until=None, accuracy=0.01):
+    """各状态停留时长（秒）的分布，只统计进入时间在 [since, until) 内的区间"""
+    queryset = TicketStatusEvent.objects.all()
+    if since is not None:
+        # 区间的结束事件不早于进入事件，按 since 过滤不会丢失区间终点
+        queryset = queryset.filter(at__gte=since)
+    sketches = {}
+    for _, status, entered_at, left_at in intervals(ordered_events(queryset), until=open_until):
+        if until is not None and entered_at >= until:
+            continue
+        if statuses and status not in statuses:
+            continue
+        sketch = sketches.get(status)
+        if sketch is None:
+            sketch = sketches[status] = QuantileSketch(accuracy)
+        sketch.add((left_at - entered_at).total_seconds())
+    return sketches
+
+
+def lead_time(since=None, until=None, accuracy=0.01):
+    """从创建到首次关闭的时长（秒）分布，按关闭时间落在 [since, until) 内筛选
+
+    先由 status_event_status_at_idx 找出在时间窗内关闭过的工单，再按批读取这些工单的事件，不扫描整张事件表。
+    """
+    closes = TicketStatusEvent.objects.filter(to_status='CLOSED')
+    events = TicketStatusEvent.objects.all()
+    if since is not None:
+        closes = closes.filter(at__gte=since)
+    if until is not None:
+        closes = closes.filter(at__lt=until)
+        # 首次关闭早于 until，之后的事件不影响结果
+        events = events.filter(at__lt=until)
+    ticket_ids = (row['ticket_id'] for row in iter_keyset(closes.values('ticket_id').distinct(), ('ticket_id',)))
+
+    sketch = QuantileSketch(accuracy)
+    while batch := list(islice(ticket_ids, CHUNK_SIZE)):
+        current, created_at, closed = None, None, False
+        for ticket_id, to_status, at in ordered_events(events.filter(ticket_id__in=batch)):
+            if ticket_id != current:
+                current, created_at, closed = ticket_id, at, False
+            if to_status == 'CLOSED' and not closed:
+                # 时间窗内关闭过的工单，首次关闭仍可能早于 since
+                closed = True
+                if since is None or at >= since:
+                    sketch.add((at - created_at).total_seconds())
+    return sketch
+
+
+# --- 由历史记录推断状态（import_tickets 使用）---
+# 每类历史记录对应的流转后状态
+def dev_report_status():
+    return 'UNDER_REVIEW'
+
+
+def qa_review_status(agree_to_release):
+    return 'IN_REGRESSION' if agree_to_release else 'IN_MODIFICATION'
+
+
+def regression_status(passed):
+    return 'CLOSED' if passed else 'UNDER_REVIEW'
@@ -4,3 +4,10 @@ from django.apps import AppConfig
 class TicketsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'tickets'
+
+    def ready(self):
+        from ticket_django_backend import instrumentation
+
+        from . import authentication, signals  # noqa: F401
+
+        instrumentation.configure_serializer_timing()
@@ -0,0 +1,156 @@
+"""
+异步只读接口（ASGI 下使用）：工单列表/详情、用户查询与工单变更的 SSE 推送。
+
+使用 Django 异步 ORM（aiterator / aget），等待数据库时不占用线程，单个 worker 可同时服务大量慢客户端。
+写操作仍走 views.py 中的同步 DRF 视图。
+"""
+import base64
+import binascii
+
+from django.conf import settings
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.core.handlers.asgi import ASGIRequest
+from django.db.models import Q
+from django.http import HttpResponse, StreamingHttpResponse
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import APIException, NotAuthenticated, NotFound, ParseError
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+
+from . import push
+from .authentication import CachedUserJWTAuthentication
+from .filters import TicketFilterBackend
+from .models import User, Ticket
+from .pagination import TicketCursorPagination
+from .serializers import TicketSerializer, TicketListSerializer, UserOutSerializer
+
+
+def _json(data, status=200):
+    # 与 DRF 视图使用同一 JSON 渲染器（默认为 orjson）
+    renderer = api_settings.DEFAULT_RENDERER_CLASSES[0]()
+    return HttpResponse(renderer.render(data), status=status, content_type=renderer.media_type)
+
+
+def _encode_cursor(ticket):
+    raw = f'{ticket.created_at.isoformat()}|{ticket.pk}'
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def _decode_cursor(cursor):
+    try:
+        created_at, pk = base64.urlsafe_b64decode(cursor.encode()).decode().split('|')
+        created_at, pk = parse_datetime(created_at), Ticket._meta.pk.to_python(pk)
+    except (ValueError, binascii.Error, DjangoValidationError):
+        raise ParseError('Invalid cursor.')
+    # 格式不符时 parse_datetime 返回 None 而不抛异常
+    if created_at is None or pk is None:
+        raise ParseError('Invalid cursor.')
+    return created_at, pk
+
+
+def async_api_view(view):
+    """认证并把 DRF 异常转换为 JSON 响应"""
+
+    async def wrapper(request, *args, **kwargs):
+        try:
+            result = await CachedUserJWTAuthentication().aauthenticate(request)
+            if result is None:
+                raise NotAuthenticated()
+            request.user = result[0]
+            return await view(request, *args, **kwargs)
+        except APIException as exc:
+            return _json({'detail': exc.detail}, status=exc.status_code)
+
+    wrapper.__name__ = view.__name__
+    return wrapper
+
+
+def _page_size(request):
+    paginator = TicketCursorPagination
+    try:
+        size = int(request.GET.get(paginator.page_size_query_param, paginator.page_size))
+    except ValueError:
+        size = paginator.page_size
+    return max(1, min(size, paginator.max_page_size))
+
+
+@async_api_view
+async def ticket_list(request):
+    # 与 TicketViewSet.list 相同的筛选参数，按 (created_at, id) 倒序的键集分页
+    drf_request = Request(request)
+    drf_request.user = request.user
+    queryset = TicketFilterBackend().filter_queryset(drf_request, Ticket.objects.with_users(), None)
+
+    cursor = request.GET.get('cursor')
+    if cursor:
+        created_at, pk = _decode_cursor(cursor)
+        queryset = queryset.filter(Q(created_at__lt=created_at) | Q(created_at=created_at, pk__lt=pk))
+
+    size = _page_size(request)
+    tickets = [ticket async for ticket in queryset.order_by('-created_at', '-pk')[:size + 1].aiterator()]
+    next_cursor = _encode_cursor(tickets[size - 1]) if len(tickets) > size else None
+    return _json({
+        'next': next_cursor,
+        'results': TicketListSerializer(tickets[:size], many=True).data,
+    })
+
+
+@async_api_view
+async def ticket_detail(request, pk):
+    try:
+        ticket = await Ticket.objects.with_history().aget(pk=pk)
+    except (Ticket.DoesNotExist, DjangoValidationError):
+        raise NotFound()
+    return _json(TicketSerializer(ticket).data)
+
+
+@async_api_view
+async def user_detail(request, pk):
+    try:
+        user = await User.objects.aget(pk=pk)
+    except (User.DoesNotExist, DjangoValidationError):
+        raise NotFound()
+    return _json(UserOutSerializer(user).data)
+
+
+async def ticket_events(request):
+    """SSE：?ticket=<id>（可重复）、?user=me、?status=<状态>；EventSource 不能设置请求头，可用 ?token=<access>"""
+    try:
+        result = await CachedUserJWTAuthentication().aauthenticate(request)
+        user = result[0] if result is not None else await push.authenticate_token(request.GET.get('token'))
+        channels = push.parse_channels(
+            user, request.GET.getlist('ticket'), request.GET.getlist('user'), request.GET.getlist('status'),
+        )
+    except APIException as exc:
+        return _json({'detail': exc.detail}, status=exc.status_code)
+    finally:
+        await push.release_connections()
+    if not channels:
+        return _json({'detail': 'Specify at least one ticket, user or status.'}, status=400)
+    if not isinstance(request, ASGIRequest):
+        # WSGI 下流式响应会占住一个 worker 线程直到断开
+        return _json({'detail': 'Event streams require the ASGI server.'}, status=501)
+
+    subscription = push.get_broker().subscribe(channels)
+    heartbeat = getattr(settings, 'PUSH_HEARTBEAT', 15)
+
+    async def stream():
+        try:
+            yield f'retry: {getattr(settings, "PUSH_RETRY_MS", 3000)}\n\n'
+            while True:
+                message = await subscription.get(heartbeat)
+                if message is None:
+                    # 注释行作为心跳，防止代理断开空闲连接
+                    yield ': ping\n\n'
+                    continue
+                yield f'data: {message}\n\n'
+                if message is push.OVERFLOW:
+                    return
+        finally:
+            subscription.close()
+
+    response = StreamingHttpResponse(stream(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    # 关闭 nginx 的响应缓冲
+    response['X-Accel-Buffering'] = 'no'
+    return response
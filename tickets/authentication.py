@@ -0,0 +1,121 @@
+import uuid
+
+from django.conf import settings
+from django.core import checks
+from django.core.cache import cache, caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.utils.translation import gettext_lazy as _
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+
+from .models import SnapshotUser, User
+
+# 认证使用的用户字段快照；auth_version 与 token 中的同名声明比较
+SNAPSHOT_FIELDS = ('username', 'full_name', 'email', 'role', 'is_active', 'is_staff', 'is_superuser', 'auth_version')
+
+
+def _snapshot_key(user_id):
+    return f'auth-user:{user_id}'
+
+
+def _timeout():
+    return getattr(settings, 'AUTH_USER_CACHE_TIMEOUT', 60)
+
+
+def mark_user_changed(user_id):
+    """用户保存/删除时调用：丢弃本进程（或共享缓存中）的快照，其他进程的本地缓存至多 AUTH_USER_CACHE_TIMEOUT 秒后过期"""
+    cache.delete(_snapshot_key(user_id))
+
+
+def remember_user(user):
+    """签发 token 时已加载了完整的用户，顺便写入快照，登录后的首个请求不必再查询"""
+    cache.set(_snapshot_key(user.pk), {field: getattr(user, field) for field in SNAPSHOT_FIELDS}, _timeout())
+
+
+def _build_user(user_id, fields):
+    # 轻量用户对象：只含 id/角色等字段，仅用于权限判断与外键赋值；save()/delete() 会抛出异常
+    user = SnapshotUser(id=uuid.UUID(str(user_id)), **fields)
+    user._state.adding = False
+    return user
+
+
+def _check(fields, validated_token):
+    if fields is None:
+        raise AuthenticationFailed(_('User not found'), code='user_not_found')
+    if not fields['is_active']:
+        raise AuthenticationFailed(_('User is inactive'), code='user_inactive')
+    # 没有 auth_version 声明的旧 token 只依据快照判断
+    version = validated_token.get('auth_version') if validated_token is not None else None
+    if version is not None and version != fields['auth_version']:
+        raise AuthenticationFailed(_('Token has been revoked'), code='token_revoked')
+
+
+def cached_user(user_id, validated_token=None):
+    key = _snapshot_key(user_id)
+    fields = cache.get(key)
+    if fields is None:
+        fields = User.objects.filter(pk=user_id).values(*SNAPSHOT_FIELDS).first()
+        if fields is not None:
+            cache.set(key, fields, _timeout())
+    _check(fields, validated_token)
+    return _build_user(user_id, fields)
+
+
+async def acached_user(user_id, validated_token=None):
+    key = _snapshot_key(user_id)
+    fields = await cache.aget(key)
+    if fields is None:
+        fields = await User.objects.filter(pk=user_id).values(*SNAPSHOT_FIELDS).afirst()
+        if fields is not None:
+            await cache.aset(key, fields, _timeout())
+    _check(fields, validated_token)
+    return _build_user(user_id, fields)
+
+
+class CachedUserJWTAuthentication(JWTAuthentication):
+    """带 TTL 缓存的 JWT 认证
+
+    用户（角色、是否启用、auth_version）取自缓存的用户快照，缓存未命中时查询数据库；token 中的
+    username / role 声明只供前端展示，认证不采信，以免停用、降级要等 token 过期才生效。
+    token 的 auth_version 声明与快照不一致（修改密码、停用后）时拒绝。停用、降级在本进程立即生效，
+    其他进程在快照过期（AUTH_USER_CACHE_TIMEOUT）后生效；要让所有进程立即生效，default 缓存必须是
+    共享缓存（设置 REDIS_URL），locmem 时系统检查给出 tickets.W001。
+    aauthenticate 为供异步视图使用的等价实现。
+    """
+
+    @staticmethod
+    def _user_id(validated_token):
+        try:
+            return validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_('Token contained no recognizable user identification'))
+
+    def get_user(self, validated_token):
+        return cached_user(self._user_id(validated_token), validated_token)
+
+    async def aget_user(self, validated_token):
+        return await acached_user(self._user_id(validated_token), validated_token)
+
+    async def aauthenticate(self, request):
+        header = self.get_header(request)
+        if header is None:
+            return None
+        raw_token = self.get_raw_token(header)
+        if raw_token is None:
+            return None
+        validated_token = self.get_validated_token(raw_token)
+        return await self.aget_user(validated_token), validated_token
+
+
+@checks.register(checks.Tags.security)
+def check_shared_user_cache(app_configs, **kwargs):
+    if not isinstance(caches['default'], LocMemCache):
+        return []
+    return [checks.Warning(
+        'The default cache is a per-process local-memory cache.',
+        hint='Deactivation, role changes and token revocation reach other workers only after '
+             'AUTH_USER_CACHE_TIMEOUT seconds. Configure a shared cache (set REDIS_URL) for immediate effect.',
+        id='tickets.W001',
+    )]
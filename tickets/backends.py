@@ -0,0 +1,29 @@
+from django.contrib.auth.backends import ModelBackend
+
+from .models import User
+
+
+class UsernameOrEmailBackend(ModelBackend):
+    """用户名或邮箱登录，单条索引查询
+
+    含 @ 的输入按 LOWER(email) 查询，命中 user_email_ci_uniq 唯一索引；否则按 username 查询。
+    """
+
+    def authenticate(self, request, username=None, password=None, **kwargs):
+        if username is None:
+            username = kwargs.get(User.USERNAME_FIELD)
+        if username is None or password is None:
+            return None
+
+        if '@' in username:
+            lookup = {'email__lower': username.lower()}
+        else:
+            lookup = {'username': username}
+        user = User.objects.filter(**lookup).first()
+        if user is None:
+            # 与 ModelBackend 一致：用户不存在时同样执行一次哈希，避免时序差异
+            User().set_password(password)
+            return None
+        if user.check_password(password) and self.user_can_authenticate(user):
+            return user
+        return None
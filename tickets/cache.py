@@ -0,0 +1,85 @@
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+
+from ticket_django_backend.instrumentation import registry
+
+# 序列化结果缓存：键包含 updated_at，工单（或其历史记录，见 signals.touch_ticket）变化后旧键自然失效；
+# 序列化输出的字段变化时递增前缀中的版本号，使旧格式的缓存失效
+KEY_PREFIX = 'ticket-repr:2'
+# 表示中嵌套了提交人/指派人/审核人等用户（UserOutSerializer），这些字段变化时递增用户代数，所有工单的旧键一并失效
+USER_FIELDS = frozenset({'username', 'full_name', 'email', 'role'})
+USERS_KEY = f'{KEY_PREFIX}:users'
+METRIC_NAME = 'ticket_repr'
+
+
+def _cache():
+    return caches[getattr(settings, 'TICKET_CACHE_ALIAS', 'default')]
+
+
+def _timeout():
+    return getattr(settings, 'TICKET_CACHE_TIMEOUT', 300)
+
+
+def users_generation():
+    # 初值取当前毫秒数而不是 0：代数键被淘汰后重新生成的值大于之前的任何代数，旧键不会复活
+    return _cache().get_or_set(USERS_KEY, lambda: int(time.time() * 1000), None)
+
+
+def users_changed():
+    try:
+        _cache().incr(USERS_KEY)
+    except ValueError:
+        users_generation()
+
+
+def cache_key(kind, ticket_id, updated_at, generation):
+    return f'{KEY_PREFIX}:{kind}:{ticket_id}:{updated_at:%Y%m%d%H%M%S%f}:{generation}'
+
+
+def _count(hits=0, misses=0):
+    # 计入 /metrics（ticket_cache_requests_total{cache="ticket_repr"}）
+    registry.observe_cache(METRIC_NAME, hits=hits, misses=misses)
+
+
+def stats():
+    return registry.cache_stats(METRIC_NAME)
+
+
+def reset_stats():
+    registry.reset_cache(METRIC_NAME)
+
+
+def get(kind, ticket_id, updated_at):
+    data = _cache().get(cache_key(kind, ticket_id, updated_at, users_generation()))
+    _count(hits=int(data is not None), misses=int(data is None))
+    return data
+
+
+def get_or_render(kind, ticket, render):
+    """读取单个工单的缓存表示，未命中时调用 render() 生成并写入"""
+    data = get(kind, ticket.pk, ticket.updated_at)
+    if data is None:
+        data = render()
+        store(kind, ticket, data)
+    return data
+
+
+def get_or_render_many(kind, tickets, render):
+    """批量版本：一次 get_many 读取，未命中的工单交给 render(list) 生成后 set_many 写回"""
+    generation = users_generation()
+    keys = [cache_key(kind, ticket.pk, ticket.updated_at, generation) for ticket in tickets]
+    cached = _cache().get_many(keys)
+    missing = [(key, ticket) for key, ticket in zip(keys, tickets) if key not in cached]
+    _count(hits=len(keys) - len(missing), misses=len(missing))
+    if missing:
+        rendered = dict(zip((key for key, _ in missing), render([ticket for _, ticket in missing])))
+        _cache().set_many(rendered, _timeout())
+        cached.update(rendered)
+    return [cached[key] for key in keys]
+
+
+def store(kind, ticket, data):
+    # 写穿：工作流操作后直接写入最新表示
+    _cache().set(cache_key(kind, ticket.pk, ticket.updated_at, users_generation()), data, _timeout())
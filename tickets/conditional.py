@@ -0,0 +1,38 @@
+import hashlib
+
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, quote_etag
+
+from . import cache as ticket_cache
+
+
+def freshness(queryset, request):
+    """用一条聚合查询计算 (etag, last_modified, 最新 updated_at)，不加载工单本身
+
+    ETag 同时包含记录数与查询参数（分页游标、筛选条件），删除记录或换页都会改变它；
+    还包含用户代数（见 cache.users_changed），嵌套的用户信息变化后客户端不会拿到 304。
+    """
+    stats = queryset.order_by().aggregate(last=Max('updated_at'), total=Count('pk'))
+    last = stats['last']
+    raw = (f"{last.isoformat() if last else ''}:{stats['total']}:{ticket_cache.users_generation()}:"
+           f"{request.get_full_path()}")
+    etag = quote_etag(hashlib.md5(raw.encode()).hexdigest())
+    last_modified = int(last.timestamp()) if last else None
+    return etag, last_modified, last
+
+
+def not_modified(request, etag, last_modified):
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is not None:
+        add_headers(response, etag, last_modified)
+    return response
+
+
+def add_headers(response, etag, last_modified):
+    response['ETag'] = etag
+    if last_modified is not None:
+        response['Last-Modified'] = http_date(last_modified)
+    # 允许客户端缓存，但每次都需要重新验证
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
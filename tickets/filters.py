@@ -0,0 +1,69 @@
+from datetime import datetime, time
+
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from rest_framework.exceptions import ValidationError
+from rest_framework.filters import BaseFilterBackend
+
+from .models import Ticket
+
+
+class TicketFilterBackend(BaseFilterBackend):
+    # 精确匹配字段，多个取值用逗号分隔：?current_status=OPEN,REOPENED
+    exact_fields = ('current_status', 'severity', 'module', 'software_name')
+    # 人员字段：UUID 或 me（当前用户）
+    user_fields = ('assignee', 'submitter', 'qa_reviewer', 'regressor')
+    # 时间范围：?discovered_after=2025-01-01&discovered_before=2025-02-01
+    date_fields = ('discovered_at', 'created_at', 'updated_at')
+
+    def filter_queryset(self, request, queryset, view):
+        params = request.query_params
+        filters = {}
+
+        for field in self.exact_fields:
+            value = params.get(field)
+            if value:
+                values = value.split(',')
+                if len(values) == 1:
+                    filters[field] = values[0]
+                else:
+                    filters[f'{field}__in'] = values
+
+        for field in self.user_fields:
+            value = params.get(field)
+            if value:
+                filters[f'{field}_id'] = self._parse_user(request, field, value)
+
+        for field in self.date_fields:
+            prefix = field[:-len('_at')]
+            for suffix, lookup in (('after', 'gte'), ('before', 'lt')):
+                name = f'{prefix}_{suffix}'
+                value = params.get(name)
+                if value:
+                    filters[f'{field}__{lookup}'] = self._parse_datetime(name, value)
+
+        return queryset.filter(**filters) if filters else queryset
+
+    @staticmethod
+    def _parse_user(request, field, value):
+        if value == 'me':
+            return request.user.id
+        try:
+            return Ticket._meta.get_field(field).target_field.to_python(value)
+        except DjangoValidationError:
+            raise ValidationError({field: f'"{value}" is not a valid user id.'})
+
+    @staticmethod
+    def _parse_datetime(name, value):
+        try:
+            parsed = parse_datetime(value) or parse_date(value)
+        except ValueError:
+            parsed = None
+        if parsed is None:
+            raise ValidationError({name: f'"{value}" is not a valid date or datetime.'})
+        if not isinstance(parsed, datetime):
+            parsed = datetime.combine(parsed, time.min)
+        if timezone.is_naive(parsed):
+            parsed = timezone.make_aware(parsed)
+        return parsed
@@ -0,0 +1,365 @@
+"""
+从其他缺陷系统批量导入工单（manage.py import_tickets）。
+
+输入为 NDJSON 或 CSV，格式与 tickets/export.py 的导出一致：人员字段为用户名或邮箱，
+CSV 中 dev_reports / qa_reviews / regression_tests 列为 JSON 数组。逐行流式读取，每 batch_size 行
+在一个事务中 bulk_create 工单与三类历史记录，同时写入状态日志、统计计数与停留时长、搜索索引和断点
+（ImportCheckpoint），中断后重新执行同一命令会从断点继续。
+"""
+import csv
+import hashlib
+import json
+import os
+import sys
+import time
+import uuid
+from datetime import datetime, time as dt_time
+
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db import router, transaction
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from ticket_django_backend.routers import use_primary
+
+from . import analytics, stats
+from .ids import uuid7
+from .models import (
+    User, Ticket, DevReport, QAReview, RegressionTest, TicketStatusEvent, ImportCheckpoint,
+    SEVERITY_CHOICES, TICKET_STATUS_CHOICES,
+)
+from .search import get_search_backend
+
+DEFAULT_BATCH_SIZE = 1000
+FINGERPRINT_BYTES = 1 << 20
+HISTORY_COLUMNS = ('dev_reports', 'qa_reviews', 'regression_tests')
+SEVERITIES = {value for value, label in SEVERITY_CHOICES}
+STATUSES = {value for value, label in TICKET_STATUS_CHOICES}
+
+
+class RowError(ValueError):
+    pass
+
+
+class CheckpointError(ValueError):
+    pass
+
+
+# --- 读取 ---
+def read_rows(fh, fmt):
+    """逐行产出 dict；CSV 的历史记录列解析为列表"""
+    if fmt == 'ndjson':
+        for line in fh:
+            line = line.strip()
+            if line:
+                try:
+                    yield json.loads(line)
+                except ValueError as exc:
+                    yield RowError(f'invalid JSON: {exc}')
+        return
+    for row in csv.DictReader(fh):
+        try:
+            for column in HISTORY_COLUMNS:
+                row[column] = json.loads(row[column]) if row.get(column) else []
+        except ValueError as exc:
+            yield RowError(f'invalid JSON in history column: {exc}')
+            continue
+        yield row
+
+
+def guess_format(path):
+    return 'csv' if path.lower().endswith('.csv') else 'ndjson'
+
+
+# --- 人员 ---
+class UserCache:
+    """用户名 / 邮箱到用户 id 的内存缓存，每批未命中的标识一次查询；查不到的也缓存为 None"""
+
+    def __init__(self):
+        self.ids = {}
+
+    @staticmethod
+    def _key(identifier):
+        return identifier.lower() if '@' in identifier else identifier
+
+    def load(self, identifiers):
+        missing = {self._key(value) for value in identifiers if value} - set(self.ids)
+        if not missing:
+            return
+        usernames = [value for value in missing if '@' not in value]
+        emails = [value for value in missing if '@' in value]
+        for user_id, username, email in User.objects.filter(
+            Q(username__in=usernames) | Q(email__lower__in=emails)
+        ).values_list('id', 'username', 'email'):
+            self.ids[username] = user_id
+            if email:
+                self.ids[email.lower()] = user_id
+        for value in missing:
+            self.ids.setdefault(value, None)
+
+    def get(self, identifier):
+        if not identifier:
+            return None
+        return self.ids.get(self._key(identifier))
+
+
+def _identifiers(row):
+    yield from (row.get(field) for field in ('submitter', 'assignee', 'qa_reviewer', 'regressor'))
+    for record in row.get('dev_reports') or ():
+        yield record.get('assigned_developer')
+    for record in row.get('qa_reviews') or ():
+        yield record.get('release_qa')
+        yield record.get('designated_tester')
+    for record in row.get('regression_tests') or ():
+        yield record.get('assign_tester')
+
+
+# --- 字段转换 ---
+def _datetime(value, field, default=None):
+    if value in (None, ''):
+        if default is None:
+            raise RowError(f'{field} is required')
+        return default
+    try:
+        parsed = parse_datetime(value) or parse_date(value)
+    except ValueError:
+        parsed = None
+    if parsed is None:
+        raise RowError(f'{field}: "{value}" is not a valid datetime')
+    if not isinstance(parsed, datetime):
+        parsed = datetime.combine(parsed, dt_time.min)
+    return timezone.make_aware(parsed) if timezone.is_naive(parsed) else parsed
+
+
+def _bool(value):
+    if isinstance(value, str):
+        return value.strip().lower() in ('1', 'true', 'yes')
+    return bool(value)
+
+
+def _url(row, field, model):
+    # 按模型字段校验（格式与 max_length），严格模式下过长的值会让整批插入失败
+    value = row.get(field) or None
+    if value is None:
+        return None
+    try:
+        return model._meta.get_field(field).clean(str(value), None)
+    except DjangoValidationError as exc:
+        raise RowError(f'{field}: {" ".join(exc.messages)}')
+
+
+def insert_as_given(model, objects, batch_size):
+    """按对象上已有的值插入，不经过 Field.pre_save：auto_now(_add) 不会把来源的 created_at / updated_at
+    改成当前时间，也不必修改进程内共享的字段定义。raw 与加载 fixture 时的插入方式相同"""
+    fields = list(model._meta.concrete_fields)
+    using = router.db_for_write(model)
+    for start in range(0, len(objects), batch_size):
+        model._base_manager._insert(objects[start:start + batch_size], fields=fields, using=using, raw=True)
+    for obj in objects:
+        obj._state.adding, obj._state.db = False, using
+
+
+def _text(row, field, max_length=None):
+    value = row.get(field) or ''
+    value = value if isinstance(value, str) else str(value)
+    return value[:max_length] if max_length else value
+
+
+class TicketImporter:
+    def __init__(self, batch_size=DEFAULT_BATCH_SIZE, default_submitter=None, index=True, log=None):
+        self.batch_size = batch_size
+        self.users = UserCache()
+        self.default_submitter_id = None
+        if default_submitter:
+            self.users.load([default_submitter])
+            self.default_submitter_id = self.users.get(default_submitter)
+            if self.default_submitter_id is None:
+                raise ValueError(f'Unknown default submitter: {default_submitter}')
+        self.index = index
+        self.log = log or (lambda message: None)
+        self.imported = 0
+        self.errors = []
+
+    def build(self, row):
+        """把一行转换为 (ticket, [历史记录], [状态事件])，不访问数据库"""
+        if isinstance(row, RowError):
+            raise row
+        title = _text(row, 'title', 255)
+        if not title:
+            raise RowError('title is required')
+        created_at = _datetime(row.get('created_at'), 'created_at', default=timezone.now())
+        severity = row.get('severity') or 'NORMAL'
+        current_status = row.get('current_status') or 'OPEN'
+        if severity not in SEVERITIES:
+            raise RowError(f'unknown severity "{severity}"')
+        if current_status not in STATUSES:
+            raise RowError(f'unknown status "{current_status}"')
+        submitter_id = self.users.get(row.get('submitter')) or self.default_submitter_id
+        if submitter_id is None:
+            raise RowError(f'unknown submitter "{row.get("submitter")}"')
+        try:
+            # 未给定 id 时按创建时间生成 uuid7，导入的工单在主键索引中也按时间排列
+            ticket_id = uuid.UUID(str(row['id'])) if row.get('id') else uuid7(created_at)
+        except ValueError:
+            raise RowError(f'invalid id "{row.get("id")}"')
+
+        ticket = Ticket(
+            id=ticket_id,
+            title=title,
+            description=_text(row, 'description'),
+            software_name=_text(row, 'software_name', 255),
+            software_version=_text(row, 'software_version', 255),
+            discovered_at=_datetime(row.get('discovered_at'), 'discovered_at', default=created_at),
+            severity=severity,
+            module=_text(row, 'module', 255),
+            current_status=current_status,
+            submitter_id=submitter_id,
+            assignee_id=self.users.get(row.get('assignee')),
+            qa_reviewer_id=self.users.get(row.get('qa_reviewer')),
+            regressor_id=self.users.get(row.get('regressor')),
+            created_at=created_at,
+            updated_at=_datetime(row.get('updated_at'), 'updated_at', default=created_at),
+        )
+
+        # 历史记录与由其推断的状态流转，按时间排序
+        history = []
+        for record in row.get('dev_reports') or ():
+            history.append((DevReport(
+                ticket=ticket,
+                issue_type=_text(record, 'issue_type', 255),
+                root_cause=_text(record, 'root_cause'),
+                self_test_report=_text(record, 'self_test_report'),
+                regression_version=_text(record, 'regression_version', 255),
+                module=_text(record, 'module', 255),
+                github_pr_url=_url(record, 'github_pr_url', DevReport),
+                assigned_developer_id=self.users.get(record.get('assigned_developer')),
+            ), analytics.dev_report_status(), record))
+        for record in row.get('qa_reviews') or ():
+            agree = _bool(record.get('agree_to_release'))
+            history.append((QAReview(
+                ticket=ticket,
+                comment=_text(record, 'comment'),
+                agree_to_release=agree,
+                release_qa_id=self.users.get(record.get('release_qa')),
+                designated_tester_id=self.users.get(record.get('designated_tester')),
+            ), analytics.qa_review_status(agree), record))
+        for record in row.get('regression_tests') or ():
+            passed = _bool(record.get('passed'))
+            history.append((RegressionTest(
+                ticket=ticket,
+                regression_version=_text(record, 'regression_version', 255),
+                passed=passed,
+                report=_text(record, 'report'),
+                assign_tester_id=self.users.get(record.get('assign_tester')),
+            ), analytics.regression_status(passed), record))
+        for obj, _, record in history:
+            obj.created_at = obj.updated_at = _datetime(record.get('created_at'), 'history created_at',
+                                                        default=created_at)
+            obj.id = uuid7(obj.created_at)
+        history.sort(key=lambda item: item[0].created_at)
+
+        events = [TicketStatusEvent(ticket=ticket, from_status='', to_status='OPEN', at=created_at)]
+        for obj, to_status, _ in history:
+            events.append(TicketStatusEvent(ticket=ticket, from_status=events[-1].to_status, to_status=to_status,
+                                            at=obj.created_at))
+        if events[-1].to_status != current_status:
+            # 来源系统的状态与历史推断不一致时以来源为准，补一条流转
+            events.append(TicketStatusEvent(ticket=ticket, from_status=events[-1].to_status,
+                                            to_status=current_status, at=max(events[-1].at, ticket.updated_at)))
+        ticket.status_changed_at = events[-1].at
+        return ticket, [obj for obj, _, _ in history], events
+
+    def write(self, rows, checkpoint, position):
+        """在一个事务中写入一批并推进断点；rows 为 (行号, 原始行)"""
+        self.users.load(value for _, row in rows if not isinstance(row, RowError) for value in _identifiers(row))
+        built = []
+        for line, row in rows:
+            try:
+                built.append((line, *self.build(row)))
+            except RowError as exc:
+                self.errors.append((line, str(exc)))
+        # 来源给定的 id 已存在或在本批中重复时整批插入会失败，按行报告并跳过；刚提交的批次可能尚未同步到从库
+        with use_primary():
+            seen = set(Ticket.objects.filter(pk__in=[ticket.pk for _, ticket, _, _ in built])
+                       .values_list('pk', flat=True))
+
+        tickets, history, events = [], {DevReport: [], QAReview: [], RegressionTest: []}, []
+        for line, ticket, records, ticket_events in built:
+            if ticket.pk in seen:
+                self.errors.append((line, f'duplicate id "{ticket.pk}"'))
+                continue
+            seen.add(ticket.pk)
+            tickets.append(ticket)
+            for record in records:
+                history[type(record)].append(record)
+            events.extend(ticket_events)
+
+        groups = [(Ticket, tickets), *history.items()]
+        with transaction.atomic():
+            # created_at / updated_at 为 auto_now(_add)，插入时保留来源的时间
+            for model, objects in groups:
+                insert_as_given(model, objects, self.batch_size)
+            TicketStatusEvent.objects.bulk_create(events, batch_size=self.batch_size)
+            stats.apply(added=[ticket.stat_values() for ticket in tickets])
+            # events 按工单依次排列、工单内按时间排序，与 stats.rebuild() 得到相同的停留时长
+            stats.add_intervals(analytics.intervals((event.ticket_id, event.to_status, event.at) for event in events))
+            if self.index:
+                get_search_backend().index_tickets([ticket.pk for ticket in tickets])
+            ImportCheckpoint.objects.filter(pk=checkpoint.pk).update(position=position, updated_at=timezone.now())
+        self.imported += len(tickets)
+
+    def run(self, rows, checkpoint_name, source='', restart=False):
+        """source 为输入的 fingerprint()；断点属于其他文件或已导入完成时拒绝执行，除非 restart"""
+        checkpoint, _ = ImportCheckpoint.objects.get_or_create(name=checkpoint_name, defaults={'source': source})
+        if restart:
+            checkpoint.position, checkpoint.source, checkpoint.completed_at = 0, source, None
+            checkpoint.save()
+        elif checkpoint.completed_at is not None:
+            raise CheckpointError(f'{checkpoint_name} was already imported at {checkpoint.completed_at:%Y-%m-%d %H:%M}; '
+                                  f'pass --restart to import it again.')
+        elif checkpoint.source != source:
+            if checkpoint.position:
+                raise CheckpointError(f'{checkpoint_name} stopped after row {checkpoint.position} of a different file; '
+                                      f'pass --restart to import from the first row, or use another --checkpoint.')
+            checkpoint.source = source
+            checkpoint.save(update_fields=['source', 'updated_at'])
+        start = checkpoint.position
+        if start:
+            self.log(f'Resuming {checkpoint_name} after row {start}.')
+
+        started = time.monotonic()
+        batch, position = [], 0
+        for position, row in enumerate(rows, start=1):
+            if position <= start:
+                continue
+            batch.append((position, row))
+            if len(batch) >= self.batch_size:
+                self._flush(batch, checkpoint, position, started)
+                batch = []
+        if batch:
+            self._flush(batch, checkpoint, position, started)
+        now = timezone.now()
+        ImportCheckpoint.objects.filter(pk=checkpoint.pk).update(completed_at=now, updated_at=now)
+        return self.imported, self.errors
+
+    def _flush(self, batch, checkpoint, position, started):
+        self.write(batch, checkpoint, position)
+        elapsed = max(time.monotonic() - started, 1e-6)
+        self.log(f'{position} rows read, {self.imported} imported, {len(self.errors)} errors, '
+                 f'{self.imported / elapsed:.0f} tickets/s')
+
+
+def fingerprint(path):
+    """输入文件的标识：大小、修改时间与开头 1 MiB 的摘要；标准输入无法识别，为空串"""
+    if path == '-':
+        return ''
+    stat = os.stat(path)
+    with open(path, 'rb') as fh:
+        digest = hashlib.sha256(fh.read(FINGERPRINT_BYTES)).hexdigest()
+    return f'{stat.st_size}:{stat.st_mtime_ns}:{digest[:16]}'
+
+
+def open_source(path):
+    if path == '-':
+        return sys.stdin
+    return open(path, encoding='utf-8', newline='')
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from tickets import uploads
+
+
+class Command(BaseCommand):
+    help = 'Delete abandoned chunked-upload sessions and their partial files (run periodically, e.g. from cron).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--max-age', type=int, default=None,
+                            help='Seconds since the last chunk; defaults to UPLOAD_SESSION_EXPIRY.')
+
+    def handle(self, *args, **options):
+        sessions, files = uploads.sweep(options['max_age'])
+        self.stdout.write(self.style.SUCCESS(f'Expired {sessions} upload sessions, removed {files} stray files.'))
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from tickets import export
+
+
+class Command(BaseCommand):
+    help = 'Stream all tickets with their history as NDJSON or CSV.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--format', choices=export.FORMATS, default='ndjson')
+        parser.add_argument('--output', help='Output file (defaults to stdout).')
+        parser.add_argument('--batch-size', type=int, default=export.DEFAULT_BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        chunks = export.stream(options['format'], batch_size=options['batch_size'])
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8', newline='') as fh:
+                for chunk in chunks:
+                    fh.write(chunk)
+            self.stderr.write(self.style.SUCCESS(f'Exported tickets to {options["output"]}.'))
+        else:
+            for chunk in chunks:
+                self.stdout.write(chunk, ending='')
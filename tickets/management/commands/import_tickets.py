@@ -0,0 +1,53 @@
+import os
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from tickets import importer
+
+
+class Command(BaseCommand):
+    help = 'Import tickets with their history from NDJSON or CSV (the export_tickets format), resumably.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Input file, or - for stdin.')
+        parser.add_argument('--format', choices=('ndjson', 'csv'), help='Defaults to the file extension.')
+        parser.add_argument('--batch-size', type=int, default=importer.DEFAULT_BATCH_SIZE)
+        parser.add_argument('--checkpoint', help='Checkpoint name (defaults to the file name).')
+        parser.add_argument('--restart', action='store_true',
+                            help='Discard the checkpoint and import from the first row, even if it was completed '
+                                 'or belongs to a different file.')
+        parser.add_argument('--default-submitter', help='Username used when the submitter cannot be matched.')
+        parser.add_argument('--no-index', action='store_true',
+                            help='Skip search indexing; run rebuild_search_index afterwards.')
+
+    def handle(self, *args, **options):
+        path = options['path']
+        fmt = options['format'] or importer.guess_format(path)
+        checkpoint = options['checkpoint'] or ('stdin' if path == '-' else os.path.basename(path))
+        try:
+            runner = importer.TicketImporter(
+                batch_size=options['batch_size'],
+                default_submitter=options['default_submitter'],
+                index=not options['no_index'],
+                log=self.stderr.write,
+            )
+        except ValueError as exc:
+            raise CommandError(str(exc))
+
+        fingerprint = importer.fingerprint(path)
+        source = importer.open_source(path)
+        try:
+            imported, errors = runner.run(importer.read_rows(source, fmt), checkpoint, fingerprint,
+                                          restart=options['restart'])
+        except importer.CheckpointError as exc:
+            raise CommandError(str(exc))
+        finally:
+            if source is not sys.stdin:
+                source.close()
+
+        for line, message in errors[:20]:
+            self.stderr.write(self.style.WARNING(f'row {line}: {message}'))
+        if len(errors) > 20:
+            self.stderr.write(self.style.WARNING(f'... and {len(errors) - 20} more errors'))
+        self.stdout.write(self.style.SUCCESS(f'Imported {imported} tickets ({len(errors)} rows skipped).'))
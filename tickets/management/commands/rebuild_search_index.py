@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+
+from tickets.models import Ticket
+from tickets.search import get_search_backend
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the ticket search index from existing tickets and reports.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        backend = get_search_backend()
+        batch_size = options['batch_size']
+        total = 0
+        batch = []
+        for ticket_id in Ticket.objects.values_list('id', flat=True).iterator(chunk_size=batch_size):
+            batch.append(ticket_id)
+            if len(batch) >= batch_size:
+                backend.index_tickets(batch)
+                total += len(batch)
+                batch = []
+        if batch:
+            backend.index_tickets(batch)
+            total += len(batch)
+        self.stdout.write(self.style.SUCCESS(f'Indexed {total} tickets.'))
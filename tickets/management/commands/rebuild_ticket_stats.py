@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from tickets import stats
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the pre-aggregated dashboard statistics from tickets and the status event log.'
+
+    def handle(self, *args, **options):
+        keys, samples = stats.rebuild()
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt {keys} counters from {samples} status changes.'))
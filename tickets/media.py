@@ -0,0 +1,144 @@
+"""
+受保护媒体文件的下发。
+
+权限在 Django 中校验，字节交给前端服务器发送（settings.MEDIA_SENDFILE）：
+
+- 'x-accel-redirect'：nginx，返回 X-Accel-Redirect: MEDIA_ACCEL_PREFIX + 文件名，需配置
+      location /protected-media/ { internal; alias /path/to/media/; }
+- 'x-sendfile'：Apache mod_xsendfile / lighttpd，返回文件绝对路径；
+- 未配置时由 Django 返回 FileResponse：支持 ETag / Last-Modified 条件请求与单区间 Range，
+  整文件或到文件末尾的区间交给 wsgi.file_wrapper（gunicorn 等会使用 sendfile 零拷贝）。
+"""
+import mimetypes
+import os
+import re
+from urllib.parse import quote
+
+from django.conf import settings
+from django.http import FileResponse, Http404, HttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, parse_http_date_safe
+
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+def _sendfile_mode():
+    return (getattr(settings, 'MEDIA_SENDFILE', '') or '').lower()
+
+
+def _content_type(name):
+    content_type, encoding = mimetypes.guess_type(name)
+    return content_type or 'application/octet-stream'
+
+
+def _disposition(name):
+    return f"inline; filename*=UTF-8''{quote(os.path.basename(name))}"
+
+
+class _BoundedFile:
+    """只读取 [start, start + length) 的文件包装，用于中间区间（无 fileno，不会走 sendfile）"""
+
+    def __init__(self, fh, length):
+        self.fh = fh
+        self.remaining = length
+
+    def read(self, size=-1):
+        if self.remaining <= 0:
+            return b''
+        if size is None or size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.fh.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def close(self):
+        self.fh.close()
+
+
+def _parse_range(header, size):
+    """解析单区间 Range，返回 (start, end)；无法满足返回 False；忽略多区间等不支持的格式返回 None"""
+    match = RANGE_RE.match(header.strip())
+    if not match or match.groups() == ('', ''):
+        return None
+    first, last = match.groups()
+    if first == '':
+        # bytes=-N：最后 N 个字节
+        length = int(last)
+        if length == 0:
+            return False
+        return max(size - length, 0), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or end < start:
+        return False
+    return start, end
+
+
+def _if_range_matches(request, etag, mtime):
+    if_range = request.headers.get('If-Range')
+    if not if_range:
+        return True
+    if if_range.startswith(('"', 'W/')):
+        return if_range == etag
+    return parse_http_date_safe(if_range) == int(mtime)
+
+
+def serve(request, fieldfile):
+    """下发 FileField 对应的文件；调用方负责权限校验"""
+    if not fieldfile:
+        raise Http404('No file.')
+    name = fieldfile.name
+    mode = _sendfile_mode()
+
+    if mode == 'x-accel-redirect':
+        response = HttpResponse(content_type=_content_type(name))
+        prefix = getattr(settings, 'MEDIA_ACCEL_PREFIX', '/protected-media/')
+        response['X-Accel-Redirect'] = prefix + quote(name)
+        response['Content-Disposition'] = _disposition(name)
+        return response
+
+    try:
+        path = fieldfile.path
+        stat = os.stat(path)
+    except (NotImplementedError, FileNotFoundError):
+        raise Http404('File not found.')
+
+    if mode == 'x-sendfile':
+        response = HttpResponse(content_type=_content_type(name))
+        response['X-Sendfile'] = path
+        response['Content-Disposition'] = _disposition(name)
+        return response
+
+    size = stat.st_size
+    etag = f'"{int(stat.st_mtime):x}-{size:x}"'
+    not_modified = get_conditional_response(request, etag=etag, last_modified=int(stat.st_mtime))
+    if not_modified is not None:
+        return not_modified
+
+    byte_range = None
+    range_header = request.headers.get('Range')
+    if range_header and request.method in ('GET', 'HEAD') and _if_range_matches(request, etag, stat.st_mtime):
+        byte_range = _parse_range(range_header, size)
+        if byte_range is False:
+            response = HttpResponse(status=416)
+            response['Content-Range'] = f'bytes */{size}'
+            return response
+
+    fh = open(path, 'rb')
+    if byte_range is None:
+        response = FileResponse(fh, content_type=_content_type(name))
+    else:
+        start, end = byte_range
+        fh.seek(start)
+        # 到文件末尾的区间仍传入真实文件对象，保留 sendfile 零拷贝
+        body = fh if end == size - 1 else _BoundedFile(fh, end - start + 1)
+        response = FileResponse(body, status=206, content_type=_content_type(name))
+        response['Content-Length'] = end - start + 1
+        response['Content-Range'] = f'bytes {start}-{end}/{size}'
+
+    response['Accept-Ranges'] = 'bytes'
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(stat.st_mtime)
+    response['Content-Disposition'] = _disposition(name)
+    response['Cache-Control'] = 'private, max-age=3600'
+    return response
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.6 on 2026-10-17 14:43
+
+import django.db.models.deletion
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tickets', '0008_rename_assigend_developer_devreport_assigned_developer'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RegressionTest',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('regression_version', models.CharField(blank=True, max_length=255)),
+                ('passed', models.BooleanField(default=False)),
+                ('report', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('assign_tester', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='performed_regression_tests', to=settings.AUTH_USER_MODEL)),
+                ('ticket', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='regression_tests', to='tickets.ticket')),
+            ],
+        ),
+    ]
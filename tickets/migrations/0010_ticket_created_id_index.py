@@ -0,0 +1,17 @@
+# Generated by Django 5.2.6 on 2026-10-17 14:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tickets', '0009_regressiontest'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='ticket',
+            index=models.Index(fields=['created_at', 'id'], name='tickets_tic_created_8f9e5d_idx'),
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.2.6 on 2026-10-17 14:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tickets', '0010_ticket_created_id_index'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='ticket',
+            index=models.Index(fields=['assignee', 'current_status', 'updated_at'], name='ticket_assignee_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='ticket',
+            index=models.Index(fields=['submitter', 'current_status', 'updated_at'], name='ticket_submitter_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='ticket',
+            index=models.Index(fields=['current_status', 'severity', 'created_at'], name='ticket_status_severity_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='ticket',
+            index=models.Index(fields=['module', 'current_status'], name='ticket_module_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='ticket',
+            index=models.Index(fields=['software_name', 'software_version'], name='ticket_software_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='ticket',
+            index=models.Index(fields=['discovered_at'], name='ticket_discovered_at_idx'),
+        ),
+    ]
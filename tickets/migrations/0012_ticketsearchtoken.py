@@ -0,0 +1,53 @@
+# Generated by Django 5.2.6 on 2026-10-17 14:45
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+# MySQLFullTextBackend 使用的 FULLTEXT 索引；其他数据库不支持，跳过
+FULLTEXT_INDEXES = (
+    ('tickets_ticket', 'ticket_fulltext_idx', ('title', 'description')),
+    ('tickets_devreport', 'devreport_fulltext_idx', ('root_cause', 'self_test_report')),
+    ('tickets_qareview', 'qareview_fulltext_idx', ('comment',)),
+    ('tickets_regressiontest', 'regressiontest_fulltext_idx', ('report',)),
+)
+
+
+def create_fulltext_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'mysql':
+        return
+    quote = schema_editor.quote_name
+    for table, name, columns in FULLTEXT_INDEXES:
+        schema_editor.execute('CREATE FULLTEXT INDEX {} ON {} ({})'.format(
+            quote(name), quote(table), ', '.join(quote(c) for c in columns)
+        ))
+
+
+def drop_fulltext_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'mysql':
+        return
+    quote = schema_editor.quote_name
+    for table, name, columns in FULLTEXT_INDEXES:
+        schema_editor.execute('DROP INDEX {} ON {}'.format(quote(name), quote(table)))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tickets', '0011_ticket_filter_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TicketSearchToken',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('token', models.CharField(max_length=64)),
+                ('weight', models.PositiveIntegerField(default=0)),
+                ('ticket', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='search_tokens', to='tickets.ticket')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('token', 'ticket'), name='search_token_ticket_uniq')],
+            },
+        ),
+        migrations.RunPython(create_fulltext_indexes, drop_fulltext_indexes),
+    ]
@@ -0,0 +1,48 @@
+# Generated by Django 5.2.6 on 2026-10-17 14:54
+
+import django.db.models.functions.text
+from django.db import migrations, models
+from django.db.models import Count
+from django.db.models.functions import Lower
+
+
+def blank_emails_to_null(apps, schema_editor):
+    # 历史数据中未填写的邮箱为空字符串，改为 NULL 后才能建立唯一约束
+    User = apps.get_model('tickets', 'User')
+    User.objects.filter(email='').update(email=None)
+
+
+def check_email_collisions(apps, schema_editor):
+    # 仅大小写不同的重复邮箱会使唯一约束建立失败；是哪个账号该保留需要人工判断，这里只列出后中止
+    User = apps.get_model('tickets', 'User')
+    duplicates = (
+        User.objects.exclude(email=None).annotate(email_lower=Lower('email'))
+        .values('email_lower').annotate(count=Count('pk')).filter(count__gt=1).values_list('email_lower', flat=True)
+    )
+    lines = []
+    for email in duplicates.order_by('email_lower'):
+        usernames = User.objects.annotate(email_lower=Lower('email')).filter(email_lower=email) \
+            .order_by('username').values_list('username', flat=True)
+        lines.append(f'  {email}: {", ".join(usernames)}')
+    if lines:
+        raise RuntimeError(
+            'Cannot add user_email_ci_uniq, these emails are used by more than one account (ignoring case). '
+            'Change or clear the emails of the extra accounts and run migrate again:\n' + '\n'.join(lines)
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('tickets', '0013_ticket_version'),
+    ]
+
+    operations = [
+        migrations.RunPython(blank_emails_to_null, migrations.RunPython.noop),
+        migrations.RunPython(check_email_collisions, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='user',
+            constraint=models.UniqueConstraint(django.db.models.functions.text.Lower('email'), name='user_email_ci_uniq'),
+        ),
+    ]
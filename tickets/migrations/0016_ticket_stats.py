@@ -0,0 +1,56 @@
+# Generated by Django 5.2.6 on 2026-10-17 15:06
+
+import django.utils.timezone
+from django.db import migrations, models
+from django.db.models import F, Max, OuterRef, Subquery
+from django.db.models.functions import Coalesce, Greatest
+
+
+def backfill_status_changed_at(apps, schema_editor):
+    # 已有工单进入当前状态的时间取最后一条历史记录的时间，没有历史记录则为创建时间
+    Ticket = apps.get_model('tickets', 'Ticket')
+    latest = []
+    for name in ('DevReport', 'QAReview', 'RegressionTest'):
+        model = apps.get_model('tickets', name)
+        subquery = Subquery(
+            model.objects.filter(ticket=OuterRef('pk')).values('ticket').annotate(last=Max('created_at')).values('last')
+        )
+        latest.append(Coalesce(subquery, F('created_at')))
+    Ticket.objects.update(status_changed_at=Greatest(*latest))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tickets', '0015_uploads'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StatusDurationStat',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('OPEN', 'Open'), ('IN_DEVELOPMENT', 'In Development'), ('UNDER_REVIEW', 'Under Review'), ('IN_REGRESSION', 'In Regression'), ('IN_MODIFICATION', 'In Modification'), ('CLOSED', 'Closed'), ('REOPENED', 'Reopened')], max_length=32, unique=True)),
+                ('total_seconds', models.FloatField(default=0)),
+                ('samples', models.BigIntegerField(default=0)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='ticket',
+            name='status_changed_at',
+            field=models.DateTimeField(default=django.utils.timezone.now, editable=False),
+        ),
+        migrations.RunPython(backfill_status_changed_at, migrations.RunPython.noop),
+        migrations.CreateModel(
+            name='TicketStat',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('dimension', models.CharField(max_length=16)),
+                ('key', models.CharField(max_length=255)),
+                ('count', models.BigIntegerField(default=0)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('dimension', 'key'), name='ticket_stat_dimension_key_uniq')],
+            },
+        ),
+    ]
@@ -0,0 +1,67 @@
+# Generated by Django 5.2.6 on 2026-10-17 15:09
+
+from collections import defaultdict
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+BATCH_SIZE = 1000
+
+
+def backfill_status_events(apps, schema_editor):
+    # 已有工单的状态变化由三类历史记录推断：工单以 OPEN 创建，每条历史记录对应一次流转。
+    # 推断规则随迁移固定下来，不引用应用代码；按主键分页，每页的工单连同其历史记录一起处理
+    Ticket = apps.get_model('tickets', 'Ticket')
+    TicketStatusEvent = apps.get_model('tickets', 'TicketStatusEvent')
+    sources = (
+        (apps.get_model('tickets', 'DevReport'), None, ('UNDER_REVIEW', 'UNDER_REVIEW')),
+        (apps.get_model('tickets', 'QAReview'), 'agree_to_release', ('IN_MODIFICATION', 'IN_REGRESSION')),
+        (apps.get_model('tickets', 'RegressionTest'), 'passed', ('UNDER_REVIEW', 'CLOSED')),
+    )
+    last = None
+    while True:
+        tickets = Ticket.objects.order_by('pk')
+        if last is not None:
+            tickets = tickets.filter(pk__gt=last)
+        page = list(tickets.values_list('pk', 'created_at')[:BATCH_SIZE])
+        if not page:
+            return
+        ids = [ticket_id for ticket_id, _ in page]
+        history = defaultdict(list)
+        for model, flag, (if_false, if_true) in sources:
+            fields = ('ticket_id', 'created_at') + ((flag,) if flag else ())
+            for ticket_id, created_at, *flags in model.objects.filter(ticket_id__in=ids).values_list(*fields):
+                history[ticket_id].append((created_at, if_true if not flags or flags[0] else if_false))
+
+        events = []
+        for ticket_id, created_at in page:
+            status = ''
+            for at, to_status in [(created_at, 'OPEN')] + sorted(history[ticket_id], key=lambda item: item[0]):
+                events.append(TicketStatusEvent(ticket_id=ticket_id, from_status=status, to_status=to_status, at=at))
+                status = to_status
+        TicketStatusEvent.objects.bulk_create(events, batch_size=BATCH_SIZE)
+        last = page[-1][0]
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tickets', '0016_ticket_stats'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TicketStatusEvent',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('from_status', models.CharField(blank=True, choices=[('OPEN', 'Open'), ('IN_DEVELOPMENT', 'In Development'), ('UNDER_REVIEW', 'Under Review'), ('IN_REGRESSION', 'In Regression'), ('IN_MODIFICATION', 'In Modification'), ('CLOSED', 'Closed'), ('REOPENED', 'Reopened')], max_length=32)),
+                ('to_status', models.CharField(choices=[('OPEN', 'Open'), ('IN_DEVELOPMENT', 'In Development'), ('UNDER_REVIEW', 'Under Review'), ('IN_REGRESSION', 'In Regression'), ('IN_MODIFICATION', 'In Modification'), ('CLOSED', 'Closed'), ('REOPENED', 'Reopened')], max_length=32)),
+                ('at', models.DateTimeField()),
+                ('ticket', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='status_events', to='tickets.ticket')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['ticket', 'at'], name='status_event_ticket_at_idx'), models.Index(fields=['to_status', 'at'], name='status_event_status_at_idx')],
+            },
+        ),
+        migrations.RunPython(backfill_status_events, migrations.RunPython.noop),
+    ]
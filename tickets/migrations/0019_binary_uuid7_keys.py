@@ -0,0 +1,105 @@
+# Generated by Django 5.2.6 on 2026-10-17 15:36
+
+import tickets.ids
+from django.db import migrations
+
+# 改为 BinaryUUIDField 的主键；引用它们的外键列（历史记录、搜索索引、状态事件）随之转换
+KEY_MODELS = ('ticket', 'devreport', 'qareview', 'regressiontest')
+
+
+def key_columns(apps):
+    """[(表, 列, 是否可空)]：主键列及所有引用它的外键列"""
+    columns = []
+    for name in KEY_MODELS:
+        model = apps.get_model('tickets', name)
+        columns.append((model._meta.db_table, model._meta.pk.column, False))
+        for relation in model._meta.related_objects:
+            field = relation.field
+            columns.append((field.model._meta.db_table, field.column, field.null))
+    return columns
+
+
+def _convert_mysql(schema_editor, columns, to_binary):
+    # char(32) 与 binary(16) 之间不能直接转换（会截断十六进制字符串），经 varbinary(32) 中转；
+    # 关闭外键检查，主键列与外键列依次改类型时约束两端暂时不一致
+    quote = schema_editor.quote_name
+    tables = {}
+    for table, column, null in columns:
+        tables.setdefault(table, []).append((quote(column), 'NULL' if null else 'NOT NULL'))
+    target = 'binary(16)' if to_binary else 'char(32)'
+    convert = 'UNHEX({})' if to_binary else 'LOWER(HEX({}))'
+    schema_editor.execute('SET FOREIGN_KEY_CHECKS = 0')
+    try:
+        for table, table_columns in tables.items():
+            table = quote(table)
+            schema_editor.execute('ALTER TABLE {} {}'.format(table, ', '.join(
+                f'MODIFY {column} varbinary(32) {null}' for column, null in table_columns
+            )))
+            schema_editor.execute('UPDATE {} SET {}'.format(table, ', '.join(
+                f'{column} = {convert.format(column)}' for column, _ in table_columns
+            )))
+            schema_editor.execute('ALTER TABLE {} {}'.format(table, ', '.join(
+                f'MODIFY {column} {target} {null}' for column, null in table_columns
+            )))
+    finally:
+        schema_editor.execute('SET FOREIGN_KEY_CHECKS = 1')
+
+
+def _convert_rows(schema_editor, columns, to_binary):
+    # SQLite 等：逐个取值改写。SQLite 的列类型只是亲和性，原有 char(32) 列可以直接存放 blob，不重建表
+    quote = schema_editor.quote_name
+    with schema_editor.connection.cursor() as cursor:
+        for table, column, _ in columns:
+            table, column = quote(table), quote(column)
+            cursor.execute(f'SELECT DISTINCT {column} FROM {table} WHERE {column} IS NOT NULL')
+            updates = []
+            for (value,) in cursor.fetchall():
+                value = bytes(value) if isinstance(value, memoryview) else value
+                if to_binary and isinstance(value, str):
+                    updates.append((bytes.fromhex(value.replace('-', '')), value))
+                elif not to_binary and isinstance(value, bytes):
+                    updates.append((value.hex(), value))
+            cursor.executemany(f'UPDATE {table} SET {column} = %s WHERE {column} = %s', updates)
+
+
+def _convert(apps, schema_editor, to_binary):
+    connection = schema_editor.connection
+    if connection.features.has_native_uuid_field:
+        # PostgreSQL / MariaDB 10.7+ 的 uuid 列本来就是 16 字节
+        return
+    columns = key_columns(apps)
+    if connection.vendor == 'mysql':
+        _convert_mysql(schema_editor, columns, to_binary)
+    else:
+        _convert_rows(schema_editor, columns, to_binary)
+
+
+def to_binary(apps, schema_editor):
+    _convert(apps, schema_editor, True)
+
+
+def to_char(apps, schema_editor):
+    _convert(apps, schema_editor, False)
+
+
+class Migration(migrations.Migration):
+    """已有记录保留原 uuid4 值（只改存储格式），此后新建的记录使用 uuid7"""
+
+    dependencies = [
+        ('tickets', '0018_importcheckpoint'),
+    ]
+
+    operations = [
+        migrations.SeparateDatabaseAndState(
+            database_operations=[migrations.RunPython(to_binary, to_char)],
+            state_operations=[
+                migrations.AlterField(
+                    model_name=name,
+                    name='id',
+                    field=tickets.ids.BinaryUUIDField(default=tickets.ids.uuid7, editable=False, primary_key=True,
+                                                      serialize=False),
+                )
+                for name in KEY_MODELS
+            ],
+        ),
+    ]
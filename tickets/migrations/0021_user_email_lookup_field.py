@@ -0,0 +1,19 @@
+# Generated by Django 5.2.6 on 2026-10-17 15:53
+
+import tickets.models
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tickets', '0020_user_auth_version'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='user',
+            name='email',
+            field=tickets.models.CaseInsensitiveEmailField(blank=True, max_length=254, null=True),
+        ),
+    ]
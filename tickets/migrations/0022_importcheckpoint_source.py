@@ -0,0 +1,23 @@
+# Generated by Django 5.2.6 on 2026-10-17 16:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tickets', '0021_user_email_lookup_field'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='importcheckpoint',
+            name='completed_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='importcheckpoint',
+            name='source',
+            field=models.CharField(blank=True, max_length=255),
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.6 on 2026-10-17 17:20
+
+from django.db import migrations
+
+# MySQL 默认的 utf8mb4_0900_ai_ci 忽略大小写与重音，"resume" 与 "résumé" 会撞上
+# search_token_ticket_uniq；词项按二进制比较，与分词结果以及其他数据库的行为一致
+TABLE = 'tickets_ticketsearchtoken'
+
+
+def use_binary_collation(apps, schema_editor):
+    if schema_editor.connection.vendor != 'mysql':
+        return
+    schema_editor.execute('ALTER TABLE {} MODIFY {} VARCHAR(64) CHARACTER SET utf8mb4 COLLATE utf8mb4_bin NOT NULL'.format(
+        schema_editor.quote_name(TABLE), schema_editor.quote_name('token'),
+    ))
+
+
+def use_default_collation(apps, schema_editor):
+    if schema_editor.connection.vendor != 'mysql':
+        return
+    schema_editor.execute('ALTER TABLE {} MODIFY {} VARCHAR(64) NOT NULL'.format(
+        schema_editor.quote_name(TABLE), schema_editor.quote_name('token'),
+    ))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tickets', '0022_importcheckpoint_source'),
+    ]
+
+    operations = [
+        migrations.RunPython(use_binary_collation, use_default_collation),
+    ]
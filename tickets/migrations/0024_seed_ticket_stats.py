@@ -0,0 +1,88 @@
+# Generated by Django 5.2.6 on 2026-10-17 18:10
+
+from collections import Counter, defaultdict
+from datetime import timedelta
+
+from django.db import migrations
+from django.db.models import Q
+from django.utils import timezone
+
+BATCH_SIZE = 1000
+
+
+def _pages(queryset, keys):
+    # 按 keys 升序的键集分页（最后一个键唯一），内存占用与表大小无关
+    queryset = queryset.order_by(*keys)
+    last = None
+    while True:
+        page = queryset
+        if last is not None:
+            after = Q()
+            for index, key in enumerate(keys):
+                after |= Q(**{k: last[k] for k in keys[:index]}, **{f'{key}__gt': last[key]})
+            page = page.filter(after)
+        rows = list(page[:BATCH_SIZE])
+        if not rows:
+            return
+        yield rows
+        last = rows[-1]
+
+
+def _week(value):
+    day = timezone.localtime(value).date() if timezone.is_aware(value) else value.date()
+    return (day - timedelta(days=day.weekday())).isoformat()
+
+
+def seed_ticket_stats(apps, schema_editor):
+    # 0016 建表时计数为空，已有工单的首次流转会把计数减成负数；按 stats.rebuild() 的规则
+    # 从工单与状态日志重算一次。规则随迁移固定下来，不引用应用代码
+    Ticket = apps.get_model('tickets', 'Ticket')
+    TicketStatusEvent = apps.get_model('tickets', 'TicketStatusEvent')
+    TicketStat = apps.get_model('tickets', 'TicketStat')
+    StatusDurationStat = apps.get_model('tickets', 'StatusDurationStat')
+
+    counts = Counter()
+    rows = Ticket.objects.values('id', 'current_status', 'severity', 'module', 'assignee_id', 'created_at')
+    for page in _pages(rows, ('id',)):
+        for values in page:
+            counts.update([
+                ('status', values['current_status']),
+                ('severity', values['severity']),
+                ('module', values['module'] or ''),
+                ('assignee', str(values['assignee_id']) if values['assignee_id'] else ''),
+                ('week', _week(values['created_at'])),
+            ])
+
+    # 同一工单相邻两条事件构成一个已结束的状态区间
+    durations = defaultdict(lambda: [0.0, 0])
+    previous = None
+    events = TicketStatusEvent.objects.values('ticket_id', 'to_status', 'at', 'id')
+    for page in _pages(events, ('ticket_id', 'at', 'id')):
+        for event in page:
+            if previous is not None and previous['ticket_id'] == event['ticket_id']:
+                total = durations[previous['to_status']]
+                total[0] += max((event['at'] - previous['at']).total_seconds(), 0)
+                total[1] += 1
+            previous = event
+
+    TicketStat.objects.all().delete()
+    StatusDurationStat.objects.all().delete()
+    TicketStat.objects.bulk_create(
+        [TicketStat(dimension=dimension, key=key, count=count) for (dimension, key), count in counts.items()],
+        batch_size=BATCH_SIZE,
+    )
+    StatusDurationStat.objects.bulk_create(
+        [StatusDurationStat(status=status, total_seconds=total, samples=samples)
+         for status, (total, samples) in durations.items()],
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tickets', '0023_searchtoken_binary_collation'),
+    ]
+
+    operations = [
+        migrations.RunPython(seed_ticket_stats, migrations.RunPython.noop),
+    ]
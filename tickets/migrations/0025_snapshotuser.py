@@ -0,0 +1,28 @@
+# Generated by Django 5.2.6 on 2026-10-17 17:29
+
+import django.contrib.auth.models
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tickets', '0024_seed_ticket_stats'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SnapshotUser',
+            fields=[
+            ],
+            options={
+                'proxy': True,
+                'indexes': [],
+                'constraints': [],
+            },
+            bases=('tickets.user',),
+            managers=[
+                ('objects', django.contrib.auth.models.UserManager()),
+            ],
+        ),
+    ]
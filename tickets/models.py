@@ -1,7 +1,12 @@
 from django.db import models
+from django.db.models.functions import Lower
 import uuid
 from django.contrib.auth.models import AbstractUser
 from django.conf import settings
+from django.utils import timezone
+
+from .ids import BinaryUUIDField, uuid7
+
 
 ROLE_CHOICES = (
     ('TESTER', 'Tester'),
@@ -11,12 +16,74 @@ ROLE_CHOICES = (
 )
 
 
+class CaseInsensitiveEmailField(models.EmailField):
+    """支持 email__lower=... 查询，可命中 user_email_ci_uniq 函数索引（只注册在本字段上，不影响其他 EmailField）"""
+
+
+CaseInsensitiveEmailField.register_lookup(Lower)
+
+
+# 变化时吊销已签发 token 的字段（见 tickets/authentication.py）；queryset.update() 不经过 save()，需自行递增 auth_version
+USER_REVOKE_FIELDS = ('password', 'is_active')
+
+
 class User(AbstractUser):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     username = models.CharField(max_length=150, unique=True)
     full_name = models.CharField(max_length=255, blank=True, null=True)
-    email = models.EmailField(blank=True, null=True)
+    email = CaseInsensitiveEmailField(blank=True, null=True)
     role = models.CharField(max_length=20, choices=ROLE_CHOICES, default='TESTER')
+    # 写入 token 的 auth_version 声明；修改密码或启用/停用时加一，此前签发的 token 随之失效
+    auth_version = models.PositiveIntegerField(default=0, editable=False)
+
+    class Meta(AbstractUser.Meta):
+        constraints = [
+            # 邮箱大小写不敏感唯一；未填写的邮箱存为 NULL，不参与唯一约束
+            models.UniqueConstraint(Lower('email'), name='user_email_ci_uniq'),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        if all(field in instance.__dict__ for field in USER_REVOKE_FIELDS):
+            instance._loaded_revoke_values = instance.revoke_values()
+        return instance
+
+    def revoke_values(self):
+        return {field: getattr(self, field) for field in USER_REVOKE_FIELDS}
+
+    def save(self, *args, **kwargs):
+        if not self.email:
+            self.email = None
+        loaded = getattr(self, '_loaded_revoke_values', None)
+        if loaded is not None and loaded != self.revoke_values():
+            self.auth_version += 1
+            if kwargs.get('update_fields') is not None:
+                kwargs['update_fields'] = {*kwargs['update_fields'], 'auth_version'}
+        super().save(*args, **kwargs)
+        self._loaded_revoke_values = self.revoke_values()
+
+    def refresh_from_db(self, *args, **kwargs):
+        super().refresh_from_db(*args, **kwargs)
+        if all(field in self.__dict__ for field in USER_REVOKE_FIELDS):
+            self._loaded_revoke_values = self.revoke_values()
+
+
+class SnapshotUser(User):
+    """认证时由缓存的用户快照构造的 request.user（见 tickets/authentication.py）
+
+    只含 id、角色等字段，密码等为空，不能写回数据库，否则会用空值覆盖真实的用户行。
+    需要修改用户时应重新查询 User。
+    """
+
+    class Meta:
+        proxy = True
+
+    def save(self, *args, **kwargs):
+        raise NotImplementedError('SnapshotUser is a partial snapshot and cannot be saved; load the User instead.')
+
+    def delete(self, *args, **kwargs):
+        raise NotImplementedError('SnapshotUser is a partial snapshot and cannot be deleted; load the User instead.')
 
     def __str__(self):
         return self.username
@@ -41,8 +108,43 @@ TICKET_STATUS_CHOICES = (
 )
 
 
+TICKET_USER_FIELDS = ('submitter', 'assignee', 'qa_reviewer', 'regressor')
+# 参与统计计数的字段（见 tickets/stats.py）
+TICKET_STAT_FIELDS = ('current_status', 'status_changed_at', 'severity', 'module', 'assignee_id', 'created_at')
+# 参与全文检索的字段（权重见 tickets/search.py），未变化的保存不重建索引
+TICKET_SEARCH_FIELDS = ('title', 'description')
+
+
+def ticket_history_prefetches():
+    # 三类历史记录按时间倒序预加载，并连带加载其中的人员
+    return [
+        models.Prefetch(
+            'qa_reviews',
+            queryset=QAReview.objects.select_related('release_qa', 'designated_tester').order_by('-created_at'),
+        ),
+        models.Prefetch(
+            'dev_reports',
+            queryset=DevReport.objects.select_related('assigned_developer').order_by('-created_at'),
+        ),
+        models.Prefetch(
+            'regression_tests',
+            queryset=RegressionTest.objects.select_related('assign_tester').order_by('-created_at'),
+        ),
+    ]
+
+
+class TicketQuerySet(models.QuerySet):
+    def with_users(self):
+        return self.select_related(*TICKET_USER_FIELDS)
+
+    def with_history(self):
+        # 预加载人员和三类历史记录，使序列化查询数与工单数量无关
+        return self.with_users().prefetch_related(*ticket_history_prefetches())
+
+
 class Ticket(models.Model):
-    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    # 按时间排序的二进制主键，插入总是追加在索引末尾（见 tickets/ids.py）
+    id = BinaryUUIDField(primary_key=True, default=uuid7, editable=False)
     title = models.CharField(max_length=255)
     description = models.TextField(blank=True)
 
@@ -54,6 +156,10 @@ class Ticket(models.Model):
     module = models.CharField(max_length=255, blank=True)
 
     current_status = models.CharField(max_length=32, choices=TICKET_STATUS_CHOICES, default='OPEN', db_index=True)
+    # 进入当前状态的时间，用于统计各状态平均停留时长
+    status_changed_at = models.DateTimeField(default=timezone.now, editable=False)
+    # 乐观锁版本号，每次状态流转加一（见 tickets/workflow.py）
+    version = models.PositiveIntegerField(default=0, editable=False)
 
     submitter = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='submitted_tickets')
     assignee = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, related_name='assigned_tickets',
@@ -66,6 +172,30 @@ class Ticket(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = TicketQuerySet.as_manager()
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # 记录加载时的统计字段，保存/删除时据此增减统计计数
+        if all(field in instance.__dict__ for field in TICKET_STAT_FIELDS):
+            instance._loaded_stat_values = instance.stat_values()
+        if all(field in instance.__dict__ for field in TICKET_SEARCH_FIELDS):
+            instance._loaded_search_values = instance.search_values()
+        return instance
+
+    def stat_values(self):
+        return {field: getattr(self, field) for field in TICKET_STAT_FIELDS}
+
+    def search_values(self):
+        return {field: getattr(self, field) for field in TICKET_SEARCH_FIELDS}
+
+    def save(self, *args, **kwargs):
+        loaded = getattr(self, '_loaded_stat_values', None)
+        if loaded and loaded['current_status'] != self.current_status:
+            self.status_changed_at = timezone.now()
+        super().save(*args, **kwargs)
+
     def __str__(self):
         return f"[{self.current_status}] {self.title}"
 
@@ -74,11 +204,20 @@ class Ticket(models.Model):
             models.Index(fields=['current_status']),
             models.Index(fields=['assignee']),
             models.Index(fields=['submitter']),
+            # 游标分页按 (created_at, id) 排序
+            models.Index(fields=['created_at', 'id']),
+            # 常用筛选："我的待办" / "我提交的" / 按状态、严重程度浏览，均可走单个索引范围扫描
+            models.Index(fields=['assignee', 'current_status', 'updated_at'], name='ticket_assignee_status_idx'),
+            models.Index(fields=['submitter', 'current_status', 'updated_at'], name='ticket_submitter_status_idx'),
+            models.Index(fields=['current_status', 'severity', 'created_at'], name='ticket_status_severity_idx'),
+            models.Index(fields=['module', 'current_status'], name='ticket_module_status_idx'),
+            models.Index(fields=['software_name', 'software_version'], name='ticket_software_idx'),
+            models.Index(fields=['discovered_at'], name='ticket_discovered_at_idx'),
         ]
 
 
 class QAReview(models.Model):
-    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    id = BinaryUUIDField(primary_key=True, default=uuid7, editable=False)
     ticket = models.ForeignKey(Ticket, on_delete=models.CASCADE, related_name='qa_reviews')
     comment = models.TextField(blank=True)
     agree_to_release = models.BooleanField(default=False)
@@ -101,7 +240,7 @@ class QAReview(models.Model):
 
 
 class DevReport(models.Model):
-    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    id = BinaryUUIDField(primary_key=True, default=uuid7, editable=False)
     ticket = models.ForeignKey(Ticket, on_delete=models.CASCADE, related_name='dev_reports')
     issue_type = models.CharField(max_length=255, blank=True)
     root_cause = models.TextField(blank=True)
@@ -121,7 +260,7 @@ class DevReport(models.Model):
     )
 
 class RegressionTest(models.Model):
-    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    id = BinaryUUIDField(primary_key=True, default=uuid7, editable=False)
     ticket = models.ForeignKey(Ticket, on_delete=models.CASCADE, related_name='regression_tests')
     regression_version = models.CharField(max_length=255, blank=True)
     passed = models.BooleanField(default=False)
@@ -134,4 +273,87 @@ class RegressionTest(models.Model):
         related_name='performed_regression_tests',
         null=True,
         blank=True,
-    )
\ No newline at end of file
+    )
+
+
+class TicketSearchToken(models.Model):
+    # 倒排索引：每个 (词项, 工单) 一行，weight 为该词项在工单各字段中的加权出现次数
+    id = models.BigAutoField(primary_key=True)
+    # MySQL 上为 utf8mb4_bin（迁移 0023），重音/大小写不同的词项是不同的行
+    token = models.CharField(max_length=64)
+    ticket = models.ForeignKey(Ticket, on_delete=models.CASCADE, related_name='search_tokens')
+    weight = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['token', 'ticket'], name='search_token_ticket_uniq'),
+        ]
+
+
+class StoredFile(models.Model):
+    # 按内容 SHA-256 去重的附件，相同内容只存一份
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    sha256 = models.CharField(max_length=64, unique=True)
+    file = models.FileField(upload_to='uploads/blobs/')
+    size = models.BigIntegerField()
+    content_type = models.CharField(max_length=100, blank=True)
+    thumbnail = models.FileField(upload_to='uploads/thumbnails/', blank=True, null=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+
+class UploadSession(models.Model):
+    # 分块/断点续传上传：分块依次追加到本地临时文件，完成后计算哈希并存入 StoredFile
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    owner = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='upload_sessions')
+    filename = models.CharField(max_length=255)
+    content_type = models.CharField(max_length=100, blank=True)
+    total_size = models.BigIntegerField()
+    received = models.BigIntegerField(default=0)
+    stored_file = models.ForeignKey(StoredFile, on_delete=models.SET_NULL, related_name='upload_sessions',
+                                    null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+
+class TicketStat(models.Model):
+    # 预聚合计数：dimension 为 status/severity/module/assignee/week，key 为对应取值
+    dimension = models.CharField(max_length=16)
+    key = models.CharField(max_length=255)
+    count = models.BigIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['dimension', 'key'], name='ticket_stat_dimension_key_uniq'),
+        ]
+
+
+class StatusDurationStat(models.Model):
+    # 离开某状态时累加停留时长，平均停留时长 = total_seconds / samples
+    status = models.CharField(max_length=32, choices=TICKET_STATUS_CHOICES, unique=True)
+    total_seconds = models.FloatField(default=0)
+    samples = models.BigIntegerField(default=0)
+
+
+class TicketStatusEvent(models.Model):
+    # 只追加的状态变化日志：创建时一条（from_status 为空），之后每次流转一条
+    id = models.BigAutoField(primary_key=True)
+    ticket = models.ForeignKey(Ticket, on_delete=models.CASCADE, related_name='status_events', db_index=False)
+    from_status = models.CharField(max_length=32, choices=TICKET_STATUS_CHOICES, blank=True)
+    to_status = models.CharField(max_length=32, choices=TICKET_STATUS_CHOICES)
+    at = models.DateTimeField()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['ticket', 'at'], name='status_event_ticket_at_idx'),
+            models.Index(fields=['to_status', 'at'], name='status_event_status_at_idx'),
+        ]
+
+
+class ImportCheckpoint(models.Model):
+    # manage.py import_tickets 的断点：与每批导入数据在同一事务中更新，中断后从 position 行继续。
+    # source 为输入文件的标识（importer.fingerprint），只对同一文件续传；completed_at 非空表示已导入完成
+    name = models.CharField(max_length=255, unique=True)
+    position = models.BigIntegerField(default=0)
+    source = models.CharField(max_length=255, blank=True)
+    completed_at = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
@@ -0,0 +1,23 @@
+from rest_framework.pagination import CursorPagination, PageNumberPagination
+
+
+class TicketCursorPagination(CursorPagination):
+    # 基于 (created_at, id) 的游标分页，翻页深度不影响查询耗时
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 200
+    ordering = ('-created_at', '-id')
+
+    def get_ordering(self, request, queryset, view):
+        # ?ordering= 可选的字段不唯一（批量创建、导入时时间相同），总是以 id 作为次序，否则翻页会跳过或重复
+        ordering = tuple(super().get_ordering(request, queryset, view))
+        if not any(field.lstrip('-') in ('id', 'pk') for field in ordering):
+            ordering += ('-id' if ordering[0].startswith('-') else 'id',)
+        return ordering
+
+
+class TicketSearchPagination(PageNumberPagination):
+    # 搜索结果按相关度排序，使用页码分页
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
@@ -0,0 +1,350 @@
+"""
+工单变更推送，代替客户端轮询 TicketViewSet。
+
+客户端按频道订阅：ticket:<工单 id>、user:<本人 id>（作为提交人/指派人/审核人/回归测试人的工单）、
+status:<状态>（进入或离开该状态的工单）。两种接入方式（均需 ASGI 部署）：
+
+- SSE：GET /api/events/?ticket=<id>&user=me&status=OPEN，EventSource 无法设置请求头时可用 ?token=<access>；
+- WebSocket：/ws/events/?token=<access>，连接后发送 {"subscribe": [...]} / {"unsubscribe": [...]}。
+
+工单创建、修改、删除与状态流转在事务提交后发布精简事件（类型、工单 id、状态、version、updated_at），
+客户端需要完整数据时再请求详情。事件序列化一次后分发给所有订阅者。发布经 settings.PUSH_BACKEND：
+
+- LocalBroker（默认）：进程内，只能推送到同一 worker 的连接；
+- RedisBroker：经 Redis PUBLISH 广播，每个 worker 一个订阅线程，再分发给本进程的连接。
+
+每个连接只占用一个有界 asyncio.Queue，空闲连接不占线程。队列满（客户端过慢）时丢弃积压，发送溢出通知后
+关闭连接（SSE 与 WebSocket 相同）；不保存历史事件，断线重连后客户端应重新拉取。
+"""
+import asyncio
+import json
+import logging
+import threading
+import time
+from collections import defaultdict
+from urllib.parse import parse_qs
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db import connections, transaction
+from django.utils.module_loading import import_string
+from rest_framework.exceptions import APIException, NotAuthenticated, PermissionDenied, ValidationError
+from rest_framework.utils.encoders import JSONEncoder
+
+from .models import Ticket, TICKET_STATUS_CHOICES
+
+logger = logging.getLogger(__name__)
+
+STATUSES = {value for value, label in TICKET_STATUS_CHOICES}
+# 队列溢出时投递给订阅者的消息
+OVERFLOW = json.dumps({'type': 'overflow'})
+# 溢出后关闭 WebSocket 使用的关闭码（1013 Try Again Later）
+OVERFLOW_CLOSE_CODE = 1013
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+# --- 事件 ---
+def ticket_event(event_type, ticket, previous=None):
+    """previous 为变更前的 stat_values()，用于同时通知原状态与原指派人的订阅者"""
+    event = {
+        'type': event_type,
+        'ticket': str(ticket.pk),
+        'current_status': ticket.current_status,
+        'version': ticket.version,
+        'updated_at': ticket.updated_at,
+    }
+    channels = {f'ticket:{ticket.pk}', f'status:{ticket.current_status}'}
+    channels.update(f'user:{user_id}' for user_id in (
+        ticket.submitter_id, ticket.assignee_id, ticket.qa_reviewer_id, ticket.regressor_id,
+    ) if user_id)
+    if previous is not None:
+        if previous['current_status'] != ticket.current_status:
+            event['previous_status'] = previous['current_status']
+            channels.add(f'status:{previous["current_status"]}')
+        if previous['assignee_id']:
+            channels.add(f'user:{previous["assignee_id"]}')
+    return event, channels
+
+
+def publish(event_type, ticket, previous=None):
+    """事务提交后发布；回滚时不发布"""
+    event, channels = ticket_event(event_type, ticket, previous)
+    message = json.dumps(event, cls=JSONEncoder)
+    transaction.on_commit(lambda: _send(channels, message))
+
+
+def _send(channels, message):
+    # 推送失败不影响已提交的写操作
+    try:
+        get_broker().publish(channels, message)
+    except Exception:
+        logger.exception('Failed to publish ticket event')
+
+
+def ticket_saved(ticket, created):
+    """post_save：依据加载时的字段值区分状态变化（须在 stats.ticket_saved 刷新快照之前调用）"""
+    if created:
+        publish('ticket.created', ticket)
+        return
+    previous = getattr(ticket, '_loaded_stat_values', None)
+    changed = previous is not None and previous['current_status'] != ticket.current_status
+    publish('ticket.status_changed' if changed else 'ticket.updated', ticket, previous)
+
+
+# --- 订阅 ---
+class Subscription:
+    """一个连接的订阅：只能在事件循环中创建和读取，投递经 call_soon_threadsafe 回到该循环"""
+
+    def __init__(self, broker, maxsize):
+        self.broker = broker
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize)
+        self.channels = set()
+
+    def deliver(self, message):
+        try:
+            self.queue.put_nowait(message)
+        except asyncio.QueueFull:
+            # 客户端跟不上：丢弃积压，只留一条溢出通知
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(OVERFLOW)
+
+    async def get(self, timeout=None):
+        """下一条消息；超时返回 None"""
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    def subscribe(self, channels):
+        self.broker.add(self, set(channels) - self.channels)
+
+    def unsubscribe(self, channels):
+        self.broker.remove(self, set(channels) & self.channels)
+
+    def close(self):
+        self.broker.remove(self, set(self.channels))
+
+
+def _deliver_all(subscriptions, message):
+    for subscription in subscriptions:
+        subscription.deliver(message)
+
+
+class LocalBroker:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.subscribers = defaultdict(set)
+
+    def subscribe(self, channels=(), maxsize=None):
+        subscription = Subscription(self, maxsize or _setting('PUSH_QUEUE_SIZE', 100))
+        subscription.subscribe(channels)
+        return subscription
+
+    def add(self, subscription, channels):
+        with self.lock:
+            for channel in channels:
+                self.subscribers[channel].add(subscription)
+            subscription.channels |= channels
+
+    def remove(self, subscription, channels):
+        with self.lock:
+            for channel in channels:
+                members = self.subscribers.get(channel)
+                if members is not None:
+                    members.discard(subscription)
+                    if not members:
+                        del self.subscribers[channel]
+            subscription.channels -= channels
+
+    def publish(self, channels, message):
+        return self.dispatch(channels, message)
+
+    def dispatch(self, channels, message):
+        with self.lock:
+            targets = set()
+            for channel in channels:
+                targets |= self.subscribers.get(channel, set())
+        # 每个事件循环只唤醒一次
+        by_loop = defaultdict(list)
+        for subscription in targets:
+            by_loop[subscription.loop].append(subscription)
+        for loop, subscriptions in by_loop.items():
+            try:
+                loop.call_soon_threadsafe(_deliver_all, subscriptions, message)
+            except RuntimeError:
+                # 事件循环已关闭，订阅者随之失效
+                for subscription in subscriptions:
+                    subscription.close()
+        return len(targets)
+
+
+class RedisBroker(LocalBroker):
+    """经 Redis PUBLISH 在多个 worker 间广播；需要 redis 包（与 Redis 缓存后端相同）"""
+
+    def __init__(self, url=None, channel=None):
+        super().__init__()
+        import redis
+
+        self.url = url or _setting('PUSH_REDIS_URL', None) or settings.REDIS_URL
+        self.channel = channel or _setting('PUSH_REDIS_CHANNEL', 'ticket-events')
+        self.client = redis.Redis.from_url(self.url)
+        self._listener = None
+
+    def subscribe(self, channels=(), maxsize=None):
+        self._start()
+        return super().subscribe(channels, maxsize)
+
+    def publish(self, channels, message):
+        self.client.publish(self.channel, json.dumps({'channels': sorted(channels), 'message': message}))
+
+    def _start(self):
+        with self.lock:
+            if self._listener is None:
+                self._listener = threading.Thread(target=self._listen, name='ticket-push', daemon=True)
+                self._listener.start()
+
+    def _listen(self):
+        while True:
+            try:
+                pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(self.channel)
+                for item in pubsub.listen():
+                    payload = json.loads(item['data'])
+                    self.dispatch(payload['channels'], payload['message'])
+            except Exception:
+                logger.exception('Push listener lost its Redis connection, reconnecting')
+                time.sleep(1)
+
+
+_backend = None
+
+
+def get_broker():
+    global _backend
+    if _backend is None:
+        _backend = import_string(_setting('PUSH_BACKEND', 'tickets.push.LocalBroker'))()
+    return _backend
+
+
+# --- 频道解析与认证 ---
+def parse_channels(user, tickets=(), users=(), statuses=()):
+    channels = set()
+    for value in tickets:
+        try:
+            channels.add(f'ticket:{Ticket._meta.pk.to_python(value)}')
+        except DjangoValidationError:
+            raise ValidationError({'ticket': f'"{value}" is not a valid ticket id.'})
+    for value in users:
+        # 只能订阅自己的队列
+        if value not in ('me', str(user.pk)):
+            raise PermissionDenied('You can only subscribe to your own queue.')
+        channels.add(f'user:{user.pk}')
+    for value in statuses:
+        if value not in STATUSES:
+            raise ValidationError({'status': f'Unknown status "{value}".'})
+        channels.add(f'status:{value}')
+    if len(channels) > _setting('PUSH_MAX_CHANNELS', 100):
+        raise ValidationError({'detail': 'Too many channels.'})
+    return channels
+
+
+def channels_from_names(user, names):
+    """WebSocket 消息中的频道名（ticket:<id> / user:me / status:<状态>）"""
+    groups = {'ticket': [], 'user': [], 'status': []}
+    for name in names if isinstance(names, list) else ():
+        kind, _, value = str(name).partition(':')
+        if kind not in groups:
+            raise ValidationError({'detail': f'Unknown channel "{name}".'})
+        groups[kind].append(value)
+    return parse_channels(user, groups['ticket'], groups['user'], groups['status'])
+
+
+async def authenticate_token(raw_token):
+    from .authentication import CachedUserJWTAuthentication
+
+    if not raw_token:
+        raise NotAuthenticated()
+    authentication = CachedUserJWTAuthentication()
+    return await authentication.aget_user(authentication.get_validated_token(raw_token.encode()))
+
+
+def _close_idle_connections():
+    for connection in connections.all(initialized_only=True):
+        if not connection.in_atomic_block:
+            connection.close_if_unusable_or_obsolete()
+
+
+async def release_connections():
+    # 认证可能查询了数据库；长连接结束前不会触发 request_finished，提前归还连接（连接池下尤为重要）
+    await sync_to_async(_close_idle_connections)()
+
+
+# --- WebSocket（asgi.py 中按 scope['type'] 分派）---
+WEBSOCKET_PATH = '/ws/events/'
+
+
+async def websocket_application(scope, receive, send):
+    message = await receive()
+    if message['type'] != 'websocket.connect':
+        return
+    if scope['path'] != WEBSOCKET_PATH:
+        await send({'type': 'websocket.close', 'code': 4404})
+        return
+    query = parse_qs(scope.get('query_string', b'').decode())
+    try:
+        user = await authenticate_token(query.get('token', [''])[0])
+        channels = parse_channels(user, query.get('ticket', ()), query.get('user', ()), query.get('status', ()))
+    except APIException as exc:
+        await send({'type': 'websocket.close', 'code': 4000 + exc.status_code})
+        return
+    finally:
+        await release_connections()
+
+    await send({'type': 'websocket.accept'})
+    subscription = get_broker().subscribe(channels)
+
+    async def forward():
+        while True:
+            message = await subscription.get()
+            await send({'type': 'websocket.send', 'text': message})
+            if message is OVERFLOW:
+                # 与 SSE 一致：积压已丢弃，关闭连接，客户端重连后重新拉取
+                await send({'type': 'websocket.close', 'code': OVERFLOW_CLOSE_CODE})
+                return
+
+    async def listen():
+        while True:
+            message = await receive()
+            if message['type'] == 'websocket.disconnect':
+                return
+            try:
+                command = json.loads(message.get('text') or '{}')
+                if not isinstance(command, dict):
+                    raise ValueError
+                added = channels_from_names(user, command.get('subscribe', []))
+                removed = channels_from_names(user, command.get('unsubscribe', []))
+                # 上限针对连接累计订阅的频道，而不只是单条消息
+                if len((subscription.channels | added) - removed) > _setting('PUSH_MAX_CHANNELS', 100):
+                    raise ValidationError({'detail': 'Too many channels.'})
+                subscription.subscribe(added)
+                subscription.unsubscribe(removed)
+                reply = {'type': 'subscribed', 'channels': sorted(subscription.channels)}
+            except ValueError:
+                reply = {'type': 'error', 'detail': 'Invalid message.'}
+            except APIException as exc:
+                reply = {'type': 'error', 'detail': exc.detail}
+            await send({'type': 'websocket.send', 'text': json.dumps(reply)})
+
+    tasks = [asyncio.ensure_future(forward()), asyncio.ensure_future(listen())]
+    try:
+        await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        for task in tasks:
+            task.cancel()
+        subscription.close()
@@ -0,0 +1,231 @@
+import re
+from collections import Counter
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Count, F, Sum
+from django.utils.module_loading import import_string
+from ticket_django_backend.routers import use_primary
+
+from .models import Ticket, DevReport, QAReview, RegressionTest, TicketSearchToken
+
+# 参与检索的字段及权重
+TICKET_FIELDS = {'title': 5, 'description': 2}
+HISTORY_FIELDS = (
+    (DevReport, ('root_cause', 'self_test_report')),
+    (QAReview, ('comment',)),
+    (RegressionTest, ('report',)),
+)
+HISTORY_WEIGHT = 1
+
+MAX_TOKEN_LENGTH = TicketSearchToken._meta.get_field('token').max_length
+
+# 拉丁字母/数字按单词切分，连续的中日韩字符按二元组切分
+_WORD_RE = re.compile(r'[^\W_]+')
+_CJK_RE = re.compile(r'[぀-ヿ㐀-䶿一-鿿豈-﫿가-힯]+')
+
+
+def tokenize(text):
+    tokens = []
+    for word in _WORD_RE.findall((text or '').lower()):
+        pos = 0
+        for run in _CJK_RE.finditer(word):
+            if run.start() > pos:
+                tokens.append(word[pos:run.start()])
+            chars = run.group()
+            if len(chars) == 1:
+                tokens.append(chars)
+            else:
+                tokens.extend(chars[i:i + 2] for i in range(len(chars) - 1))
+            pos = run.end()
+        if pos < len(word):
+            tokens.append(word[pos:])
+    return [token[:MAX_TOKEN_LENGTH] for token in tokens]
+
+
+class SearchResults:
+    """按相关度排序的惰性结果集，支持 count() 与切片，可直接交给 DRF 分页器"""
+
+    def __init__(self, backend, query):
+        self.backend = backend
+        self.query = query
+        self._count = None
+
+    def count(self):
+        if self._count is None:
+            self._count = self.backend.count(self.query)
+        return self._count
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, item):
+        if not isinstance(item, slice):
+            return self[item:item + 1][0]
+        start = item.start or 0
+        stop = item.stop if item.stop is not None else self.count()
+        if stop <= start:
+            return []
+        return self.backend.hits(self.query, start, stop - start)
+
+
+class BaseSearchBackend:
+    def index_ticket(self, ticket_id):
+        pass
+
+    def index_tickets(self, ticket_ids):
+        for ticket_id in ticket_ids:
+            self.index_ticket(ticket_id)
+
+    def index_history(self, record, created):
+        """历史记录保存后调用；默认重建整个工单"""
+        self.index_ticket(record.ticket_id)
+
+    def count(self, query):
+        raise NotImplementedError
+
+    def hits(self, query, offset, limit):
+        """返回 [(ticket_id, score), ...]，按 score 降序"""
+        raise NotImplementedError
+
+    def search(self, query):
+        return SearchResults(self, query)
+
+
+class TokenIndexBackend(BaseSearchBackend):
+    """基于 TicketSearchToken 表的倒排索引，写入时增量维护，任何数据库均可用"""
+
+    def index_ticket(self, ticket_id):
+        self.index_tickets([ticket_id])
+
+    def index_tickets(self, ticket_ids):
+        # 每个表一条 IN 查询，批量导入时也只需常数次查询；读取刚写入的数据，固定走主库
+        weights = {}
+        with use_primary():
+            for row in Ticket.objects.filter(pk__in=ticket_ids).values('pk', *TICKET_FIELDS):
+                counter = weights[row['pk']] = Counter()
+                for field, weight in TICKET_FIELDS.items():
+                    for token in tokenize(row[field]):
+                        counter[token] += weight
+            for model, fields in HISTORY_FIELDS:
+                rows = model.objects.filter(ticket_id__in=weights).values_list('ticket_id', *fields)
+                for ticket_id, *texts in rows:
+                    for text in texts:
+                        for token in tokenize(text):
+                            weights[ticket_id][token] += HISTORY_WEIGHT
+        with transaction.atomic():
+            TicketSearchToken.objects.filter(ticket_id__in=ticket_ids).delete()
+            TicketSearchToken.objects.bulk_create(
+                TicketSearchToken(ticket_id=ticket_id, token=token, weight=weight)
+                for ticket_id, counter in weights.items()
+                for token, weight in counter.items()
+            )
+
+    def index_history(self, record, created):
+        if not created:
+            self.index_ticket(record.ticket_id)
+            return
+        # 新增的历史记录只需把它的词项权重累加到工单上，不必重读工单和其余历史记录
+        counter = Counter()
+        for field in dict(HISTORY_FIELDS)[type(record)]:
+            for token in tokenize(getattr(record, field)):
+                counter[token] += HISTORY_WEIGHT
+        if not counter:
+            return
+        by_weight = {}
+        for token, weight in counter.items():
+            by_weight.setdefault(weight, []).append(token)
+        with transaction.atomic():
+            # 先补齐缺失的 (词项, 工单) 行，再原子累加，并发写入同一工单时不丢失权重
+            TicketSearchToken.objects.bulk_create(
+                [TicketSearchToken(ticket_id=record.ticket_id, token=token, weight=0) for token in counter],
+                ignore_conflicts=True,
+            )
+            for weight, tokens in by_weight.items():
+                TicketSearchToken.objects.filter(ticket_id=record.ticket_id, token__in=tokens).update(
+                    weight=F('weight') + weight)
+
+    def _matches(self, query):
+        tokens = set(tokenize(query))
+        if not tokens:
+            return TicketSearchToken.objects.none()
+        # 所有词项都需命中（AND 语义），按权重之和排序
+        return (
+            TicketSearchToken.objects.filter(token__in=tokens)
+            .values('ticket_id')
+            .annotate(matched=Count('token'), score=Sum('weight'))
+            .filter(matched=len(tokens))
+        )
+
+    def count(self, query):
+        return self._matches(query).count()
+
+    def hits(self, query, offset, limit):
+        rows = self._matches(query).order_by('-score', 'ticket_id')[offset:offset + limit]
+        return [(row['ticket_id'], row['score']) for row in rows]
+
+
+class MySQLFullTextBackend(BaseSearchBackend):
+    """使用 MySQL InnoDB FULLTEXT 索引（见迁移 0012），索引由数据库自行维护"""
+
+    def _union(self, query):
+        parts, params = [], []
+        tables = [(Ticket, 'id', tuple(TICKET_FIELDS))]
+        tables += [(model, 'ticket_id', fields) for model, fields in HISTORY_FIELDS]
+        for model, ticket_column, fields in tables:
+            match = 'MATCH({}) AGAINST (%s IN NATURAL LANGUAGE MODE)'.format(
+                ', '.join(connection.ops.quote_name(f) for f in fields)
+            )
+            parts.append('SELECT {} AS ticket_id, {} AS score FROM {} WHERE {}'.format(
+                connection.ops.quote_name(ticket_column), match,
+                connection.ops.quote_name(model._meta.db_table), match,
+            ))
+            params += [query, query]
+        return ' UNION ALL '.join(parts), params
+
+    def count(self, query):
+        union, params = self._union(query)
+        with connection.cursor() as cursor:
+            cursor.execute(f'SELECT COUNT(DISTINCT ticket_id) FROM ({union}) hits', params)
+            return cursor.fetchone()[0]
+
+    def hits(self, query, offset, limit):
+        union, params = self._union(query)
+        sql = (
+            f'SELECT ticket_id, SUM(score) AS total FROM ({union}) hits '
+            'GROUP BY ticket_id ORDER BY total DESC, ticket_id LIMIT %s OFFSET %s'
+        )
+        field = Ticket._meta.pk
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params + [limit, offset])
+            return [(field.to_python(ticket_id), score) for ticket_id, score in cursor.fetchall()]
+
+
+_backend = None
+
+
+def ticket_saved(ticket, created, update_fields=None):
+    """post_save：新建或检索字段有变化时重建该工单的索引"""
+    if not created:
+        if update_fields is not None and not set(update_fields) & set(TICKET_FIELDS):
+            return
+        loaded = getattr(ticket, '_loaded_search_values', None)
+        if loaded is not None and loaded == ticket.search_values():
+            return
+    get_search_backend().index_ticket(ticket.pk)
+    ticket._loaded_search_values = ticket.search_values()
+
+
+def history_saved(record, created, update_fields=None):
+    fields = dict(HISTORY_FIELDS)[type(record)]
+    if not created and update_fields is not None and not set(update_fields) & set(fields):
+        return
+    get_search_backend().index_history(record, created)
+
+
+def get_search_backend():
+    global _backend
+    if _backend is None:
+        path = getattr(settings, 'TICKET_SEARCH_BACKEND', 'tickets.search.TokenIndexBackend')
+        _backend = import_string(path)()
+    return _backend
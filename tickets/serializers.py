@@ -1,8 +1,14 @@
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.urls import reverse
+from django.utils import timezone
 from rest_framework import serializers
+from rest_framework.throttling import ScopedRateThrottle
 from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
 from rest_framework_simplejwt.views import TokenObtainPairView
 
-from .models import User, Ticket, QAReview, DevReport, RegressionTest
+from .authentication import remember_user
+from .models import User, Ticket, QAReview, DevReport, RegressionTest, StoredFile, UploadSession
+from .sparse import HistoryField, SparseFieldsMixin
 
 
 class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
@@ -12,26 +18,18 @@ class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
         # 在 token 中添加自定义字段
         token['username'] = user.username
         token['role'] = user.role
+        # 修改密码或停用后 auth_version 递增，此前签发的 token 不再有效（见 tickets/authentication.py）
+        token['auth_version'] = user.auth_version
+        remember_user(user)
         return token
 
     def validate(self, attrs):
-        # 支持 email 或 username 登录
+        # 支持 email 或 username 登录，由 UsernameOrEmailBackend 一次查询完成
         credentials = {
-            'username': '',
+            'username': attrs.get('username'),
             'password': attrs.get('password')
         }
 
-        # 检查输入是 email 还是 username
-        user_input = attrs.get('username')
-        if '@' in user_input:
-            try:
-                user = User.objects.get(email=user_input)
-                credentials['username'] = user.username
-            except User.DoesNotExist:
-                raise serializers.ValidationError('Invalid email or password')
-        else:
-            credentials['username'] = user_input
-
         data = super().validate(credentials)
         # 返回与前端一致的结构：仅一个 token + user 对象
         user_data = UserOutSerializer(self.user).data
@@ -43,10 +41,13 @@ class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
 
 class CustomTokenObtainPairView(TokenObtainPairView):
     serializer_class = CustomTokenObtainPairSerializer
+    # 密码哈希开销大，按 IP 限制登录频率（DEFAULT_THROTTLE_RATES['login']）
+    throttle_classes = [ScopedRateThrottle]
+    throttle_scope = 'login'
 
 
 # --- Users ---
-class UserOutSerializer(serializers.ModelSerializer):
+class UserOutSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     fullName = serializers.CharField(source='full_name', required=False, allow_null=True)
 
     class Meta:
@@ -60,6 +61,16 @@ class UserSerializer(serializers.ModelSerializer):
         fields = ['id', 'username', 'full_name', 'email', 'role', 'password']
         extra_kwargs = {'password': {'write_only': True}}
 
+    def validate_email(self, value):
+        if not value:
+            return None
+        others = User.objects.filter(email__lower=value.lower())
+        if self.instance is not None:
+            others = others.exclude(pk=self.instance.pk)
+        if others.exists():
+            raise serializers.ValidationError('A user with this email already exists.')
+        return value
+
     def create(self, validated_data):
         user = User.objects.create_user(
             username=validated_data['username'],
@@ -77,37 +88,126 @@ class UserIdOrNestedField(serializers.PrimaryKeyRelatedField):
         # 支持 {id: "..."} 或 "..."（UUID字符串）
         if isinstance(data, dict):
             data = data.get('id')
-        return super().to_internal_value(data)
+        # 批量接口会在 context['users'] 中预先放入 resolve_users 的结果，避免逐条查询
+        users = self.context.get('users')
+        if users is None:
+            return super().to_internal_value(data)
+        try:
+            user = users.get(User._meta.pk.to_python(data))
+        except (TypeError, ValueError, DjangoValidationError):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+        if user is None:
+            self.fail('does_not_exist', pk_value=data)
+        return user
+
+
+def resolve_users(items, *fields):
+    """收集批量数据中 fields 引用的用户 id，用一条 IN 查询取回 {id: User}"""
+    ids = set()
+    for item in items:
+        if not isinstance(item, dict):
+            continue
+        for field in fields:
+            value = item.get(field)
+            if isinstance(value, dict):
+                value = value.get('id')
+            try:
+                ids.add(User._meta.pk.to_python(value))
+            except (TypeError, ValueError, DjangoValidationError):
+                continue
+    ids.discard(None)
+    return User.objects.in_bulk(ids) if ids else {}
+
+
+class QAReviewOutSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    reviewer = UserOutSerializer(source='release_qa', read_only=True)
+    designatedTester = UserOutSerializer(source='designated_tester', read_only=True)
+
+    class Meta:
+        model = QAReview
+        fields = ['id', 'comment', 'agree_to_release', 'reviewer', 'designatedTester', 'created_at']
+
+
+class DevReportOutSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    assignedDeveloper = UserOutSerializer(source='assigned_developer', read_only=True)
+    screenshotUrl = serializers.SerializerMethodField(read_only=True)
 
+    def get_screenshotUrl(self, obj):
+        # 截图只经需登录的接口下发；MEDIA_URL 不对外提供，存储路径也不出现在响应中
+        if not obj.self_test_screenshots:
+            return None
+        return reverse('dev_report_screenshot', args=[obj.pk])
 
-class TicketSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = DevReport
+        fields = [
+            'id', 'issue_type', 'root_cause', 'self_test_report', 'screenshotUrl',
+            'regression_version', 'module', 'github_pr_url', 'assignedDeveloper', 'created_at'
+        ]
+        # 方法字段读取的模型字段，供 sparse.plan 计算 only()
+        method_field_sources = {'screenshotUrl': ('self_test_screenshots',)}
+
+
+class RegressionOutSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    tester = UserOutSerializer(source='assign_tester', read_only=True)
+
+    class Meta:
+        model = RegressionTest
+        fields = ['id', 'regression_version', 'passed', 'report', 'tester', 'created_at']
+
+
+class TicketSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     submitter = UserOutSerializer(read_only=True)
     assignee = UserOutSerializer(read_only=True)
     qa_reviewer = UserOutSerializer(read_only=True)
     regressor = UserOutSerializer(read_only=True)
-    qa_reviews = serializers.SerializerMethodField(read_only=True)
-    dev_reports = serializers.SerializerMethodField(read_only=True)
-    regression_tests = serializers.SerializerMethodField(read_only=True)
-
-    def get_qa_reviews(self, obj):
-        qs = obj.qa_reviews.order_by('-created_at')
-        return QAReviewOutSerializer(qs, many=True).data
+    qa_reviews = HistoryField(QAReviewOutSerializer, users=('release_qa', 'designated_tester'))
+    dev_reports = HistoryField(DevReportOutSerializer, users=('assigned_developer',))
+    regression_tests = HistoryField(RegressionOutSerializer, users=('assign_tester',))
 
-    def get_dev_reports(self, obj):
-        qs = obj.dev_reports.order_by('-created_at')
-        return DevReportOutSerializer(qs, many=True).data
+    class Meta:
+        model = Ticket
+        fields = [
+            'id', 'title', 'description',
+            'software_name', 'software_version', 'discovered_at',
+            'severity', 'module', 'current_status',
+            'submitter', 'assignee', 'qa_reviewer', 'regressor', 'qa_reviews', 'dev_reports', 'regression_tests',
+            'created_at', 'updated_at'
+        ]
+        # 状态只能经工作流接口变更（见 tickets/workflow.py），编辑接口不可直接写入
+        read_only_fields = ['current_status']
 
-    def get_regression_tests(self, obj):
-        qs = obj.regression_tests.order_by('-created_at')
-        return RegressionOutSerializer(qs, many=True).data
+    def validate(self, attrs):
+        initial = getattr(self, 'initial_data', None) or {}
+        if (self.instance is not None and 'current_status' in initial
+                and initial['current_status'] != self.instance.current_status):
+            raise serializers.ValidationError(
+                {'current_status': 'Status can only be changed through the workflow actions.'}
+            )
+        return attrs
+
+    def update(self, instance, validated_data):
+        for field, value in validated_data.items():
+            setattr(instance, field, value)
+        # 只写入本次修改的列，不覆盖并发 transition() 写入的状态与版本号
+        instance.save(update_fields=[*validated_data, 'updated_at'])
+        return instance
+
+
+class TicketListSerializer(serializers.ModelSerializer):
+    # 列表页的精简表示：不内嵌历史记录，历史记录仅在详情接口返回
+    submitter = UserOutSerializer(read_only=True)
+    assignee = UserOutSerializer(read_only=True)
+    qa_reviewer = UserOutSerializer(read_only=True)
+    regressor = UserOutSerializer(read_only=True)
 
     class Meta:
         model = Ticket
         fields = [
-            'id', 'title', 'description',
+            'id', 'title',
             'software_name', 'software_version', 'discovered_at',
             'severity', 'module', 'current_status',
-            'submitter', 'assignee', 'qa_reviewer', 'regressor', 'qa_reviews', 'dev_reports', 'regression_tests'
+            'submitter', 'assignee', 'qa_reviewer', 'regressor',
             'created_at', 'updated_at'
         ]
 
@@ -123,26 +223,40 @@ class TicketCreateSerializer(serializers.ModelSerializer):
             'severity', 'module', 'assignee'
         ]
 
-    def create(self, validated_data):
+    def build(self, validated_data):
         request = self.context.get('request')
         submitter = request.user if request and request.user.is_authenticated else None
         # 若未提供 discovered_at，则使用当前时间
         if 'discovered_at' not in validated_data or validated_data['discovered_at'] is None:
-            from django.utils import timezone
             validated_data['discovered_at'] = timezone.now()
-        ticket = Ticket.objects.create(
+        return Ticket(
             current_status='OPEN',
             submitter=submitter,
             **validated_data
         )
+
+    def create(self, validated_data):
+        ticket = self.build(validated_data)
+        ticket.save(force_insert=True)
         return ticket
 
 
+class OwnStoredFileField(serializers.PrimaryKeyRelatedField):
+    """只接受当前用户自己上传的文件（需在 context 中传入 request）"""
+
+    def get_queryset(self):
+        request = self.context.get('request')
+        user_id = request.user.id if request is not None else None
+        return StoredFile.objects.filter(upload_sessions__owner_id=user_id).distinct()
+
+
 class DevReportSerializer(serializers.Serializer):
     issue_type = serializers.CharField(required=False, allow_blank=True)
     root_cause = serializers.CharField(required=False, allow_blank=True)
     self_test_report = serializers.CharField(required=False, allow_blank=True)
     self_test_screenshots = serializers.FileField(required=False, allow_null=True)
+    # 通过 /api/uploads/ 分块上传完成后得到的文件 id，可代替 self_test_screenshots 直接上传
+    screenshot_file = OwnStoredFileField(required=False, allow_null=True)
     regression_version = serializers.CharField(required=False, allow_blank=True)
     module = serializers.CharField(required=False, allow_blank=True)
     github_pr_url = serializers.URLField(required=False, allow_null=True)
@@ -160,28 +274,34 @@ class RegressionSerializer(serializers.Serializer):
     report = serializers.CharField(required=False, allow_blank=True)
 
 
-class QAReviewOutSerializer(serializers.ModelSerializer):
-    reviewer = UserOutSerializer(source='release_qa', read_only=True)
-    designatedTester = UserOutSerializer(source='designated_tester', read_only=True)
+# --- Uploads ---
+class UploadStartSerializer(serializers.Serializer):
+    filename = serializers.CharField(max_length=255)
+    size = serializers.IntegerField(min_value=1)
+    content_type = serializers.CharField(max_length=100, required=False, allow_blank=True)
 
-    class Meta:
-        model = QAReview
-        fields = ['id', 'comment', 'agree_to_release', 'reviewer', 'designatedTester', 'created_at']
 
+class StoredFileOutSerializer(serializers.ModelSerializer):
+    # 与 screenshotUrl 相同，只下发需登录的接口地址，不暴露存储路径
+    file = serializers.SerializerMethodField(read_only=True)
+    thumbnail = serializers.SerializerMethodField(read_only=True)
 
-class DevReportOutSerializer(serializers.ModelSerializer):
-    assignedDeveloper = UserOutSerializer(source='assigned_developer', read_only=True)
+    def get_file(self, obj):
+        return reverse('stored_file', args=[obj.pk])
+
+    def get_thumbnail(self, obj):
+        if not obj.thumbnail:
+            return None
+        return reverse('stored_file', args=[obj.pk]) + '?thumbnail=1'
 
     class Meta:
-        model = DevReport
-        fields = [
-            'id', 'issue_type', 'root_cause', 'self_test_report', 'self_test_screenshots',
-            'regression_version', 'module', 'github_pr_url', 'assignedDeveloper', 'created_at'
-        ]
+        model = StoredFile
+        fields = ['id', 'sha256', 'file', 'size', 'content_type', 'thumbnail']
 
-class RegressionOutSerializer(serializers.ModelSerializer):
-    tester = UserOutSerializer(source='assign_tester', read_only=True)
+
+class UploadSessionOutSerializer(serializers.ModelSerializer):
+    storedFile = StoredFileOutSerializer(source='stored_file', read_only=True)
 
     class Meta:
-        model = RegressionTest
-        fields = ['id', 'regression_version', 'passed', 'report', 'tester', 'created_at']
\ No newline at end of file
+        model = UploadSession
+        fields = ['id', 'filename', 'content_type', 'total_size', 'received', 'storedFile', 'created_at']
@@ -0,0 +1,81 @@
+from django.core.signals import setting_changed
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from ticket_django_backend import instrumentation
+
+from . import analytics, cache as ticket_cache, push, search, stats, tasks
+from .authentication import mark_user_changed
+from .models import User, Ticket, DevReport, QAReview, RegressionTest
+
+
+@receiver(post_save, sender=Ticket)
+def index_ticket_on_save(sender, instance, created, update_fields=None, **kwargs):
+    search.ticket_saved(instance, created, update_fields)
+
+
+@receiver(post_save, sender=Ticket)
+def count_ticket_on_save(sender, instance, created, raw=False, **kwargs):
+    if not raw:
+        # 三者都依据加载时的字段值判断变化，stats.ticket_saved 会刷新该快照，需放在最后
+        analytics.ticket_saved(instance, created)
+        push.ticket_saved(instance, created)
+        stats.ticket_saved(instance, created)
+
+
+@receiver(post_delete, sender=Ticket)
+def count_ticket_on_delete(sender, instance, **kwargs):
+    stats.ticket_deleted(instance)
+    push.publish('ticket.deleted', instance)
+
+
+@receiver(post_save, sender=DevReport)
+@receiver(post_save, sender=QAReview)
+@receiver(post_save, sender=RegressionTest)
+def index_history_on_save(sender, instance, created, update_fields=None, **kwargs):
+    search.history_saved(instance, created, update_fields)
+
+
+@receiver(post_save, sender=DevReport)
+@receiver(post_save, sender=QAReview)
+@receiver(post_save, sender=RegressionTest)
+@receiver(post_delete, sender=DevReport)
+@receiver(post_delete, sender=QAReview)
+@receiver(post_delete, sender=RegressionTest)
+def touch_ticket(sender, instance, **kwargs):
+    # 历史记录变化视为工单变化：刷新 updated_at，使按 updated_at 生成的缓存键失效
+    Ticket.objects.filter(pk=instance.ticket_id).update(updated_at=timezone.now())
+
+
+@receiver(post_delete, sender=DevReport)
+@receiver(post_delete, sender=QAReview)
+@receiver(post_delete, sender=RegressionTest)
+def index_history_on_delete(sender, instance, **kwargs):
+    # 级联删除工单时子记录先于工单删除，提交后再重建，index_ticket 会跳过已删除的工单
+    ticket_id = instance.ticket_id
+    transaction.on_commit(lambda: search.get_search_backend().index_ticket(ticket_id))
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_cached_user(sender, instance, created=False, update_fields=None, **kwargs):
+    # 新建用户之前不可能有已签发的 token，也不会出现在已缓存的工单表示中
+    if created:
+        return
+    mark_user_changed(instance.pk)
+    if update_fields is None or ticket_cache.USER_FIELDS & set(update_fields):
+        ticket_cache.users_changed()
+
+
+@receiver(setting_changed)
+def reset_search_backend(setting, **kwargs):
+    if setting == 'TICKET_SEARCH_BACKEND':
+        search._backend = None
+    elif setting == 'TICKET_TASK_BACKEND':
+        tasks._backend = None
+    elif setting == 'PUSH_BACKEND':
+        push._backend = None
+    elif setting == 'PERF_SERIALIZER_TIMING':
+        instrumentation.configure_serializer_timing()
@@ -0,0 +1,173 @@
+"""
+稀疏字段与按需展开：?fields=id,title,assignee.username&expand=dev_reports
+
+- fields：只返回列出的字段；点号路径限定嵌套对象的字段（assignee.username 同时表示展开 assignee）；
+- expand：以嵌套对象返回的关联（人员、历史记录），点号路径展开下一层（dev_reports.assignedDeveloper）；
+- 给定 fields 时，列出但未展开的关联只返回主键：人员为 id（读取外键列，不连表），历史记录为 id 列表。
+
+两个参数都未给定时保持原有的完整表示。optimize() 按同一规格调整查询集：only() 只读取用到的列，
+select_related / prefetch_related 只针对展开的关联。
+"""
+from django.db.models import Prefetch
+from rest_framework import serializers
+from rest_framework.exceptions import ValidationError
+
+
+def _tree(paths):
+    """'a,b.c,b.d' -> {'a': [], 'b': ['c', 'd']}"""
+    if isinstance(paths, str):
+        paths = paths.split(',')
+    tree = {}
+    for path in paths:
+        path = path.strip()
+        if path:
+            head, _, rest = path.partition('.')
+            tree.setdefault(head, [])
+            if rest:
+                tree[head].append(rest)
+    return tree
+
+
+class FieldSpec:
+    def __init__(self, fields=None, expand=(), expand_fields=False):
+        # fields 为 None 表示全部字段且全部展开（默认表示）；expand_fields 表示 fields 中的关联也展开
+        self.fields = None if fields is None else _tree(fields)
+        self.expand = _tree(expand)
+        self.expand_fields = expand_fields
+
+    @classmethod
+    def from_request(cls, request, default_fields=None):
+        """未给定 fields / expand 时返回 None
+
+        default_fields 为只给定 expand 时的基础字段（如列表页的精简表示），其中的关联保持展开。
+        """
+        params = request.query_params
+        if 'fields' not in params and 'expand' not in params:
+            return None
+        if 'fields' not in params and default_fields is not None:
+            return cls(default_fields, params.get('expand', ''), expand_fields=True)
+        return cls(params.get('fields'), params.get('expand', ''))
+
+    @property
+    def everything(self):
+        return self.fields is None
+
+    def includes(self, name):
+        return self.everything or name in self.fields or name in self.expand
+
+    def expanded(self, name):
+        if self.everything or name in self.expand:
+            return True
+        return name in self.fields and (self.expand_fields or bool(self.fields[name]))
+
+    def child(self, name):
+        if self.everything:
+            return FieldSpec()
+        return FieldSpec(self.fields.get(name) or None, self.expand.get(name, ()))
+
+    def validate(self, names, relations):
+        if self.everything:
+            return
+        unknown = (set(self.fields) | set(self.expand)) - set(names)
+        if unknown:
+            raise ValidationError({'fields': f'Unknown field(s): {", ".join(sorted(unknown))}.'})
+        nested = {name for name, paths in self.fields.items() if paths} | set(self.expand)
+        if nested - relations:
+            raise ValidationError({'expand': f'Not expandable: {", ".join(sorted(nested - relations))}.'})
+
+
+class HistoryField(serializers.Field):
+    """工单的一类历史记录（反向外键），按时间倒序；sparse 规格下未展开时只返回 id 列表"""
+
+    def __init__(self, serializer_class, users=(), **kwargs):
+        kwargs['read_only'] = True
+        super().__init__(**kwargs)
+        self.serializer_class = serializer_class
+        self.users = users
+        self.sparse = None
+        self.ids_only = False
+
+    def get_attribute(self, instance):
+        # 优先使用预加载（已排序）的结果，避免逐条查询
+        if self.source in getattr(instance, '_prefetched_objects_cache', {}):
+            return getattr(instance, self.source).all()
+        queryset = getattr(instance, self.source).order_by('-created_at')
+        return queryset.only('pk') if self.ids_only else queryset.select_related(*self.users)
+
+    def to_representation(self, records):
+        if self.ids_only:
+            return [str(record.pk) for record in records]
+        return self.serializer_class(records, many=True, sparse=self.sparse).data
+
+    def prefetch(self):
+        model = self.serializer_class.Meta.model
+        if self.ids_only:
+            queryset = model.objects.only('pk', 'ticket')
+        else:
+            only, related, _ = plan(self.serializer_class(sparse=self.sparse))
+            queryset = model.objects.select_related(*related).only(*only, 'ticket')
+        return Prefetch(self.source, queryset=queryset.order_by('-created_at'))
+
+
+class SparseFieldsMixin:
+    """ModelSerializer 混入：接受 sparse=FieldSpec，按规格筛选、展开字段"""
+
+    def __init__(self, *args, sparse=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.sparse = sparse
+
+    def get_fields(self):
+        fields = super().get_fields()
+        spec = self.sparse
+        if spec is None or spec.everything:
+            return fields
+        relations = {name for name, field in fields.items()
+                     if isinstance(field, (serializers.BaseSerializer, HistoryField))}
+        spec.validate(fields, relations)
+
+        selected = {}
+        for name, field in fields.items():
+            if not spec.includes(name):
+                continue
+            if name in relations and not spec.expanded(name):
+                if isinstance(field, HistoryField):
+                    field.ids_only = True
+                else:
+                    field = serializers.PrimaryKeyRelatedField(source=field.source, read_only=True)
+            elif name in relations:
+                field.sparse = spec.child(name)
+            selected[name] = field
+        return selected
+
+
+def plan(serializer, prefix=''):
+    """按序列化器（已应用规格）的字段计算 (only 路径, select_related 路径, 历史记录 Prefetch)"""
+    model = serializer.Meta.model
+    only, related, prefetches = {prefix + model._meta.pk.name}, [], []
+    method_sources = getattr(serializer.Meta, 'method_field_sources', {})
+    for name, field in serializer.fields.items():
+        if isinstance(field, HistoryField):
+            if not prefix:
+                prefetches.append(field.prefetch())
+        elif isinstance(field, serializers.SerializerMethodField):
+            only.update(prefix + source for source in method_sources.get(name, ()))
+        elif isinstance(field, serializers.BaseSerializer):
+            path = prefix + field.source
+            only.add(path)
+            related.append(path)
+            child_only, child_related, _ = plan(field, path + '__')
+            only |= child_only
+            related += child_related
+        elif field.source != '*':
+            only.add(prefix + field.source.replace('.', '__'))
+    return only, related, prefetches
+
+
+def optimize(queryset, serializer, extra=()):
+    """替换查询集原有的 select_related / prefetch_related，只加载序列化器用到的列与关联"""
+    only, related, prefetches = plan(serializer)
+    queryset = queryset.select_related(None).prefetch_related(None).prefetch_related(*prefetches)
+    if related:
+        # 不带参数的 select_related() 会连接所有非空外键
+        queryset = queryset.select_related(*related)
+    return queryset.only(*only, *extra)
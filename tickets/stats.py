@@ -0,0 +1,171 @@
+"""
+仪表盘统计：按状态、严重程度、模块、处理人、创建周的工单数，以及各状态的平均停留时长。
+
+计数保存在 TicketStat / StatusDurationStat 两张小表中，工单创建、保存、删除和状态流转时增量更新
+（与业务写入在同一事务中），/api/stats/ 只读取这两张表，耗时与工单总数无关。
+rebuild() 从工单及状态变化日志（TicketStatusEvent）全量重算，用于初始化或修复计数
+（manage.py rebuild_ticket_stats）。
+"""
+from collections import Counter, defaultdict
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import Case, F, IntegerField, Value, When
+from django.utils import timezone
+from ticket_django_backend.routers import use_primary
+
+from . import analytics
+from .models import Ticket, TicketStat, StatusDurationStat
+
+DIMENSIONS = ('status', 'severity', 'module', 'assignee', 'week')
+UNASSIGNED = ''
+
+
+def week_of(value):
+    # 以周一的日期（本地时区）作为周的键
+    day = timezone.localtime(value).date() if timezone.is_aware(value) else value.date()
+    return (day - timedelta(days=day.weekday())).isoformat()
+
+
+def ticket_keys(values):
+    return [
+        ('status', values['current_status']),
+        ('severity', values['severity']),
+        ('module', values['module'] or ''),
+        ('assignee', str(values['assignee_id']) if values['assignee_id'] else UNASSIGNED),
+        ('week', week_of(values['created_at'])),
+    ]
+
+
+def _add_counts(delta):
+    # 先 INSERT IGNORE 补齐缺失的行，再每个维度一条 UPDATE（CASE WHEN 按 key 给出增量）
+    by_dimension = defaultdict(dict)
+    for (dimension, key), amount in delta.items():
+        if amount:
+            by_dimension[dimension][key] = amount
+    if not by_dimension:
+        return
+
+    TicketStat.objects.bulk_create(
+        [TicketStat(dimension=dimension, key=key) for dimension, amounts in by_dimension.items() for key in amounts],
+        ignore_conflicts=True,
+    )
+    for dimension, amounts in by_dimension.items():
+        whens = [When(key=key, then=Value(amount)) for key, amount in amounts.items()]
+        TicketStat.objects.filter(dimension=dimension, key__in=list(amounts)).update(
+            count=F('count') + Case(*whens, default=Value(0), output_field=IntegerField()),
+        )
+
+
+def apply(added=(), removed=()):
+    """added / removed 为 Ticket.stat_values() 形式的字典"""
+    delta = Counter()
+    for values in added:
+        delta.update(ticket_keys(values))
+    for values in removed:
+        delta.subtract(ticket_keys(values))
+    _add_counts(delta)
+
+
+def _add_duration(status, seconds, samples=1):
+    updated = StatusDurationStat.objects.filter(status=status).update(
+        total_seconds=F('total_seconds') + seconds, samples=F('samples') + samples,
+    )
+    if not updated:
+        StatusDurationStat.objects.get_or_create(status=status)
+        _add_duration(status, seconds, samples)
+
+
+def status_left(status, entered_at, left_at):
+    _add_duration(status, max((left_at - entered_at).total_seconds(), 0))
+
+
+def add_intervals(intervals):
+    """批量累加已结束的状态区间 (ticket_id, status, entered_at, left_at)，每个状态一条 UPDATE（导入时使用）"""
+    durations = defaultdict(lambda: [0.0, 0])
+    for _, status, entered_at, left_at in intervals:
+        total = durations[status]
+        total[0] += max((left_at - entered_at).total_seconds(), 0)
+        total[1] += 1
+    for status, (seconds, samples) in durations.items():
+        _add_duration(status, seconds, samples)
+
+
+def record_transition(ticket, to_status, now):
+    """workflow.transition 调用：ticket 仍为流转前的状态"""
+    _add_counts({('status', ticket.current_status): -1, ('status', to_status): 1})
+    status_left(ticket.current_status, ticket.status_changed_at, now)
+
+
+def ticket_saved(ticket, created):
+    values = ticket.stat_values()
+    loaded = getattr(ticket, '_loaded_stat_values', None)
+    if created:
+        apply(added=[values])
+    elif loaded is not None and loaded != values:
+        apply(added=[values], removed=[loaded])
+        if loaded['current_status'] != values['current_status']:
+            status_left(loaded['current_status'], loaded['status_changed_at'], values['status_changed_at'])
+    ticket._loaded_stat_values = values
+
+
+def ticket_deleted(ticket):
+    apply(removed=[getattr(ticket, '_loaded_stat_values', None) or ticket.stat_values()])
+
+
+def snapshot():
+    """/api/stats/ 的数据：两条查询，与工单总数无关"""
+    counts = {dimension: {} for dimension in DIMENSIONS}
+    for dimension, key, count in TicketStat.objects.filter(count__gt=0).values_list('dimension', 'key', 'count'):
+        counts.setdefault(dimension, {})[key] = count
+    mean_time = {
+        status: total / samples
+        for status, total, samples in StatusDurationStat.objects.filter(samples__gt=0)
+        .values_list('status', 'total_seconds', 'samples')
+    }
+    return {
+        'total': sum(counts['status'].values()),
+        'by_status': counts['status'],
+        'by_severity': counts['severity'],
+        'by_module': counts['module'],
+        'by_assignee': counts['assignee'],
+        'by_week': dict(sorted(counts['week'].items())),
+        'mean_seconds_in_status': mean_time,
+    }
+
+
+# --- 全量重算 ---
+def rebuild():
+    """在一个事务中重算并替换计数
+
+    先锁住全部计数行（InnoDB 的锁定读同时加间隙锁，新键的 INSERT 也会等待），并发流转的增量更新
+    等到重算提交后再累加到新计数上；之后的读取在 REPEATABLE READ 下共用一个一致性快照，
+    不会把锁定之后才提交的流转算进去。工单与事件按主键分页读取，内存占用与表大小无关。
+    所有读取固定在主库，与加锁处于同一事务和快照中。
+    """
+    with use_primary(), transaction.atomic():
+        list(TicketStat.objects.select_for_update().values_list('pk', flat=True))
+        list(StatusDurationStat.objects.select_for_update().values_list('pk', flat=True))
+
+        counts = Counter()
+        rows = Ticket.objects.values('id', 'current_status', 'severity', 'module', 'assignee_id', 'created_at')
+        for values in analytics.iter_keyset(rows, ('id',)):
+            counts.update(ticket_keys(values))
+
+        durations = defaultdict(lambda: [0.0, 0])
+        for _, status, entered_at, left_at in analytics.intervals(analytics.ordered_events()):
+            total = durations[status]
+            total[0] += max((left_at - entered_at).total_seconds(), 0)
+            total[1] += 1
+
+        TicketStat.objects.all().delete()
+        StatusDurationStat.objects.all().delete()
+        TicketStat.objects.bulk_create(
+            [TicketStat(dimension=dimension, key=key, count=count) for (dimension, key), count in counts.items()],
+            batch_size=1000,
+        )
+        StatusDurationStat.objects.bulk_create(
+            [StatusDurationStat(status=status, total_seconds=total, samples=samples)
+             for status, (total, samples) in durations.items()],
+        )
+    return len(counts), sum(samples for _, samples in durations.values())
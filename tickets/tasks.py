@@ -0,0 +1,81 @@
+"""
+后台任务队列。
+
+enqueue('tickets.uploads.generate_thumbnail', stored_file_id) 把任务交给 settings.TICKET_TASK_BACKEND：
+
+- ThreadQueueBackend（默认）：进程内队列 + 守护线程，适合单机部署；
+- ImmediateBackend：在当前线程立即执行，用于测试；
+- 生产环境可实现同样 enqueue 接口的后端，转发到 Celery / RQ 等消息队列。
+
+任务以可导入的路径字符串表示，参数需可序列化，便于替换为基于消息代理的后端。
+"""
+import logging
+import queue
+import threading
+
+from django.conf import settings
+from django.db import close_old_connections
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+
+def run_task(path, args, kwargs):
+    close_old_connections()
+    try:
+        import_string(path)(*args, **kwargs)
+    except Exception:
+        logger.exception('Background task %s failed', path)
+    finally:
+        close_old_connections()
+
+
+class ImmediateBackend:
+    def enqueue(self, path, *args, **kwargs):
+        import_string(path)(*args, **kwargs)
+
+
+class ThreadQueueBackend:
+    def __init__(self, workers=None):
+        self.workers = workers or getattr(settings, 'TICKET_TASK_WORKERS', 2)
+        self.queue = queue.Queue()
+        self._threads = []
+        self._lock = threading.Lock()
+
+    def _start(self):
+        with self._lock:
+            if self._threads:
+                return
+            for index in range(self.workers):
+                thread = threading.Thread(target=self._work, name=f'ticket-tasks-{index}', daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def _work(self):
+        while True:
+            path, args, kwargs = self.queue.get()
+            try:
+                run_task(path, args, kwargs)
+            finally:
+                self.queue.task_done()
+
+    def enqueue(self, path, *args, **kwargs):
+        self._start()
+        self.queue.put((path, args, kwargs))
+
+    def join(self):
+        self.queue.join()
+
+
+_backend = None
+
+
+def get_task_backend():
+    global _backend
+    if _backend is None:
+        _backend = import_string(getattr(settings, 'TICKET_TASK_BACKEND', 'tickets.tasks.ThreadQueueBackend'))()
+    return _backend
+
+
+def enqueue(path, *args, **kwargs):
+    get_task_backend().enqueue(path, *args, **kwargs)
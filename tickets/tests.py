@@ -1,9 +1,40 @@
-from django.test import TestCase
+import asyncio
+import base64
+import csv
+import io
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+import uuid
+from unittest import mock
+
+from asgiref.sync import sync_to_async
+from django.core.files.base import ContentFile
+from django.core.handlers.asgi import ASGIHandler
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management import CommandError, call_command
+from django.db import connection, router
+from django.http import HttpResponse
+from django.test.utils import CaptureQueriesContext
+from django.test import AsyncClient, RequestFactory, SimpleTestCase, TestCase, TransactionTestCase, override_settings
 from django.utils import timezone
 from rest_framework.test import APIClient
 from rest_framework import status
 
-from .models import User, Ticket, DevReport
+from ticket_django_backend import instrumentation
+from ticket_django_backend.mysql_pool.pool import ConnectionPool
+from ticket_django_backend.routers import PrimaryReplicaRouter, ReplicaRoutingMiddleware, preserve_routing, use_primary
+
+from . import analytics, export, importer, push, search, stats, uploads, workflow
+from .analytics import QuantileSketch
+from .models import (
+    User, Ticket, DevReport, QAReview, RegressionTest, StoredFile, StatusDurationStat, TicketStat, TicketStatusEvent,
+    ImportCheckpoint,
+)
+from .serializers import CustomTokenObtainPairSerializer, StoredFileOutSerializer, TicketSerializer
 
 
 class TicketAPITests(TestCase):
@@ -106,3 +137,1680 @@ class TicketAPITests(TestCase):
             format="json",
         )
         self.assertEqual(resp_forbidden.status_code, status.HTTP_403_FORBIDDEN)
+
+    def _create_ticket_with_history(self, title):
+        ticket = Ticket.objects.create(
+            title=title,
+            discovered_at=timezone.now(),
+            submitter=self.tester,
+            assignee=self.dev,
+        )
+        DevReport.objects.create(ticket=ticket, assigned_developer=self.dev, root_cause="npe")
+        QAReview.objects.create(ticket=ticket, release_qa=self.qa, designated_tester=self.tester)
+        RegressionTest.objects.create(ticket=ticket, assign_tester=self.tester, passed=True)
+        return ticket
+
+    def test_ticket_list_query_count_is_independent_of_history_size(self):
+        """
+        retrieve runs freshness check + ticket + 3 ordered prefetches, list freshness check + one page query
+        """
+        self.client.force_authenticate(user=self.tester)
+        ticket = self._create_ticket_with_history("first")
+
+        with self.assertNumQueries(5):
+            resp = self.client.get(f"/api/tickets/{ticket.id}/")
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+
+        for i in range(5):
+            self._create_ticket_with_history(f"bug {i}")
+        DevReport.objects.create(ticket=ticket, assigned_developer=self.dev, root_cause="later")
+
+        # the list uses the slim representation: no history
+        with self.assertNumQueries(2):
+            resp = self.client.get("/api/tickets/")
+        self.assertEqual(len(resp.data["results"]), 6)
+        self.assertNotIn("dev_reports", resp.data["results"][0])
+
+        with self.assertNumQueries(5):
+            resp = self.client.get(f"/api/tickets/{ticket.id}/")
+        reports = resp.data["dev_reports"]
+        self.assertEqual([r["root_cause"] for r in reports], ["later", "npe"])
+        self.assertEqual(reports[0]["assignedDeveloper"]["username"], "dev1")
+        self.assertEqual(resp.data["qa_reviews"][0]["reviewer"]["username"], "qa1")
+        self.assertEqual(resp.data["regression_tests"][0]["tester"]["username"], "tester1")
+
+    def test_sparse_fieldsets_and_expansion(self):
+        """
+        ?fields= narrows the response and the SELECT; ?expand= opts in to nested users and histories
+        """
+        self.client.force_authenticate(user=self.tester)
+        ticket = self._create_ticket_with_history("sparse")
+        self.client.get(f"/api/tickets/{ticket.id}/")  # fills the representation cache
+
+        with CaptureQueriesContext(connection) as queries:
+            resp = self.client.get("/api/tickets/?fields=id,title,current_status,severity")
+        self.assertEqual(set(resp.data["results"][0]), {"id", "title", "current_status", "severity"})
+        select = queries.captured_queries[-1]["sql"]
+        self.assertNotIn("JOIN", select)
+        self.assertNotIn("description", select)
+
+        resp = self.client.get(f"/api/tickets/{ticket.id}/?fields=id,assignee,dev_reports").json()
+        self.assertEqual(resp["assignee"], str(self.dev.id))
+        self.assertEqual(resp["dev_reports"], [str(ticket.dev_reports.get().id)])
+
+        with self.assertNumQueries(3):
+            resp = self.client.get(f"/api/tickets/{ticket.id}/?fields=id,assignee.username"
+                                   "&expand=qa_reviews.reviewer").json()
+        self.assertEqual(resp["assignee"], {"username": "dev1"})
+        self.assertEqual(resp["qa_reviews"][0]["reviewer"]["username"], "qa1")
+        self.assertEqual(resp["qa_reviews"][0]["designatedTester"]["username"], "tester1")
+
+        resp = self.client.get("/api/tickets/?expand=dev_reports").json()
+        self.assertEqual(resp["results"][0]["dev_reports"][0]["root_cause"], "npe")
+        self.assertEqual(resp["results"][0]["submitter"]["username"], "tester1")
+
+        self.assertEqual(self.client.get("/api/tickets/?fields=id,nope").status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.client.get("/api/tickets/?expand=title").status_code, status.HTTP_400_BAD_REQUEST)
+        resp = self.client.get(f"/api/users/{self.dev.id}/?fields=username,role")
+        self.assertEqual(resp.data, {"username": "dev1", "role": "DEVELOPER"})
+
+    def test_ticket_list_is_cursor_paginated(self):
+        """
+        walk /api/tickets/ page by page, newest first, without duplicates
+        """
+        self.client.force_authenticate(user=self.tester)
+        for i in range(5):
+            Ticket.objects.create(title=f"bug {i}", discovered_at=timezone.now(), submitter=self.tester)
+
+        seen = []
+        url = "/api/tickets/?page_size=2"
+        while url:
+            resp = self.client.get(url)
+            self.assertEqual(resp.status_code, status.HTTP_200_OK)
+            self.assertLessEqual(len(resp.data["results"]), 2)
+            seen += [item["title"] for item in resp.data["results"]]
+            url = resp.data["next"]
+        self.assertEqual(seen, [f"bug {i}" for i in reversed(range(5))])
+
+        # client-chosen ordering on a shared timestamp still visits every ticket exactly once
+        Ticket.objects.update(discovered_at=timezone.now())
+        for ordering in ("discovered_at", "-discovered_at"):
+            seen, url = [], f"/api/tickets/?page_size=2&ordering={ordering}"
+            while url:
+                with CaptureQueriesContext(connection) as queries:
+                    resp = self.client.get(url)
+                order_by = [q["sql"] for q in queries if '"tickets_ticket"."discovered_at"' in q["sql"].split("ORDER BY")[-1]]
+                self.assertIn('"tickets_ticket"."id"', order_by[-1].split("ORDER BY")[-1])
+                seen += [item["title"] for item in resp.data["results"]]
+                url = resp.data["next"]
+            self.assertEqual(sorted(seen), [f"bug {i}" for i in range(5)])
+
+    def test_ticket_list_filters(self):
+        """
+        server-side filtering by status / severity / assignee / date range
+        """
+        self.client.force_authenticate(user=self.dev)
+        now = timezone.now()
+        Ticket.objects.create(title="mine open", discovered_at=now, submitter=self.tester,
+                              assignee=self.dev, severity="CRITICAL")
+        Ticket.objects.create(title="mine closed", discovered_at=now, submitter=self.tester,
+                              assignee=self.dev, current_status="CLOSED")
+        Ticket.objects.create(title="old", discovered_at=now - timezone.timedelta(days=30),
+                              submitter=self.tester, current_status="REOPENED")
+
+        def titles(query):
+            resp = self.client.get(f"/api/tickets/?{query}")
+            self.assertEqual(resp.status_code, status.HTTP_200_OK)
+            return sorted(item["title"] for item in resp.data["results"])
+
+        self.assertEqual(titles("assignee=me&current_status=OPEN"), ["mine open"])
+        self.assertEqual(titles("current_status=OPEN,REOPENED"), ["mine open", "old"])
+        self.assertEqual(titles("severity=CRITICAL"), ["mine open"])
+        self.assertEqual(titles(f"submitter={self.tester.id}&assignee={self.dev.id}"), ["mine closed", "mine open"])
+        since = (now - timezone.timedelta(days=1)).date().isoformat()
+        self.assertEqual(titles(f"discovered_before={since}"), ["old"])
+
+        resp = self.client.get("/api/tickets/?ordering=discovered_at")
+        self.assertEqual(resp.data["results"][0]["title"], "old")
+
+        resp = self.client.get("/api/tickets/?assignee=not-a-uuid")
+        self.assertEqual(resp.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_my_queue_query_uses_composite_index(self):
+        """
+        the "my queue" filter is answered from (assignee, current_status, updated_at)
+        """
+        qs = Ticket.objects.filter(assignee=self.dev, current_status="OPEN").order_by("-updated_at")
+        self.assertIn("ticket_assignee_status_idx", qs.explain())
+
+    def test_search_ranks_tickets_across_history(self):
+        """
+        /api/tickets/search/ matches titles, descriptions and report bodies, ranked by weight
+        """
+        self.client.force_authenticate(user=self.tester)
+        in_title = Ticket.objects.create(title="Captcha crash on login", discovered_at=timezone.now(),
+                                         submitter=self.tester)
+        in_report = Ticket.objects.create(title="Login page blank", discovered_at=timezone.now(),
+                                          submitter=self.tester)
+        DevReport.objects.create(ticket=in_report, root_cause="captcha service timed out")
+        Ticket.objects.create(title="验证码不显示", description="登录页面", discovered_at=timezone.now(),
+                              submitter=self.tester)
+
+        resp = self.client.get("/api/tickets/search/?q=captcha")
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertEqual(resp.data["count"], 2)
+        self.assertEqual([item["id"] for item in resp.data["results"]], [str(in_title.id), str(in_report.id)])
+
+        resp = self.client.get("/api/tickets/search/?q=captcha login")
+        self.assertEqual(resp.data["count"], 2)
+        resp = self.client.get("/api/tickets/search/?q=captcha timed")
+        self.assertEqual([item["title"] for item in resp.data["results"]], ["Login page blank"])
+        resp = self.client.get("/api/tickets/search/?q=验证码")
+        self.assertEqual([item["title"] for item in resp.data["results"]], ["验证码不显示"])
+
+        # tokens differing only by accent are distinct rows (binary collation on MySQL)
+        accented = Ticket.objects.create(title="Resume résumé", discovered_at=timezone.now(), submitter=self.tester)
+        self.assertEqual(sorted(accented.search_tokens.values_list("token", flat=True)), ["resume", "résumé"])
+        resp = self.client.get("/api/tickets/search/?q=résumé")
+        self.assertEqual([item["title"] for item in resp.data["results"]], ["Resume résumé"])
+
+        # a new report is added incrementally and matches a full rebuild of the ticket
+        DevReport.objects.create(ticket=in_report, root_cause="captcha captcha", self_test_report="login ok")
+        tokens = lambda: sorted(in_report.search_tokens.values_list("token", "weight"))
+        incremental = tokens()
+        search.get_search_backend().index_ticket(in_report.pk)
+        self.assertEqual(incremental, tokens())
+        self.assertIn(("captcha", 3), incremental)
+
+        # saves that leave the indexed fields alone do not reindex
+        with mock.patch.object(search.TokenIndexBackend, "index_tickets") as index_tickets:
+            in_title.severity = "CRITICAL"
+            in_title.save()
+            Ticket.objects.get(pk=in_title.pk).save(update_fields=["severity"])
+            Ticket.objects.get(pk=in_title.pk).save()
+        index_tickets.assert_not_called()
+
+        # updates and deletions keep the index current
+        in_title.title = "Crash on login"
+        in_title.save()
+        with self.captureOnCommitCallbacks(execute=True):
+            DevReport.objects.filter(ticket=in_report).delete()
+        resp = self.client.get("/api/tickets/search/?q=captcha")
+        self.assertEqual(resp.data["count"], 0)
+
+        self.assertEqual(self.client.get("/api/tickets/search/").status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_ticket_detail_is_cached_until_history_changes(self):
+        """
+        the second retrieve is served from cache; a dev report invalidates it
+        """
+        from . import cache as ticket_cache
+
+        ticket = self._create_ticket_with_history("cached")
+        self.client.force_authenticate(user=self.dev)
+        ticket_cache.reset_stats()
+
+        first = self.client.get(f"/api/tickets/{ticket.id}/")
+        with self.assertNumQueries(1):
+            second = self.client.get(f"/api/tickets/{ticket.id}/")
+        self.assertEqual(first.data, second.data)
+        self.assertEqual(ticket_cache.stats(), {"hits": 1, "misses": 1})
+
+        self.client.post(f"/api/tickets/{ticket.id}/dev-report/", {"root_cause": "fixed"}, format="json")
+        with self.assertNumQueries(1):
+            resp = self.client.get(f"/api/tickets/{ticket.id}/")
+        self.assertEqual(resp.data["current_status"], "UNDER_REVIEW")
+        self.assertEqual(resp.data["dev_reports"][0]["root_cause"], "fixed")
+
+        # saving a report outside the workflow actions also invalidates
+        report = DevReport.objects.filter(ticket=ticket).latest("created_at")
+        report.root_cause = "edited in admin"
+        report.save()
+        resp = self.client.get(f"/api/tickets/{ticket.id}/")
+        self.assertEqual(resp.data["dev_reports"][0]["root_cause"], "edited in admin")
+
+    def test_cached_tickets_follow_changes_to_nested_users(self):
+        """
+        renaming a user invalidates cached detail and list payloads and their ETags; login bookkeeping does not
+        """
+        from . import cache as ticket_cache
+
+        ticket = self._create_ticket_with_history("renamed")
+        self.client.force_authenticate(user=self.tester)
+        detail = self.client.get(f"/api/tickets/{ticket.id}/")
+        listing = self.client.get("/api/tickets/")
+
+        self.dev.full_name = "Renamed Dev"
+        self.dev.save()
+        resp = self.client.get(f"/api/tickets/{ticket.id}/", HTTP_IF_NONE_MATCH=detail["ETag"])
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertEqual(resp.data["assignee"]["fullName"], "Renamed Dev")
+        self.assertEqual(resp.data["dev_reports"][0]["assignedDeveloper"]["fullName"], "Renamed Dev")
+        resp = self.client.get("/api/tickets/", HTTP_IF_NONE_MATCH=listing["ETag"])
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertEqual(resp.data["results"][0]["assignee"]["fullName"], "Renamed Dev")
+
+        generation = ticket_cache.users_generation()
+        self.dev.last_login = timezone.now()
+        self.dev.save(update_fields=["last_login"])
+        self.assertEqual(ticket_cache.users_generation(), generation)
+
+    def test_conditional_get_returns_not_modified(self):
+        """
+        ETag / Last-Modified on list and detail; unchanged resources answer 304 with one query
+        """
+        ticket = self._create_ticket_with_history("polled")
+        self.client.force_authenticate(user=self.tester)
+
+        for url in (f"/api/tickets/{ticket.id}/", "/api/tickets/"):
+            resp = self.client.get(url)
+            self.assertEqual(resp.status_code, status.HTTP_200_OK)
+            etag = resp["ETag"]
+            self.assertIn("Last-Modified", resp)
+
+            with self.assertNumQueries(1):
+                resp = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(resp.status_code, status.HTTP_304_NOT_MODIFIED)
+            self.assertEqual(resp["ETag"], etag)
+
+            ticket.title = f"{ticket.title}!"
+            ticket.save()
+            resp = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(resp.status_code, status.HTTP_200_OK)
+            self.assertNotEqual(resp["ETag"], etag)
+
+        # a deletion changes the list ETag even though max(updated_at) does not move
+        older = Ticket.objects.create(title="older", discovered_at=timezone.now(), submitter=self.tester)
+        ticket.save()
+        etag = self.client.get("/api/tickets/")["ETag"]
+        older.delete()
+        self.assertEqual(self.client.get("/api/tickets/", HTTP_IF_NONE_MATCH=etag).status_code,
+                         status.HTTP_200_OK)
+
+        self.assertEqual(self.client.get("/api/tickets/not-a-uuid/").status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_full_workflow_and_illegal_transition(self):
+        """
+        dev-report -> qa-review -> regression closes the ticket; out-of-order steps get 409
+        """
+        ticket = Ticket.objects.create(title="cycle", discovered_at=timezone.now(),
+                                       submitter=self.tester, assignee=self.dev)
+
+        self.client.force_authenticate(user=self.qa)
+        resp = self.client.post(f"/api/tickets/{ticket.id}/qa-review/", {"agree_to_release": True}, format="json")
+        self.assertEqual(resp.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(QAReview.objects.count(), 0)
+
+        self.client.force_authenticate(user=self.dev)
+        self.client.post(f"/api/tickets/{ticket.id}/dev-report/", {"root_cause": "npe"}, format="json")
+        self.client.force_authenticate(user=self.qa)
+        resp = self.client.post(f"/api/tickets/{ticket.id}/qa-review/", {"agree_to_release": True}, format="json")
+        self.assertEqual(resp.data["current_status"], "IN_REGRESSION")
+        self.assertEqual(resp.data["regressor"]["username"], "tester1")
+        self.client.force_authenticate(user=self.tester)
+        resp = self.client.post(f"/api/tickets/{ticket.id}/regression/", {"passed": True}, format="json")
+        self.assertEqual(resp.data["current_status"], "CLOSED")
+
+        ticket.refresh_from_db()
+        self.assertEqual(ticket.version, 3)
+
+    def test_edit_cannot_change_status_or_clobber_a_transition(self):
+        """
+        PATCH rejects current_status; editing other fields keeps a concurrent transition's status and version
+        """
+        ticket = Ticket.objects.create(title="edit", discovered_at=timezone.now(),
+                                       submitter=self.tester, assignee=self.dev)
+        self.client.force_authenticate(user=self.tester)
+        resp = self.client.patch(f"/api/tickets/{ticket.id}/", {"current_status": "CLOSED"}, format="json")
+        self.assertEqual(resp.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("current_status", resp.data)
+        ticket.refresh_from_db()
+        self.assertEqual((ticket.current_status, ticket.version), ("OPEN", 0))
+
+        stale = Ticket.objects.get(pk=ticket.pk)
+        workflow.transition(ticket, "UNDER_REVIEW")
+        serializer = TicketSerializer(stale, data={"title": "renamed"}, partial=True)
+        serializer.is_valid(raise_exception=True)
+        serializer.save()
+        ticket.refresh_from_db()
+        self.assertEqual((ticket.title, ticket.current_status, ticket.version), ("renamed", "UNDER_REVIEW", 1))
+
+    def test_bulk_create_reports_errors_per_item(self):
+        """
+        /api/tickets/bulk/ resolves assignees with one query and inserts valid items in one batch
+        """
+        self.client.force_authenticate(user=self.tester)
+        now = timezone.now().isoformat()
+        items = [{"title": f"harness bug {i}", "discovered_at": now, "assignee": str(self.dev.id)}
+                 for i in range(20)]
+        items.append({"title": "", "discovered_at": now, "assignee": str(self.dev.id)})
+        items.append({"title": "ghost", "discovered_at": now, "assignee": "00000000-0000-0000-0000-000000000000"})
+
+        # constant regardless of batch size: users IN, one INSERT, batched search indexing, savepoints,
+        # status events, stats counters (one INSERT IGNORE + one UPDATE per dimension)
+        with self.assertNumQueries(19):
+            resp = self.client.post("/api/tickets/bulk/", items, format="json")
+        self.assertEqual(resp.status_code, status.HTTP_207_MULTI_STATUS)
+        self.assertEqual((resp.data["created"], resp.data["failed"]), (20, 2))
+        self.assertEqual(resp.data["results"][20]["status"], 400)
+        self.assertIn("title", resp.data["results"][20]["errors"])
+        self.assertIn("assignee", resp.data["results"][21]["errors"])
+        self.assertEqual(Ticket.objects.filter(assignee=self.dev, submitter=self.tester).count(), 20)
+
+        resp = self.client.get("/api/tickets/search/?q=harness")
+        self.assertEqual(resp.data["count"], 20)
+
+    def test_bulk_qa_review(self):
+        """
+        QA triages several tickets at once; each item gets its own status
+        """
+        ready = [
+            Ticket.objects.create(title=f"ready {i}", discovered_at=timezone.now(), submitter=self.tester,
+                                  current_status="UNDER_REVIEW")
+            for i in range(3)
+        ]
+        fresh = Ticket.objects.create(title="fresh", discovered_at=timezone.now(), submitter=self.tester)
+        items = [
+            {"id": str(ready[0].id), "agree_to_release": True, "designated_tester": str(self.tester.id)},
+            {"id": str(ready[1].id), "agree_to_release": False, "comment": "needs work"},
+            {"id": str(ready[2].id)},
+            {"id": str(fresh.id), "agree_to_release": True},
+            {"id": "missing", "agree_to_release": True},
+        ]
+
+        self.client.force_authenticate(user=self.dev)
+        resp = self.client.post("/api/tickets/bulk-qa-review/", {"items": items}, format="json")
+        self.assertEqual(resp.status_code, status.HTTP_403_FORBIDDEN)
+
+        self.client.force_authenticate(user=self.qa)
+        resp = self.client.post("/api/tickets/bulk-qa-review/", {"items": items}, format="json")
+        self.assertEqual(resp.status_code, status.HTTP_207_MULTI_STATUS)
+        self.assertEqual([r["status"] for r in resp.data["results"]], [200, 200, 400, 409, 404])
+        self.assertEqual(
+            list(Ticket.objects.filter(pk__in=[t.id for t in ready]).order_by("title")
+                 .values_list("current_status", flat=True)),
+            ["IN_REGRESSION", "IN_MODIFICATION", "UNDER_REVIEW"],
+        )
+        self.assertEqual(QAReview.objects.count(), 2)
+
+    def test_streaming_export_loads_history_per_batch(self):
+        """
+        export streams keyset-paged batches; each batch costs one ticket query plus three history prefetches
+        """
+        for i in range(5):
+            self._create_ticket_with_history(f"export {i}")
+
+        with self.assertNumQueries(3 * 4):
+            chunks = list(export.stream("ndjson", batch_size=2))
+        rows = [json.loads(line) for line in "".join(chunks).splitlines()]
+        self.assertEqual([row["title"] for row in rows], [f"export {i}" for i in range(5)])
+        self.assertEqual(rows[0]["assignee"], "dev1")
+        self.assertEqual(rows[0]["dev_reports"][0]["root_cause"], "npe")
+        self.assertEqual(rows[0]["qa_reviews"][0]["designated_tester"], "tester1")
+
+        self.client.force_authenticate(user=self.tester)
+        resp = self.client.get("/api/tickets/export/?output=csv&current_status=OPEN")
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertTrue(resp.streaming)
+        reader = list(csv.DictReader(io.StringIO(b"".join(resp.streaming_content).decode())))
+        self.assertEqual(len(reader), 5)
+        self.assertTrue(json.loads(reader[0]["regression_tests"])[0]["passed"])
+        self.assertEqual(self.client.get("/api/tickets/export/?output=xml").status_code, 400)
+
+        out = io.StringIO()
+        call_command("export_tickets", "--batch-size", "3", stdout=out)
+        self.assertEqual(len(out.getvalue().splitlines()), 5)
+
+    def test_import_round_trips_export_and_resumes_from_checkpoint(self):
+        """
+        import_tickets reads the export format, maps users by username/email and resumes after a failed batch
+        """
+        for i in range(4):
+            self._create_ticket_with_history(f"legacy {i}")
+        self.qa.email = "QA@Example.com"
+        self.qa.save()
+        dump = "".join(export.stream("ndjson"))
+        rows = [json.loads(line) for line in dump.splitlines()]
+        rows[0]["qa_reviews"][0]["release_qa"] = "qa@example.com"
+        rows[1]["submitter"] = "nobody"
+        created_at = Ticket.objects.get(pk=rows[0]["id"]).created_at
+        Ticket.objects.all().delete()
+
+        path = f"{tempfile.mkdtemp()}/legacy.ndjson"
+        self.addCleanup(shutil.rmtree, os.path.dirname(path), ignore_errors=True)
+        with open(path, "w") as fh:
+            fh.write("\n".join(json.dumps(row) for row in rows) + "\n")
+
+        # 第二批写入时失败：第一批已提交，断点停在第 2 行
+        original = importer.TicketImporter.write
+        calls = []
+
+        def flaky_write(runner, batch, checkpoint, position):
+            calls.append(position)
+            if len(calls) == 2:
+                raise RuntimeError("connection lost")
+            return original(runner, batch, checkpoint, position)
+
+        err = io.StringIO()
+        with mock.patch.object(importer.TicketImporter, "write", flaky_write):
+            with self.assertRaises(RuntimeError):
+                call_command("import_tickets", path, "--batch-size", "2", stdout=io.StringIO(), stderr=err)
+        self.assertEqual(Ticket.objects.count(), 1)
+        self.assertEqual(ImportCheckpoint.objects.get(name="legacy.ndjson").position, 2)
+
+        out = io.StringIO()
+        call_command("import_tickets", path, "--batch-size", "2", stdout=out, stderr=err)
+        self.assertIn("Imported 2 tickets (0 rows skipped)", out.getvalue())
+        self.assertIn("tickets/s", err.getvalue())
+        self.assertEqual(Ticket.objects.count(), 3)
+        self.assertEqual(ImportCheckpoint.objects.get(name="legacy.ndjson").position, 4)
+
+        ticket = Ticket.objects.get(pk=rows[0]["id"])
+        self.assertEqual(ticket.created_at, created_at)
+        self.assertEqual(ticket.assignee, self.dev)
+        self.assertEqual(ticket.qa_reviews.get().release_qa, self.qa)
+        self.assertEqual(ticket.current_status, "OPEN")
+        self.assertEqual(list(ticket.status_events.order_by("at", "id").values_list("to_status", flat=True)),
+                         ["OPEN", "UNDER_REVIEW", "IN_MODIFICATION", "CLOSED", "OPEN"])
+        self.client.force_authenticate(user=self.tester)
+        self.assertEqual(self.client.get("/api/stats/").data["total"], 3)
+
+        # a completed checkpoint is not replayed
+        self.assertIsNotNone(ImportCheckpoint.objects.get(name="legacy.ndjson").completed_at)
+        with self.assertRaisesMessage(CommandError, "already imported"):
+            call_command("import_tickets", path, stdout=io.StringIO(), stderr=io.StringIO())
+
+        # 从断点重新导入：提交人无法匹配的行改用 --default-submitter
+        ImportCheckpoint.objects.filter(name="legacy.ndjson").update(position=1, completed_at=None)
+        Ticket.objects.exclude(pk=rows[0]["id"]).delete()
+        out = io.StringIO()
+        call_command("import_tickets", path, "--default-submitter", "tester1", stdout=out, stderr=io.StringIO())
+        self.assertIn("Imported 3 tickets", out.getvalue())
+        self.assertEqual(Ticket.objects.get(pk=rows[1]["id"]).submitter, self.tester)
+
+        # a different file with the same name does not resume the old checkpoint
+        ImportCheckpoint.objects.filter(name="legacy.ndjson").update(position=1, completed_at=None)
+        Ticket.objects.all().delete()
+        other = f"{tempfile.mkdtemp()}/legacy.ndjson"
+        self.addCleanup(shutil.rmtree, os.path.dirname(other), ignore_errors=True)
+        with open(other, "w") as fh:
+            fh.write(json.dumps(rows[2]) + "\n")
+        with self.assertRaisesMessage(CommandError, "different file"):
+            call_command("import_tickets", other, stdout=io.StringIO(), stderr=io.StringIO())
+        out = io.StringIO()
+        call_command("import_tickets", other, "--restart", stdout=out, stderr=io.StringIO())
+        self.assertIn("Imported 1 tickets", out.getvalue())
+        self.assertTrue(Ticket.objects.filter(pk=rows[2]["id"]).exists())
+
+    def test_import_validates_urls_and_writes_timestamps_once(self):
+        created_at = "2020-01-02T03:04:05+00:00"
+        rows = [
+            {"title": "bad url", "submitter": "tester1",
+             "dev_reports": [{"root_cause": "npe", "github_pr_url": "https://example.com/" + "x" * 200}]},
+            {"title": "old", "submitter": "tester1", "created_at": created_at, "updated_at": created_at,
+             "dev_reports": [{"root_cause": "npe", "created_at": created_at,
+                              "github_pr_url": "https://github.com/org/repo/pull/1"}]},
+        ]
+        with CaptureQueriesContext(connection) as queries:
+            imported, errors = importer.TicketImporter().run(rows, "urls")
+        self.assertEqual(imported, 1)
+        self.assertEqual([line for line, _ in errors], [1])
+        self.assertIn("github_pr_url", errors[0][1])
+        ticket = Ticket.objects.get(title="old")
+        self.assertEqual((ticket.created_at.year, ticket.updated_at.year, ticket.dev_reports.get().created_at.year),
+                         (2020, 2020, 2020))
+        self.assertFalse([q for q in queries if q["sql"].startswith('UPDATE "tickets_ticket"')
+                          or q["sql"].startswith('UPDATE "tickets_devreport"')])
+        # regular saves keep their automatic timestamps
+        ticket.save()
+        self.assertEqual(Ticket.objects.get(pk=ticket.pk).updated_at.year, timezone.now().year)
+        self.assertTrue(Ticket._meta.get_field("updated_at").auto_now)
+
+    def test_import_reports_duplicate_ids_per_row(self):
+        existing = Ticket.objects.create(title="existing", discovered_at=timezone.now(), submitter=self.tester)
+        new_id = str(uuid.uuid4())
+        rows = [
+            {"id": str(existing.id), "title": "clash", "submitter": "tester1"},
+            {"id": new_id, "title": "first", "submitter": "tester1"},
+            {"id": new_id, "title": "repeat", "submitter": "tester1"},
+            {"title": "fresh", "submitter": "tester1"},
+        ]
+        imported, errors = importer.TicketImporter().run(rows, "duplicates")
+        self.assertEqual(imported, 2)
+        self.assertEqual(errors, [(1, f'duplicate id "{existing.id}"'), (3, f'duplicate id "{new_id}"')])
+        self.assertEqual(Ticket.objects.get(pk=new_id).title, "first")
+        self.assertEqual(Ticket.objects.get(pk=existing.pk).title, "existing")
+
+    def test_stats_follow_workflow_and_match_rebuild(self):
+        """
+        /api/stats/ reads pre-aggregated counters kept up to date by create/transition/update/delete
+        """
+        self.client.force_authenticate(user=self.tester)
+        now = timezone.now().isoformat()
+        resp = self.client.post("/api/tickets/bulk/", [
+            {"title": f"stat {i}", "discovered_at": now, "module": "core", "severity": "SEVERE",
+             "assignee": str(self.dev.id)} for i in range(3)
+        ], format="json")
+        ids = [item["id"] for item in resp.data["results"]]
+        self.client.post("/api/tickets/", {"title": "other", "discovered_at": now}, format="json")
+
+        self.client.force_authenticate(user=self.dev)
+        self.client.post(f"/api/tickets/{ids[0]}/dev-report/", {"root_cause": "npe"}, format="json")
+        self.client.force_authenticate(user=self.qa)
+        self.client.post(f"/api/tickets/{ids[0]}/qa-review/", {"agree_to_release": False}, format="json")
+        self.client.patch(f"/api/tickets/{ids[1]}/", {"severity": "CRITICAL"}, format="json")
+        self.client.delete(f"/api/tickets/{ids[2]}/")
+
+        with self.assertNumQueries(2):
+            resp = self.client.get("/api/stats/")
+        self.assertEqual(resp.data["total"], 3)
+        self.assertEqual(resp.data["by_status"], {"OPEN": 2, "IN_MODIFICATION": 1})
+        self.assertEqual(resp.data["by_severity"], {"SEVERE": 1, "CRITICAL": 1, "NORMAL": 1})
+        self.assertEqual(resp.data["by_module"], {"core": 2, "": 1})
+        self.assertEqual(resp.data["by_assignee"], {str(self.dev.id): 2, "": 1})
+        self.assertEqual(sum(resp.data["by_week"].values()), 3)
+        self.assertEqual(set(resp.data["mean_seconds_in_status"]), {"OPEN", "UNDER_REVIEW"})
+
+        call_command("rebuild_ticket_stats", stdout=io.StringIO())
+        rebuilt = self.client.get("/api/stats/").data
+        self.assertEqual({k: v for k, v in rebuilt.items() if k != "mean_seconds_in_status"},
+                         {k: v for k, v in resp.data.items() if k != "mean_seconds_in_status"})
+        self.assertEqual(set(rebuilt["mean_seconds_in_status"]), {"OPEN", "UNDER_REVIEW"})
+
+    def test_import_feeds_mean_time_in_status(self):
+        rows = [
+            {"title": f"imported {i}", "submitter": "tester1", "created_at": "2020-01-01T00:00:00+00:00",
+             "current_status": "IN_REGRESSION",
+             "dev_reports": [{"root_cause": "npe", "created_at": f"2020-01-0{i + 2}T00:00:00+00:00"}],
+             "qa_reviews": [{"agree_to_release": True, "created_at": "2020-01-05T00:00:00+00:00"}]}
+            for i in range(2)
+        ]
+        importer.TicketImporter().run(rows, "durations")
+        durations = lambda: dict(StatusDurationStat.objects.values_list("status", "samples"))
+        imported = stats.snapshot()["mean_seconds_in_status"]
+        samples = durations()
+        self.assertEqual(samples, {"OPEN": 2, "UNDER_REVIEW": 2})
+        self.assertEqual(imported["OPEN"], 1.5 * 86400)
+
+        stats.rebuild()
+        self.assertEqual(stats.snapshot()["mean_seconds_in_status"], imported)
+        self.assertEqual(durations(), samples)
+
+    def test_status_event_log_and_cycle_time_percentiles(self):
+        """
+        every transition appends a TicketStatusEvent; percentile endpoints stream over the log
+        """
+        self.client.force_authenticate(user=self.tester)
+        ticket_id = self.client.post("/api/tickets/", {"title": "cycle", "discovered_at": timezone.now().isoformat(),
+                                                       "assignee": str(self.dev.id)}, format="json").data["id"]
+        self.client.force_authenticate(user=self.dev)
+        self.client.post(f"/api/tickets/{ticket_id}/dev-report/", {"root_cause": "npe"}, format="json")
+        self.client.force_authenticate(user=self.qa)
+        self.client.post(f"/api/tickets/{ticket_id}/qa-review/",
+                         {"agree_to_release": True, "designated_tester": str(self.tester.id)}, format="json")
+        self.client.force_authenticate(user=self.tester)
+        self.client.post(f"/api/tickets/{ticket_id}/regression/", {"passed": True}, format="json")
+
+        events = list(TicketStatusEvent.objects.filter(ticket_id=ticket_id).order_by("at", "id")
+                      .values_list("from_status", "to_status"))
+        self.assertEqual(events, [("", "OPEN"), ("OPEN", "UNDER_REVIEW"), ("UNDER_REVIEW", "IN_REGRESSION"),
+                                  ("IN_REGRESSION", "CLOSED")])
+
+        resp = self.client.get("/api/stats/time-in-status/?percentiles=50,95")
+        self.assertEqual(set(resp.data), {"OPEN", "UNDER_REVIEW", "IN_REGRESSION"})
+        self.assertEqual(resp.data["OPEN"]["count"], 1)
+        self.assertIn("p95", resp.data["OPEN"])
+
+        resp = self.client.get("/api/stats/time-in-status/?include_open=1&status=CLOSED")
+        self.assertEqual(list(resp.data), ["CLOSED"])
+
+        # keyset pages of one event read the same intervals as a single page
+        full = self.client.get("/api/stats/time-in-status/").data
+        with mock.patch.object(analytics, "CHUNK_SIZE", 1):
+            self.assertEqual(self.client.get("/api/stats/time-in-status/").data, full)
+
+        resp = self.client.get("/api/stats/lead-time/")
+        self.assertEqual(resp.data["count"], 1)
+        self.assertGreaterEqual(resp.data["p50"], 0)
+        self.assertEqual(self.client.get("/api/stats/lead-time/?percentiles=x").status_code, 400)
+        self.assertEqual(self.client.get("/api/stats/lead-time/?after=2999-01-01").data["count"], 0)
+
+    def test_lead_time_reads_only_tickets_closed_in_the_window(self):
+        """
+        lead_time counts the first close inside [since, until) and only reads events of tickets closed there
+        """
+        start = timezone.now() - timezone.timedelta(days=30)
+        since, until = start + timezone.timedelta(days=10), start + timezone.timedelta(days=20)
+
+        def ticket(*transitions):
+            ticket = Ticket.objects.create(title="lead", discovered_at=start, submitter=self.tester)
+            TicketStatusEvent.objects.filter(ticket=ticket).update(at=start)
+            for days, to_status in transitions:
+                analytics.record(ticket.pk, "", to_status, start + timezone.timedelta(days=days))
+            return ticket
+
+        ticket((12, "CLOSED"), (15, "UNDER_REVIEW"), (25, "CLOSED"))
+        ticket((5, "CLOSED"), (11, "UNDER_REVIEW"), (13, "CLOSED"))  # first close precedes the window
+        ticket((22, "CLOSED"))
+        ticket((3, "UNDER_REVIEW"))
+
+        # one page of ticket ids in the window, one page of their events
+        with self.assertNumQueries(2):
+            sketch = analytics.lead_time(since, until)
+        self.assertEqual(sketch.count, 1)
+        self.assertEqual(sketch.max, timezone.timedelta(days=12).total_seconds())
+        with mock.patch.object(analytics, "CHUNK_SIZE", 1):
+            self.assertEqual(analytics.lead_time(since, until).count, 1)
+        self.assertEqual(analytics.lead_time().count, 3)
+
+
+class TicketWorkflowConcurrencyTests(TransactionTestCase):
+    def test_concurrent_dev_reports_apply_exactly_once(self):
+        """
+        many threads submit a dev report for the same ticket: one wins, the rest get 409
+        """
+        if connection.vendor == "sqlite" and connection.is_in_memory_db():
+            # Worker threads share SQLite's in-memory test database and lock each other out ("table is locked")
+            self.skipTest("needs a file-based test database (DATABASES TEST NAME) or a server database")
+        dev = User.objects.create_user(username="dev1", password="password123", role="DEVELOPER")
+        tester = User.objects.create_user(username="tester1", password="password123", role="TESTER")
+        ticket = Ticket.objects.create(title="race", discovered_at=timezone.now(), submitter=tester, assignee=dev)
+
+        workers = 8
+        barrier = threading.Barrier(workers)
+        codes = []
+
+        def submit():
+            client = APIClient()
+            client.force_authenticate(user=dev)
+            try:
+                barrier.wait()
+                resp = client.post(f"/api/tickets/{ticket.id}/dev-report/", {"root_cause": "race"}, format="json")
+                codes.append(resp.status_code)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=submit) for _ in range(workers)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(sorted(codes), [200] + [409] * (workers - 1))
+        self.assertEqual(DevReport.objects.filter(ticket=ticket).count(), 1)
+        ticket.refresh_from_db()
+        self.assertEqual((ticket.current_status, ticket.version), ("UNDER_REVIEW", 1))
+
+
+class CachedUserAuthenticationTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.dev = User.objects.create_user(username="dev1", password="password123", role="DEVELOPER")
+
+    def _login(self):
+        resp = self.client.post("/api/login/", {"username": "dev1", "password": "password123"}, format="json")
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {resp.data['token']}")
+
+    def test_authenticated_reads_do_not_query_users(self):
+        """
+        the user snapshot cached at login is reused: a list costs only the freshness check and the page query
+        """
+        self._login()
+        with self.assertNumQueries(2):
+            resp = self.client.get("/api/tickets/")
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+
+    def test_changed_user_falls_back_to_cached_lookup(self):
+        """
+        after a role change or deactivation, older tokens are checked against the database
+        """
+        self._login()
+        self.dev.role = "QA"
+        self.dev.save()
+
+        with self.assertNumQueries(3):
+            self.client.get("/api/tickets/")
+        with self.assertNumQueries(2):
+            self.client.get("/api/tickets/")
+        ticket = Ticket.objects.create(title="t", discovered_at=timezone.now(), submitter=self.dev,
+                                       current_status="UNDER_REVIEW")
+        resp = self.client.post(f"/api/tickets/{ticket.id}/qa-review/", {"agree_to_release": False}, format="json")
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertEqual(QAReview.objects.get().release_qa, self.dev)
+
+        self.dev.is_active = False
+        self.dev.save()
+        resp = self.client.get("/api/tickets/")
+        self.assertEqual(resp.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_revocation_is_enforced_from_the_database(self):
+        """
+        a lost cache (restart, other worker, eviction) falls back to the database, never to the token claims
+        """
+        from django.core.cache import cache
+
+        self._login()
+        User.objects.filter(pk=self.dev.pk).update(role="TESTER")
+        cache.clear()
+        ticket = Ticket.objects.create(title="t", discovered_at=timezone.now(), submitter=self.dev, assignee=self.dev)
+        resp = self.client.post(f"/api/tickets/{ticket.id}/dev-report/", {"root_cause": "npe"}, format="json")
+        self.assertEqual(resp.status_code, status.HTTP_403_FORBIDDEN)
+
+        # password change bumps auth_version: the old token stays revoked even after the cache is gone
+        self.dev.refresh_from_db()
+        self.dev.set_password("new-password")
+        self.dev.save(update_fields=["password"])
+        self.assertEqual(User.objects.get(pk=self.dev.pk).auth_version, 1)
+        cache.clear()
+        self.assertEqual(self.client.get("/api/tickets/").status_code, status.HTTP_401_UNAUTHORIZED)
+
+        User.objects.filter(pk=self.dev.pk).delete()
+        cache.clear()
+        self.assertEqual(self.client.get("/api/tickets/").status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_authenticated_user_cannot_be_written_back(self):
+        """
+        request.user is a partial snapshot; saving it would blank the real row
+        """
+        from .authentication import CachedUserJWTAuthentication, check_shared_user_cache
+
+        token = CustomTokenObtainPairSerializer.get_token(self.dev).access_token
+        user = CachedUserJWTAuthentication().get_user(token)
+        self.assertEqual((user, user.role), (self.dev, "DEVELOPER"))
+        with self.assertRaises(NotImplementedError):
+            user.save()
+        with self.assertRaises(NotImplementedError):
+            user.delete()
+        self.assertTrue(User.objects.get(pk=self.dev.pk).check_password("password123"))
+
+        self.assertEqual([w.id for w in check_shared_user_cache(None)], ["tickets.W001"])
+        with override_settings(CACHES={"default": {"BACKEND": "django.core.cache.backends.dummy.DummyCache"}}):
+            self.assertEqual(check_shared_user_cache(None), [])
+
+    def test_login_by_email_is_case_insensitive_single_query(self):
+        """
+        email login resolves the user with one indexed query and emails are unique ignoring case
+        """
+        self.dev.email = "Dev1@Example.com"
+        self.dev.save()
+
+        with self.assertNumQueries(1):
+            resp = self.client.post("/api/login/", {"username": "dev1@example.COM", "password": "password123"},
+                                    format="json")
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertEqual(resp.data["user"]["username"], "dev1")
+
+        resp = self.client.post("/api/login/", {"username": "dev1@example.com", "password": "wrong"}, format="json")
+        self.assertEqual(resp.status_code, status.HTTP_401_UNAUTHORIZED)
+
+        resp = self.client.post("/api/users/", {"username": "dev2", "password": "password123",
+                                                "email": "DEV1@example.com"}, format="json")
+        self.assertEqual(resp.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(User.objects.create_user(username="noemail", password="x").email, None)
+
+    def test_login_is_throttled(self):
+        """
+        repeated login attempts from one client get 429
+        """
+        from django.core.cache import cache
+        from rest_framework.throttling import ScopedRateThrottle
+
+        cache.clear()
+        with mock.patch.object(ScopedRateThrottle, "THROTTLE_RATES", {"login": "3/min"}):
+            codes = [
+                self.client.post("/api/login/", {"username": "dev1", "password": "wrong"}, format="json").status_code
+                for _ in range(4)
+            ]
+        self.assertEqual(codes, [401, 401, 401, 429])
+
+
+class EmailConstraintMigrationTests(TransactionTestCase):
+    def test_case_insensitive_duplicates_abort_with_a_list(self):
+        from django.db.migrations.executor import MigrationExecutor
+
+        before, after = [("tickets", "0013_ticket_version")], [("tickets", "0014_user_email_ci_unique")]
+        executor = MigrationExecutor(connection)
+        executor.migrate(before)
+        OldUser = executor.loader.project_state(before).apps.get_model("tickets", "User")
+        OldUser.objects.create(username="alice", email="Alice@example.com")
+        OldUser.objects.create(username="alice2", email="alice@EXAMPLE.com")
+        OldUser.objects.create(username="bob", email="")
+        OldUser.objects.create(username="carol", email="")
+        try:
+            with self.assertRaisesMessage(RuntimeError, "alice@example.com: alice, alice2"):
+                MigrationExecutor(connection).migrate(after)
+            OldUser.objects.filter(username="alice2").update(email="alice2@example.com")
+            MigrationExecutor(connection).migrate(after)
+        finally:
+            executor = MigrationExecutor(connection)
+            executor.migrate(executor.loader.graph.leaf_nodes())
+        self.assertEqual(User.objects.filter(email=None).count(), 2)
+
+
+class StatusEventBackfillMigrationTests(TransactionTestCase):
+    def test_backfill_infers_events_from_history(self):
+        from django.db.migrations.executor import MigrationExecutor
+
+        before, after = [("tickets", "0016_ticket_stats")], [("tickets", "0017_ticketstatusevent")]
+        executor = MigrationExecutor(connection)
+        executor.migrate(before)
+        apps = executor.loader.project_state(before).apps
+        user = apps.get_model("tickets", "User").objects.create(username="legacy")
+        ticket = apps.get_model("tickets", "Ticket").objects.create(title="legacy", discovered_at=timezone.now(),
+                                                                   submitter=user, current_status="CLOSED")
+        apps.get_model("tickets", "DevReport").objects.create(ticket=ticket)
+        apps.get_model("tickets", "QAReview").objects.create(ticket=ticket, agree_to_release=True)
+        apps.get_model("tickets", "RegressionTest").objects.create(ticket=ticket, passed=True)
+        try:
+            executor = MigrationExecutor(connection)
+            executor.migrate(after)
+            Event = executor.loader.project_state(after).apps.get_model("tickets", "TicketStatusEvent")
+            events = list(Event.objects.filter(ticket_id=ticket.pk).order_by("at", "id")
+                          .values_list("from_status", "to_status"))
+        finally:
+            executor = MigrationExecutor(connection)
+            executor.migrate(executor.loader.graph.leaf_nodes())
+        self.assertEqual(events, [("", "OPEN"), ("OPEN", "UNDER_REVIEW"), ("UNDER_REVIEW", "IN_REGRESSION"),
+                                  ("IN_REGRESSION", "CLOSED")])
+
+
+class TicketStatsSeedMigrationTests(TransactionTestCase):
+    def test_existing_tickets_are_counted_before_the_first_transition(self):
+        from django.db.migrations.executor import MigrationExecutor
+
+        before = [("tickets", "0023_searchtoken_binary_collation")]
+        executor = MigrationExecutor(connection)
+        executor.migrate(before)
+        apps = executor.loader.project_state(before).apps
+        user = apps.get_model("tickets", "User").objects.create(username="legacy")
+        HistoricalTicket = apps.get_model("tickets", "Ticket")
+        legacy = [HistoricalTicket.objects.create(title=f"legacy {i}", discovered_at=timezone.now(), submitter=user)
+                  for i in range(2)]
+        apps.get_model("tickets", "TicketStatusEvent").objects.create(
+            ticket=legacy[0], from_status="", to_status="OPEN", at=timezone.now() - timezone.timedelta(hours=1))
+        executor = MigrationExecutor(connection)
+        executor.migrate(executor.loader.graph.leaf_nodes())
+
+        seeded = stats.snapshot()
+        self.assertEqual((seeded["total"], seeded["by_status"]), (2, {"OPEN": 2}))
+        workflow.transition(Ticket.objects.get(pk=legacy[0].pk), "UNDER_REVIEW")
+        self.assertFalse(TicketStat.objects.filter(count__lt=0).exists())
+        self.assertEqual(stats.snapshot()["by_status"], {"OPEN": 1, "UNDER_REVIEW": 1})
+        self.assertEqual(StatusDurationStat.objects.get(status="OPEN").samples, 1)
+
+
+class ConnectionPoolTests(SimpleTestCase):
+    class FakeConnection:
+        def __init__(self):
+            self.closed = False
+            self.rollbacks = 0
+
+        def rollback(self):
+            self.rollbacks += 1
+
+        def ping(self):
+            pass
+
+        def close(self):
+            self.closed = True
+
+    def test_released_connections_are_reused_and_bounded(self):
+        """
+        closing a pooled connection returns it for the next checkout instead of reconnecting
+        """
+        pool = ConnectionPool(max_size=1, max_idle=300, recycle=3600, ping_after=10)
+        first = pool.acquire(self.FakeConnection)
+        second = pool.acquire(self.FakeConnection)
+        pool.release(first)
+        pool.release(second)
+
+        self.assertTrue(second.closed)
+        self.assertIs(pool.acquire(self.FakeConnection), first)
+        self.assertEqual(first.rollbacks, 1)
+        self.assertEqual((pool.created, pool.reused), (2, 1))
+
+    def test_stale_connections_are_discarded(self):
+        pool = ConnectionPool(max_size=5, max_idle=0, recycle=3600, ping_after=10)
+        conn = pool.acquire(self.FakeConnection)
+        pool.release(conn)
+        time.sleep(0.01)
+        self.assertIsNot(pool.acquire(self.FakeConnection), conn)
+        self.assertTrue(conn.closed)
+
+
+class QuantileSketchTests(SimpleTestCase):
+    def test_quantiles_within_relative_accuracy(self):
+        sketch = QuantileSketch(accuracy=0.01)
+        values = [i * 1.5 for i in range(1, 10001)]
+        for value in reversed(values):
+            sketch.add(value)
+        for q in (0.5, 0.9, 0.99):
+            exact = values[int(q * (len(values) - 1))]
+            self.assertAlmostEqual(sketch.quantile(q), exact, delta=exact * 0.011)
+        self.assertEqual(sketch.summary((50,))["count"], 10000)
+        self.assertIsNone(QuantileSketch().quantile(0.5))
+
+
+@override_settings(DATABASE_REPLICAS=["replica_0"], DATABASE_REPLICA_STICKY_SECONDS=5,
+                   DATABASE_REPLICA_PIN_CACHE="pins")
+class ReplicaRoutingTests(SimpleTestCase):
+    def setUp(self):
+        pins = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, pins, ignore_errors=True)
+        override = override_settings(CACHES={
+            "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+            "pins": {"BACKEND": "django.core.cache.backends.filebased.FileBasedCache", "LOCATION": pins},
+        })
+        override.enable()
+        self.addCleanup(override.disable)
+        self.factory = RequestFactory()
+
+    def _route(self, method, auth="Bearer a", status_code=200):
+        seen = {}
+
+        def view(request):
+            seen["read"] = Ticket.objects.all().db
+            seen["locked"] = Ticket.objects.select_for_update().db
+            seen["write"] = router.db_for_write(Ticket)
+            return HttpResponse(status=status_code)
+
+        request = getattr(self.factory, method)("/api/tickets/", HTTP_AUTHORIZATION=auth)
+        ReplicaRoutingMiddleware(view)(request)
+        return seen
+
+    def test_safe_reads_use_replica_and_writes_use_primary(self):
+        seen = self._route("get")
+        self.assertEqual(seen, {"read": "replica_0", "locked": "default", "write": "default"})
+        self.assertEqual(self._route("post")["read"], "default")
+
+    def test_reads_stick_to_primary_after_own_write(self):
+        self._route("post", status_code=400)
+        self.assertEqual(self._route("get")["read"], "replica_0")
+
+        self._route("post")
+        self.assertEqual(self._route("get")["read"], "default")
+        self.assertEqual(self._route("get", auth="Bearer other")["read"], "replica_0")
+
+        with use_primary():
+            self.assertEqual(Ticket.objects.all().db, "default")
+
+    def test_pins_require_a_shared_cache(self):
+        """
+        A per-process cache would lose the read-your-writes pin whenever the next request hits another worker
+        """
+        with override_settings(DATABASE_REPLICA_PIN_CACHE="default"):
+            with self.assertRaisesMessage(ImproperlyConfigured, "DATABASE_REPLICA_PIN_CACHE"):
+                ReplicaRoutingMiddleware(lambda request: HttpResponse())
+            with override_settings(DATABASE_REPLICAS=[]):
+                ReplicaRoutingMiddleware(lambda request: HttpResponse())
+
+
+class PrimaryOnlyPathsTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="dev1", password="password123", role="DEVELOPER")
+        Ticket.objects.create(title="bug", discovered_at=timezone.now(), submitter=self.user)
+
+    def _reads(self, run):
+        """
+        Run with a replica configured; record where each read would be routed but execute it on the primary
+        """
+        seen = []
+        route = PrimaryReplicaRouter.db_for_read
+
+        def db_for_read(router, model, **hints):
+            seen.append((model, route(router, model, **hints)))
+            return "default"
+
+        with override_settings(DATABASE_REPLICAS=["replica_0"]), \
+                mock.patch.object(PrimaryReplicaRouter, "db_for_read", db_for_read):
+            result = run()
+        return result, seen
+
+    def assertReadsPrimary(self, seen, *models):
+        routed = {alias for model, alias in seen if model in models}
+        self.assertEqual(routed, {"default"})
+
+    def test_stats_rebuild_reads_the_primary(self):
+        (keys, _), seen = self._reads(stats.rebuild)
+        self.assertGreater(keys, 0)
+        self.assertReadsPrimary(seen, Ticket, TicketStatusEvent)
+
+    def test_thumbnail_job_reads_the_new_file_from_the_primary(self):
+        from PIL import Image
+        media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media, ignore_errors=True)
+        buffer = io.BytesIO()
+        Image.new("RGB", (400, 300), "blue").save(buffer, format="PNG")
+        with override_settings(MEDIA_ROOT=media):
+            stored = StoredFile(sha256="ab" * 32, size=len(buffer.getvalue()), content_type="image/png")
+            stored.file.save("shot.png", ContentFile(buffer.getvalue()))
+            _, seen = self._reads(lambda: uploads.generate_thumbnail(str(stored.pk)))
+            stored.refresh_from_db()
+        self.assertTrue(stored.thumbnail.name.endswith(".jpg"))
+        self.assertReadsPrimary(seen, StoredFile)
+
+    def test_search_indexing_reads_the_primary(self):
+        ticket = Ticket.objects.get()
+        _, seen = self._reads(lambda: search.get_search_backend().index_ticket(ticket.pk))
+        self.assertReadsPrimary(seen, Ticket, DevReport, QAReview, RegressionTest)
+
+    def test_streamed_export_keeps_the_request_pin(self):
+        def run():
+            with use_primary():
+                body = preserve_routing(export.stream("ndjson"))
+            return "".join(body)
+
+        body, seen = self._reads(run)
+        self.assertEqual(json.loads(body)["title"], "bug")
+        self.assertReadsPrimary(seen, Ticket, DevReport, QAReview, RegressionTest)
+
+
+class AsyncReadEndpointTests(TestCase):
+    def setUp(self):
+        self.dev = User.objects.create_user(username="dev1", password="password123", role="DEVELOPER")
+        self.tickets = [
+            Ticket.objects.create(title=f"bug {i}", discovered_at=timezone.now(), submitter=self.dev,
+                                  assignee=self.dev if i % 2 else None)
+            for i in range(5)
+        ]
+        DevReport.objects.create(ticket=self.tickets[0], assigned_developer=self.dev, root_cause="npe")
+        token = CustomTokenObtainPairSerializer.get_token(self.dev).access_token
+        self.auth = {"headers": {"Authorization": f"Bearer {token}"}}
+
+    async def test_async_list_pages_with_cursor_and_filters(self):
+        client = AsyncClient()
+        self.assertEqual((await client.get("/api/async/tickets/")).status_code, status.HTTP_401_UNAUTHORIZED)
+
+        titles, url = [], "/api/async/tickets/?page_size=2"
+        while True:
+            resp = await client.get(url, **self.auth)
+            self.assertEqual(resp.status_code, status.HTTP_200_OK)
+            body = resp.json()
+            titles += [item["title"] for item in body["results"]]
+            if not body["next"]:
+                break
+            url = f"/api/async/tickets/?page_size=2&cursor={body['next']}"
+        self.assertEqual(titles, [f"bug {i}" for i in reversed(range(5))])
+
+        for raw in (f"garbage|{self.tickets[0].id}", "2026-01-01T00:00:00|", "not base64!"):
+            cursor = base64.urlsafe_b64encode(raw.encode()).decode() if "|" in raw else raw
+            resp = await client.get(f"/api/async/tickets/?cursor={cursor}", **self.auth)
+            self.assertEqual(resp.status_code, status.HTTP_400_BAD_REQUEST)
+            self.assertEqual(resp.json(), {"detail": "Invalid cursor."})
+
+        resp = await client.get("/api/async/tickets/?assignee=me", **self.auth)
+        self.assertEqual([item["title"] for item in resp.json()["results"]], ["bug 3", "bug 1"])
+
+    async def test_async_detail_and_user(self):
+        client = AsyncClient()
+        resp = await client.get(f"/api/async/tickets/{self.tickets[0].id}/", **self.auth)
+        self.assertEqual(resp.json()["dev_reports"][0]["root_cause"], "npe")
+
+        resp = await client.get(f"/api/async/users/{self.dev.id}/", **self.auth)
+        self.assertEqual(resp.json()["username"], "dev1")
+
+        resp = await client.get("/api/async/tickets/00000000-0000-0000-0000-000000000000/", **self.auth)
+        self.assertEqual(resp.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class ChunkedUploadTests(TestCase):
+    def setUp(self):
+        self.media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media, ignore_errors=True)
+        overrides = override_settings(MEDIA_ROOT=self.media, UPLOAD_PARTIAL_DIR=f"{self.media}/partial",
+                                      TICKET_TASK_BACKEND="tickets.tasks.ImmediateBackend")
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+
+        self.dev = User.objects.create_user(username="dev1", password="password123", role="DEVELOPER")
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.dev)
+
+        from PIL import Image
+        buffer = io.BytesIO()
+        Image.new("RGB", (800, 600), "red").save(buffer, format="PNG")
+        self.png = buffer.getvalue()
+
+    def _put(self, upload_id, offset, chunk):
+        return self.client.put(f"/api/uploads/{upload_id}/", data=chunk, content_type="application/octet-stream",
+                               HTTP_UPLOAD_OFFSET=str(offset))
+
+    def _upload(self, chunks=3):
+        resp = self.client.post("/api/uploads/", {"filename": "shot.png", "size": len(self.png),
+                                                  "content_type": "image/png"}, format="json")
+        self.assertEqual(resp.status_code, status.HTTP_201_CREATED)
+        upload_id = resp.data["id"]
+        step = len(self.png) // chunks + 1
+        for offset in range(0, len(self.png), step):
+            self.assertEqual(self._put(upload_id, offset, self.png[offset:offset + step]).status_code, 200)
+        with self.captureOnCommitCallbacks(execute=True):
+            resp = self.client.post(f"/api/uploads/{upload_id}/complete/")
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        return resp.data["storedFile"]
+
+    def test_resume_after_interrupted_chunk(self):
+        resp = self.client.post("/api/uploads/", {"filename": "shot.png", "size": len(self.png),
+                                                  "content_type": "image/png"}, format="json")
+        upload_id = resp.data["id"]
+        self._put(upload_id, 0, self.png[:100])
+
+        # 偏移不匹配时拒绝，客户端查询已接收的字节数后继续
+        self.assertEqual(self._put(upload_id, 50, self.png[50:200]).status_code, status.HTTP_409_CONFLICT)
+        received = self.client.get(f"/api/uploads/{upload_id}/").data["received"]
+        self.assertEqual(received, 100)
+        self.assertEqual(self._put(upload_id, received, self.png[received:]).status_code, 200)
+        self.assertEqual(self.client.post(f"/api/uploads/{upload_id}/complete/").status_code, 200)
+
+        other = User.objects.create_user(username="dev2", password="password123", role="DEVELOPER")
+        self.client.force_authenticate(user=other)
+        self.assertEqual(self.client.get(f"/api/uploads/{upload_id}/").status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_stale_writer_at_same_offset_does_not_clobber_data(self):
+        from .models import UploadSession
+
+        session = uploads.start(self.dev, "shot.png", len(self.png), "image/png")
+        stale = UploadSession.objects.get(pk=session.pk)
+        uploads.append(session, 0, io.BytesIO(self.png[:100]), 100)
+        uploads.append(session, 100, io.BytesIO(self.png[100:200]), 100)
+        with self.assertRaises(uploads.UploadError) as ctx:
+            uploads.append(stale, 0, io.BytesIO(b"x" * 50), 50)
+        self.assertEqual(ctx.exception.status, 409)
+        with open(uploads.partial_path(session), "rb") as fh:
+            self.assertEqual(fh.read(), self.png[:200])
+        self.assertEqual(os.listdir(uploads.partial_dir()), [f"{session.pk}.part"])
+
+    def test_concurrent_complete_returns_the_winner_file(self):
+        from .models import UploadSession
+
+        session = uploads.start(self.dev, "shot.png", len(self.png), "image/png")
+        uploads.append(session, 0, io.BytesIO(self.png), len(self.png))
+        loser = UploadSession.objects.get(pk=session.pk)
+        with self.captureOnCommitCallbacks(execute=True):
+            stored = uploads.complete(session)
+        self.assertFalse(os.path.exists(uploads.partial_path(session)))
+        self.assertEqual(uploads.complete(loser), stored)
+
+    def test_failed_chunk_reports_the_original_error(self):
+        session = uploads.start(self.dev, "shot.png", len(self.png), "image/png")
+
+        class Disconnected:
+            def read(self, size):
+                # the temporary chunk is already gone when the read fails
+                for name in os.listdir(uploads.partial_dir()):
+                    if name.endswith(".chunk"):
+                        os.remove(os.path.join(uploads.partial_dir(), name))
+                raise OSError("client went away")
+
+        with self.assertRaisesMessage(OSError, "client went away"):
+            uploads.append(session, 0, Disconnected(), 100)
+
+    def test_abandoned_sessions_expire(self):
+        from .models import UploadSession
+
+        abandoned = uploads.start(self.dev, "old.png", 10)
+        fresh = uploads.start(self.dev, "new.png", 10)
+        UploadSession.objects.filter(pk=abandoned.pk).update(updated_at=timezone.now() - timezone.timedelta(days=2))
+        stray = os.path.join(uploads.partial_dir(), "gone.part.abc.chunk")
+        open(stray, "wb").close()
+        os.utime(stray, (0, 0))
+
+        out = io.StringIO()
+        call_command("expire_uploads", stdout=out)
+        self.assertIn("Expired 1 upload sessions, removed 1 stray files", out.getvalue())
+        self.assertEqual(list(UploadSession.objects.values_list("pk", flat=True)), [fresh.pk])
+        self.assertEqual(os.listdir(uploads.partial_dir()), [f"{fresh.pk}.part"])
+
+    def test_identical_content_is_stored_once_with_thumbnail(self):
+        first = self._upload()
+        second = self._upload(chunks=2)
+        self.assertEqual(first["id"], second["id"])
+        self.assertEqual(StoredFile.objects.count(), 1)
+
+        stored = StoredFile.objects.get()
+        self.assertTrue(stored.thumbnail.name.endswith(".jpg"))
+        # only the authenticated file endpoint is exposed, never the storage path
+        self.assertEqual(first["file"], f"/api/files/{stored.id}/")
+        thumbnail = StoredFileOutSerializer(stored).data["thumbnail"]
+        self.assertEqual(thumbnail, f"/api/files/{stored.id}/?thumbnail=1")
+        self.assertEqual(self.client.get(thumbnail).status_code, status.HTTP_200_OK)
+        with stored.file.open("rb") as fh:
+            self.assertEqual(fh.read(), self.png)
+
+        ticket = Ticket.objects.create(title="bug", discovered_at=timezone.now(), submitter=self.dev,
+                                       assignee=self.dev, current_status="IN_DEVELOPMENT")
+        # another user cannot attach a file they did not upload
+        other = User.objects.create_user(username="dev2", password="password123", role="DEVELOPER")
+        ticket.assignee = other
+        ticket.save()
+        self.client.force_authenticate(user=other)
+        resp = self.client.post(f"/api/tickets/{ticket.id}/dev-report/",
+                                {"root_cause": "npe", "screenshot_file": str(stored.id)}, format="json")
+        self.assertEqual(resp.status_code, status.HTTP_400_BAD_REQUEST)
+
+        ticket.assignee = self.dev
+        ticket.save()
+        self.client.force_authenticate(user=self.dev)
+        resp = self.client.post(f"/api/tickets/{ticket.id}/dev-report/",
+                                {"root_cause": "npe", "screenshot_file": str(stored.id)}, format="json")
+        self.assertEqual(resp.status_code, status.HTTP_200_OK, resp.data)
+        self.assertEqual(DevReport.objects.get().self_test_screenshots.name, stored.file.name)
+
+
+class MediaServingTests(TestCase):
+    def setUp(self):
+        self.media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media, ignore_errors=True)
+        overrides = override_settings(MEDIA_ROOT=self.media, MEDIA_SENDFILE="")
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+
+        self.dev = User.objects.create_user(username="dev1", password="password123", role="DEVELOPER")
+        ticket = Ticket.objects.create(title="bug", discovered_at=timezone.now(), submitter=self.dev)
+        self.content = bytes(range(256)) * 4
+        self.report = DevReport(ticket=ticket, assigned_developer=self.dev)
+        self.report.self_test_screenshots.save("shot.png", ContentFile(self.content))
+        self.url = f"/api/dev-reports/{self.report.id}/screenshot/"
+        self.client = APIClient()
+
+    def test_requires_authentication_and_serves_ranges(self):
+        self.assertEqual(self.client.get(self.url).status_code, status.HTTP_401_UNAUTHORIZED)
+        self.client.force_authenticate(user=self.dev)
+
+        resp = self.client.get(self.url, HTTP_ACCEPT="image/png")
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertEqual(b"".join(resp.streaming_content), self.content)
+        self.assertEqual(resp["Content-Type"], "image/png")
+        self.assertEqual(resp["Accept-Ranges"], "bytes")
+
+        resp = self.client.get(self.url, HTTP_RANGE="bytes=10-19")
+        self.assertEqual(resp.status_code, status.HTTP_206_PARTIAL_CONTENT)
+        self.assertEqual(resp["Content-Range"], f"bytes 10-19/{len(self.content)}")
+        self.assertEqual(b"".join(resp.streaming_content), self.content[10:20])
+
+        resp = self.client.get(self.url, HTTP_RANGE="bytes=-5")
+        self.assertEqual(b"".join(resp.streaming_content), self.content[-5:])
+        self.assertEqual(self.client.get(self.url, HTTP_RANGE="bytes=5000-").status_code, 416)
+
+        etag = resp["ETag"]
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        # If-Range 不匹配时忽略 Range，返回整个文件
+        resp = self.client.get(self.url, HTTP_RANGE="bytes=0-1", HTTP_IF_RANGE='"stale"')
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        resp.close()
+
+    def test_only_the_protected_url_is_exposed(self):
+        self.client.force_authenticate(user=self.dev)
+        report = self.client.get(f"/api/tickets/{self.report.ticket_id}/").data["dev_reports"][0]
+        self.assertNotIn("self_test_screenshots", report)
+        self.assertEqual(report["screenshotUrl"], self.url)
+        self.client.force_authenticate(user=None)
+        self.assertEqual(self.client.get(f"/media/{self.report.self_test_screenshots.name}").status_code, 404)
+
+    def test_front_server_offload(self):
+        self.client.force_authenticate(user=self.dev)
+        with override_settings(MEDIA_SENDFILE="x-accel-redirect"):
+            resp = self.client.get(self.url)
+        self.assertEqual(resp["X-Accel-Redirect"], f"/protected-media/{self.report.self_test_screenshots.name}")
+        self.assertEqual(resp.content, b"")
+
+        with override_settings(MEDIA_SENDFILE="x-sendfile"):
+            resp = self.client.get(self.url)
+        self.assertEqual(resp["X-Sendfile"], self.report.self_test_screenshots.path)
+
+
+class PerformanceMiddlewareTests(TestCase):
+    def setUp(self):
+        instrumentation.registry.reset()
+        self.dev = User.objects.create_user(username="dev1", password="password123", role="DEVELOPER")
+        self.ticket = Ticket.objects.create(title="bug", discovered_at=timezone.now(), submitter=self.dev)
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.dev)
+
+    @override_settings(PERF_SERVER_TIMING=True)
+    def test_server_timing_and_metrics_are_tagged_by_view_action(self):
+        resp = self.client.get(f"/api/tickets/{self.ticket.id}/")
+        timing = resp["Server-Timing"]
+        self.assertIn('desc="TicketViewSet.retrieve"', timing)
+        self.assertRegex(timing, r'db;dur=[\d.]+;desc="5 queries"')
+        self.assertIn("ser;dur=", timing)
+
+        self.client.post(f"/api/tickets/{self.ticket.id}/dev-report/", {"root_cause": "npe"}, format="json")
+        with override_settings(PERF_METRICS_TOKEN="secret"):
+            body = self.client.get("/metrics", HTTP_AUTHORIZATION="Bearer secret").content.decode()
+        self.assertIn('ticket_http_requests_total{view="TicketViewSet.retrieve",method="GET",status="200"} 1', body)
+        self.assertIn('ticket_http_requests_total{view="TicketViewSet.dev_report",method="POST",status="200"} 1', body)
+        self.assertIn('ticket_db_queries_total{view="TicketViewSet.retrieve"} 5', body)
+        self.assertIn('ticket_http_request_duration_seconds_count{view="TicketViewSet.retrieve"} 1', body)
+        # ticket representation cache lookups are exported alongside the request metrics
+        self.assertIn('ticket_cache_requests_total{cache="ticket_repr",result="miss"} 1', body)
+        self.assertIn('ticket_cache_requests_total{cache="ticket_repr",result="hit"} 0', body)
+
+        # without a configured token the endpoint is closed, DEBUG included
+        self.assertEqual(self.client.get("/metrics").status_code, 403)
+        with override_settings(DEBUG=True):
+            self.assertEqual(self.client.get("/metrics").status_code, 403)
+        with override_settings(PERF_METRICS_TOKEN="secret"):
+            self.assertEqual(self.client.get("/metrics").status_code, 403)
+            self.assertEqual(self.client.get("/metrics", HTTP_AUTHORIZATION="Bearer wrong").status_code, 403)
+            self.assertEqual(self.client.get("/metrics", HTTP_AUTHORIZATION="Bearer secret").status_code, 200)
+
+    @override_settings(PERF_SERVER_TIMING=True)
+    def test_serializer_timing_is_an_opt_in_patch(self):
+        """
+        BaseSerializer.data is only replaced while PERF_SERIALIZER_TIMING is on; building the middleware patches nothing
+        """
+        from rest_framework.serializers import BaseSerializer
+
+        self.assertIsNot(BaseSerializer.data, instrumentation._original_data)
+        with override_settings(PERF_SERIALIZER_TIMING=False):
+            self.assertIs(BaseSerializer.data, instrumentation._original_data)
+            instrumentation.PerformanceMiddleware(lambda request: None)
+            self.assertIs(BaseSerializer.data, instrumentation._original_data)
+            timing = self.client.get(f"/api/tickets/{self.ticket.id}/")["Server-Timing"]
+            self.assertIn("ser;dur=0.0,", timing)
+        self.assertIsNot(BaseSerializer.data, instrumentation._original_data)
+
+    @override_settings(DEBUG=True)
+    def test_middleware_chain_stays_async_under_asgi(self):
+        """
+        Under ASGI none of the project middleware forces a sync_to_async hop
+        """
+        with self.assertNoLogs("django.request", "DEBUG"):
+            ASGIHandler()
+
+    @override_settings(PERF_SERVER_TIMING=True)
+    async def test_async_views_are_measured(self):
+        """
+        Queries an async view runs through sync_to_async are still counted
+        """
+        token = await sync_to_async(lambda: str(CustomTokenObtainPairSerializer.get_token(self.dev).access_token))()
+        resp = await AsyncClient().get(f"/api/async/tickets/{self.ticket.id}/",
+                                       headers={"Authorization": f"Bearer {token}"})
+        self.assertEqual(resp.status_code, 200)
+        self.assertRegex(resp["Server-Timing"], r'db;dur=[\d.]+;desc="[1-9]\d* queries"')
+        self.assertIn('desc="tickets.async_views.ticket_detail"', resp["Server-Timing"])
+
+    @override_settings(PERF_STRICT=True, PERF_N_PLUS_ONE_THRESHOLD=3)
+    def test_strict_mode_fails_on_repeated_queries(self):
+        def n_plus_one(request):
+            for _ in range(5):
+                User.objects.filter(pk=self.dev.pk).first()
+            return HttpResponse("ok")
+
+        middleware = instrumentation.PerformanceMiddleware(n_plus_one)
+        with self.assertRaisesMessage(instrumentation.PerformanceError, "possible N+1, executed 5 times"):
+            with self.assertLogs("ticket_django_backend.instrumentation", "WARNING"):
+                middleware(RequestFactory().get("/loop/"))
+
+        with override_settings(PERF_N_PLUS_ONE_THRESHOLD=10, PERF_SLOW_QUERY_MS=0):
+            with self.assertRaisesMessage(instrumentation.PerformanceError, "slow query"):
+                with self.assertLogs("ticket_django_backend.instrumentation", "WARNING"):
+                    middleware(RequestFactory().get("/loop/"))
+
+
+class BenchmarkHarnessTests(TestCase):
+    def test_seed_scenarios_and_baseline_comparison(self):
+        """
+        Seeded data is reproducible and consistent; scenarios report queries per request; compare flags regressions
+        """
+        from benchmarks import report, scenarios, seed
+
+        names = seed.usernames(12, 7)
+        now = timezone.now()
+        rows = list(seed.ticket_rows(30, names, 7, now=now))
+        self.assertEqual(rows, list(seed.ticket_rows(30, names, 7, now=now)))
+
+        seed.seed(30, users=12, seed_value=7, batch_size=10, index=False)
+        self.assertEqual(Ticket.objects.count(), 30)
+        closed = Ticket.objects.filter(current_status="CLOSED").first()
+        if closed is not None:
+            self.assertTrue(closed.regression_tests.filter(passed=True).exists())
+            self.assertEqual(TicketStatusEvent.objects.filter(ticket=closed).latest("at").to_status, "CLOSED")
+
+        results = scenarios.run(["detail", "workflow"], requests=2, warmup=0)
+        self.assertEqual(results["scenarios"]["workflow"]["errors"], 0)
+        self.assertEqual(results["scenarios"]["workflow.regression"]["requests"], 2)
+        self.assertGreater(results["scenarios"]["detail"]["queries_mean"], 0)
+        self.assertEqual(Ticket.objects.filter(current_status="CLOSED", title__startswith="bench ticket").count(), 2)
+
+        slower = json.loads(json.dumps(results))
+        slower["scenarios"]["detail"]["p99_ms"] *= 2
+        slower["scenarios"]["detail"]["queries_mean"] += 3
+        _, regressions = report.compare(results, slower, tolerance=0.1)
+        self.assertEqual({(name, metric) for name, metric, *_ in regressions},
+                         {("detail", "p99_ms"), ("detail", "queries_mean")})
+
+
+class PushTests(TestCase):
+    def setUp(self):
+        self.dev = User.objects.create_user(username="dev1", password="password123", role="DEVELOPER")
+        self.qa = User.objects.create_user(username="qa1", password="password123", role="QA")
+        self.ticket = Ticket.objects.create(title="live", discovered_at=timezone.now(), submitter=self.qa,
+                                            assignee=self.dev)
+        self.token = str(CustomTokenObtainPairSerializer.get_token(self.dev).access_token)
+
+    def _dev_report(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            workflow.transition(self.ticket, "UNDER_REVIEW")
+
+    async def test_server_sent_events_for_transitions(self):
+        resp = await AsyncClient().get(f"/api/events/?ticket={self.ticket.id}&user=me&token={self.token}")
+        self.assertEqual(resp["Content-Type"], "text/event-stream")
+        chunks = aiter(resp.streaming_content)
+        self.assertTrue((await anext(chunks)).startswith(b"retry:"))
+
+        await sync_to_async(self._dev_report)()
+        frame = await asyncio.wait_for(anext(chunks), 1)
+        event = json.loads(frame.decode().removeprefix("data: "))
+        self.assertEqual((event["type"], event["ticket"]), ("ticket.status_changed", str(self.ticket.id)))
+        self.assertEqual((event["previous_status"], event["current_status"]), ("OPEN", "UNDER_REVIEW"))
+        # 客户端断开时 ASGIHandler 取消响应任务，订阅随之移除
+        pending = asyncio.ensure_future(anext(chunks))
+        await asyncio.sleep(0)
+        pending.cancel()
+        with self.assertRaises(asyncio.CancelledError):
+            await pending
+        self.assertFalse(push.get_broker().subscribers)
+
+        resp = await AsyncClient().get(f"/api/events/?user={self.qa.id}&token={self.token}")
+        self.assertEqual(resp.status_code, status.HTTP_403_FORBIDDEN)
+        resp = await AsyncClient().get(f"/api/events/?ticket={self.ticket.id}")
+        self.assertEqual(resp.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    async def test_websocket_subscriptions(self):
+        incoming, outgoing = asyncio.Queue(), asyncio.Queue()
+        scope = {"type": "websocket", "path": "/ws/events/", "query_string": f"token={self.token}".encode()}
+        await incoming.put({"type": "websocket.connect"})
+        connection_task = asyncio.ensure_future(push.websocket_application(scope, incoming.get, outgoing.put))
+        self.assertEqual((await outgoing.get())["type"], "websocket.accept")
+
+        await incoming.put({"type": "websocket.receive", "text": json.dumps({"subscribe": ["status:UNDER_REVIEW"]})})
+        self.assertEqual(json.loads((await outgoing.get())["text"])["channels"], ["status:UNDER_REVIEW"])
+        await sync_to_async(self._dev_report)()
+        event = json.loads((await asyncio.wait_for(outgoing.get(), 1))["text"])
+        self.assertEqual(event["current_status"], "UNDER_REVIEW")
+
+        await incoming.put({"type": "websocket.receive", "text": json.dumps({"subscribe": ["status:NOPE"]})})
+        self.assertEqual(json.loads((await outgoing.get())["text"])["type"], "error")
+        await incoming.put({"type": "websocket.disconnect"})
+        await asyncio.wait_for(connection_task, 1)
+        self.assertFalse(push.get_broker().subscribers)
+
+    async def test_websocket_channel_cap_and_overflow(self):
+        incoming, outgoing = asyncio.Queue(), asyncio.Queue()
+        scope = {"type": "websocket", "path": "/ws/events/", "query_string": f"token={self.token}".encode()}
+        await incoming.put({"type": "websocket.connect"})
+        with override_settings(PUSH_MAX_CHANNELS=2, PUSH_QUEUE_SIZE=1):
+            connection_task = asyncio.ensure_future(push.websocket_application(scope, incoming.get, outgoing.put))
+            self.assertEqual((await outgoing.get())["type"], "websocket.accept")
+
+            # the cap applies to the channels accumulated over several messages
+            for name, reply in (("status:OPEN", "subscribed"), ("status:CLOSED", "subscribed"),
+                                ("status:REOPENED", "error")):
+                await incoming.put({"type": "websocket.receive", "text": json.dumps({"subscribe": [name]})})
+                self.assertEqual(json.loads((await outgoing.get())["text"])["type"], reply)
+            await incoming.put({"type": "websocket.receive",
+                                "text": json.dumps({"subscribe": ["status:REOPENED"], "unsubscribe": ["status:OPEN"]})})
+            self.assertEqual(json.loads((await outgoing.get())["text"])["channels"],
+                             ["status:CLOSED", "status:REOPENED"])
+
+            # a slow client gets the overflow notice and the socket is closed, as with SSE
+            broker = push.get_broker()
+            for message in ("m1", "m2"):
+                broker.publish({"status:CLOSED"}, message)
+            self.assertEqual((await asyncio.wait_for(outgoing.get(), 1))["text"], push.OVERFLOW)
+            self.assertEqual(await asyncio.wait_for(outgoing.get(), 1),
+                             {"type": "websocket.close", "code": push.OVERFLOW_CLOSE_CODE})
+            await asyncio.wait_for(connection_task, 1)
+        self.assertFalse(broker.subscribers)
+
+    async def test_fan_out_and_slow_consumers(self):
+        broker = push.LocalBroker()
+        idle = [broker.subscribe({"status:OPEN"}) for _ in range(2000)]
+        slow = broker.subscribe({"status:OPEN", "ticket:x"}, maxsize=2)
+        self.assertEqual(await sync_to_async(broker.publish)({"status:OPEN", "ticket:x"}, "m1"), 2001)
+        await asyncio.sleep(0)
+        self.assertTrue(all(subscription.queue.qsize() == 1 for subscription in idle))
+
+        for message in ("m2", "m3"):
+            broker.publish({"ticket:x"}, message)
+        await asyncio.sleep(0)
+        self.assertEqual(await slow.get(0.1), push.OVERFLOW)
+        self.assertIsNone(await slow.get(0.01))
+        for subscription in idle + [slow]:
+            subscription.close()
+        self.assertFalse(broker.subscribers)
+
+
+class ResponseCompressionTests(TestCase):
+    def setUp(self):
+        self.dev = User.objects.create_user(username="dev1", password="password123", role="DEVELOPER")
+        Ticket.objects.bulk_create([
+            Ticket(title=f"crash on page {i}", description="stack trace " * 20, discovered_at=timezone.now(),
+                   submitter=self.dev)
+            for i in range(20)
+        ])
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.dev)
+
+    def test_list_is_gzipped_with_weak_etag(self):
+        import gzip
+
+        plain = self.client.get("/api/tickets/")
+        resp = self.client.get("/api/tickets/", HTTP_ACCEPT_ENCODING="gzip, deflate")
+        self.assertEqual(resp["Content-Encoding"], "gzip")
+        self.assertIn("Accept-Encoding", resp["Vary"])
+        self.assertLess(len(resp.content), len(plain.content))
+        self.assertEqual(json.loads(gzip.decompress(resp.content)), plain.json())
+        self.assertEqual(resp["ETag"], "W/" + plain["ETag"])
+
+        cached = self.client.get("/api/tickets/", HTTP_ACCEPT_ENCODING="gzip", HTTP_IF_NONE_MATCH=resp["ETag"])
+        self.assertEqual(cached.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        with override_settings(COMPRESS_MIN_SIZE=10 ** 7):
+            self.assertFalse(self.client.get("/api/tickets/", HTTP_ACCEPT_ENCODING="gzip").has_header("Content-Encoding"))
+        self.assertFalse(self.client.get("/api/tickets/", HTTP_ACCEPT_ENCODING="gzip;q=0").has_header("Content-Encoding"))
+        # HTML pages carry CSRF tokens and stay uncompressed (BREACH)
+        html = self.client.get("/api/tickets/", HTTP_ACCEPT="text/html", HTTP_ACCEPT_ENCODING="gzip")
+        self.assertTrue(html["Content-Type"].startswith("text/html"))
+        self.assertFalse(html.has_header("Content-Encoding"))
+
+    def test_streaming_export_is_compressed_incrementally(self):
+        import zlib
+
+        resp = self.client.get("/api/tickets/export/?output=ndjson", HTTP_ACCEPT_ENCODING="gzip")
+        self.assertEqual(resp["Content-Encoding"], "gzip")
+        self.assertFalse(resp.has_header("Content-Length"))
+        body = zlib.decompress(b"".join(resp.streaming_content), 31).decode()
+        self.assertEqual(len(body.strip().splitlines()), 20)
+
+    def test_negotiation_prefers_highest_quality(self):
+        from ticket_django_backend import compression
+
+        self.assertIsNone(compression.negotiate(""))
+        self.assertIsNone(compression.negotiate("identity, gzip;q=0"))
+        self.assertIs(compression.negotiate("deflate, *;q=0.5"), compression.available_encoders()[0])
+        with mock.patch.object(compression, "brotli", object()):
+            self.assertIs(compression.negotiate("gzip, br"), compression.BrotliEncoder)
+            self.assertIs(compression.negotiate("gzip, br;q=0.8"), compression.GzipEncoder)
+
+    def test_orjson_renderer_matches_drf_output(self):
+        from rest_framework.renderers import JSONRenderer
+        from .renderers import ORJSONParser, ORJSONRenderer
+        from .serializers import TicketSerializer
+
+        data = TicketSerializer(Ticket.objects.with_history(), many=True).data
+        rendered = ORJSONRenderer().render(data)
+        self.assertEqual(json.loads(rendered), json.loads(JSONRenderer().render(data)))
+        self.assertTrue(data[0]["created_at"].endswith("Z"))
+        self.assertEqual(ORJSONParser().parse(io.BytesIO(rendered)), json.loads(rendered))
+        self.assertIn(b"\n  ", ORJSONRenderer().render({"a": 1}, "application/json; indent=4"))
+
+
+class BinaryUUIDKeyTests(TestCase):
+    def test_uuid7_keys_are_time_ordered_and_stored_as_bytes(self):
+        from .ids import uuid7
+
+        generated = [uuid7() for _ in range(5000)]
+        self.assertEqual(generated, sorted(generated))
+        self.assertEqual(len(set(generated)), 5000)
+        self.assertTrue(all(value.version == 7 and value.variant == uuid.RFC_4122 for value in generated))
+        at = timezone.now()
+        self.assertEqual(uuid7(at).int >> 80, int(at.timestamp() * 1000))
+        self.assertEqual(uuid7(at, 12345), uuid7(at, 12345))
+
+        dev = User.objects.create_user(username="dev1", password="password123", role="DEVELOPER")
+        ticket = Ticket.objects.create(title="bug", discovered_at=timezone.now(), submitter=dev)
+        report = DevReport.objects.create(ticket=ticket, root_cause="npe")
+        self.assertEqual(ticket.id.version, 7)
+        self.assertLess(ticket.id, report.id)
+        if not connection.features.has_native_uuid_field:
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT id FROM tickets_ticket")
+                self.assertEqual(bytes(cursor.fetchone()[0]), ticket.id.bytes)
+
+        client = APIClient()
+        client.force_authenticate(user=dev)
+        resp = client.get(f"/api/tickets/{ticket.id}/")
+        self.assertEqual(resp.data["id"], str(ticket.id))
+        self.assertEqual(resp.data["dev_reports"][0]["id"], str(report.id))
+        self.assertEqual(list(Ticket.objects.filter(dev_reports__in=[report]).values_list("id", flat=True)),
+                         [ticket.id])
+
+
+class BinaryUUIDSchemaTests(TransactionTestCase):
+    # DDL commits implicitly on MySQL, so these cannot run inside TestCase's transaction
+    def test_existing_keys_are_converted_in_place(self):
+        """0019 rewrites existing char(32) ids and the foreign keys referencing them, and reverses cleanly"""
+        from django.db.migrations.executor import MigrationExecutor
+
+        before, after = [("tickets", "0018_importcheckpoint")], [("tickets", "0019_binary_uuid7_keys")]
+        executor = MigrationExecutor(connection)
+        executor.migrate(before)
+        apps = executor.loader.project_state(before).apps
+        user = apps.get_model("tickets", "User").objects.create(username="legacy")
+        OldTicket = apps.get_model("tickets", "Ticket")
+        ticket = OldTicket.objects.create(title="legacy", discovered_at=timezone.now(), submitter=user)
+        apps.get_model("tickets", "DevReport").objects.create(ticket=ticket)
+        apps.get_model("tickets", "TicketStatusEvent").objects.create(ticket=ticket, to_status="OPEN",
+                                                                      at=timezone.now())
+
+        executor = MigrationExecutor(connection)
+        executor.migrate(after)
+        converted = Ticket.objects.get(pk=str(ticket.pk))
+        self.assertEqual(converted.dev_reports.count(), 1)
+        self.assertEqual(converted.status_events.count(), 1)
+
+        executor = MigrationExecutor(connection)
+        executor.migrate(before)
+        self.assertEqual(OldTicket.objects.get(pk=ticket.pk).title, "legacy")
+        executor = MigrationExecutor(connection)
+        executor.migrate(executor.loader.graph.leaf_nodes())
+
+    def test_primary_key_benchmark_cleans_up(self):
+        from benchmarks import primary_keys
+
+        results = primary_keys.run(rows=60, batch_size=25, lookups=10)
+        self.assertEqual(set(results["variants"]), {"uuid4-char", "uuid4-binary", "uuid7-char", "uuid7-binary"})
+        self.assertTrue(all(variant["lookups_found"] == 10 for variant in results["variants"].values()))
+        self.assertNotIn("bench_pk_uuid7_binary", connection.introspection.table_names())
@@ -0,0 +1,208 @@
+"""
+截图等附件的分块上传。
+
+客户端先创建 UploadSession，再按顺序 PUT 分块（Upload-Offset 头指明起始偏移），中断后可通过
+GET 查询已接收的字节数继续上传；complete 时流式计算 SHA-256，相同内容复用已有 StoredFile，
+缩略图交给后台任务生成。整个过程中内存占用只与 UPLOAD_CHUNK_SIZE 有关，与文件大小无关。
+"""
+import contextlib
+import hashlib
+import io
+import os
+import shutil
+import time
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files import File
+from django.core.files.base import ContentFile
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from ticket_django_backend.routers import use_primary
+
+from . import tasks
+from .models import StoredFile, UploadSession
+
+try:
+    from PIL import Image
+except ImportError:  # Pillow 未安装时不生成缩略图
+    Image = None
+
+THUMBNAIL_SIZE = (320, 320)
+
+
+class UploadError(Exception):
+    def __init__(self, detail, status=400):
+        super().__init__(detail)
+        self.detail = detail
+        self.status = status
+
+
+def chunk_size():
+    return getattr(settings, 'UPLOAD_CHUNK_SIZE', 64 * 1024)
+
+
+def max_size():
+    return getattr(settings, 'UPLOAD_MAX_SIZE', 20 * 1024 * 1024)
+
+
+def expiry():
+    return getattr(settings, 'UPLOAD_SESSION_EXPIRY', 24 * 3600)
+
+
+def partial_dir():
+    directory = getattr(settings, 'UPLOAD_PARTIAL_DIR', os.path.join(settings.MEDIA_ROOT, 'uploads', 'partial'))
+    os.makedirs(directory, exist_ok=True)
+    return directory
+
+
+def partial_path(session):
+    return os.path.join(partial_dir(), f'{session.pk}.part')
+
+
+def start(owner, filename, total_size, content_type=''):
+    if total_size <= 0 or total_size > max_size():
+        raise UploadError(f'File size must be between 1 and {max_size()} bytes.')
+    session = UploadSession.objects.create(
+        owner=owner, filename=os.path.basename(filename)[:255], total_size=total_size, content_type=content_type,
+    )
+    open(partial_path(session), 'wb').close()
+    return session
+
+
+def append(session, offset, stream, length):
+    """从 stream 读取 length 字节写到 offset 处，仅允许从已接收位置继续
+
+    分块先写入本请求独占的临时文件；确认 received 仍等于 offset（该 UPDATE 持有行锁直到提交）后
+    才拼接到 .part 文件。同一偏移的并发请求只有一个能拼接，失败者不会改动已写入的数据。
+    """
+    if session.stored_file_id:
+        raise UploadError('Upload already completed.', status=409)
+    if offset != session.received:
+        raise UploadError(f'Expected offset {session.received}.', status=409)
+    if length <= 0 or offset + length > session.total_size:
+        raise UploadError('Chunk exceeds the declared file size.')
+
+    path = partial_path(session)
+    chunk_path = f'{path}.{uuid.uuid4().hex}.chunk'
+    try:
+        written = 0
+        with open(chunk_path, 'wb') as fh:
+            while written < length:
+                block = stream.read(min(chunk_size(), length - written))
+                if not block:
+                    break
+                fh.write(block)
+                written += len(block)
+
+        with transaction.atomic():
+            # 乐观并发：received 未被其他请求推进时才认领这段偏移
+            updated = UploadSession.objects.filter(pk=session.pk, received=offset, stored_file=None).update(
+                received=offset + written, updated_at=timezone.now(),
+            )
+            if not updated:
+                raise UploadError('Concurrent upload to the same session.', status=409)
+            with open(chunk_path, 'rb') as src, open(path, 'r+b') as dst:
+                dst.seek(offset)
+                shutil.copyfileobj(src, dst, chunk_size())
+                dst.truncate(offset + written)
+    finally:
+        # 不掩盖 try 中的原始异常
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(chunk_path)
+    session.received = offset + written
+    if written < length:
+        raise UploadError(f'Incomplete chunk, received {written} of {length} bytes.')
+    return session
+
+
+def complete(session):
+    if session.stored_file_id:
+        return session.stored_file
+    with transaction.atomic():
+        # 锁住会话行：并发的 complete 等先到者提交后直接返回其结果，不会再去读已删除的 .part 文件
+        locked = UploadSession.objects.select_for_update().select_related('stored_file').get(pk=session.pk)
+        if locked.stored_file_id:
+            session.stored_file = locked.stored_file
+            return session.stored_file
+        if locked.received != locked.total_size:
+            raise UploadError(f'Received {locked.received} of {locked.total_size} bytes.', status=409)
+
+        path = partial_path(session)
+        digest = hashlib.sha256()
+        with open(path, 'rb') as fh:
+            for block in iter(lambda: fh.read(chunk_size()), b''):
+                digest.update(block)
+        sha256 = digest.hexdigest()
+
+        stored = StoredFile.objects.filter(sha256=sha256).first()
+        if stored is None:
+            ext = os.path.splitext(session.filename)[1].lower()
+            stored = StoredFile(sha256=sha256, size=session.total_size, content_type=session.content_type)
+            with open(path, 'rb') as fh:
+                stored.file.save(f'{sha256[:2]}/{sha256}{ext}', File(fh), save=False)
+            try:
+                with transaction.atomic():
+                    stored.save(force_insert=True)
+            except IntegrityError:
+                # 并发上传了相同内容
+                stored.file.delete(save=False)
+                stored = StoredFile.objects.get(sha256=sha256)
+            else:
+                if stored.content_type.startswith('image/'):
+                    transaction.on_commit(lambda: tasks.enqueue('tickets.uploads.generate_thumbnail', str(stored.pk)))
+
+        UploadSession.objects.filter(pk=session.pk).update(stored_file=stored)
+        # 提交后再删除：回滚时会话仍未完成，.part 文件需要保留
+        transaction.on_commit(lambda: _remove_partial(path))
+    session.stored_file = stored
+    return stored
+
+
+def _remove_partial(path):
+    with contextlib.suppress(FileNotFoundError):
+        os.remove(path)
+
+
+def generate_thumbnail(stored_file_id):
+    if Image is None:
+        return
+    # 文件记录刚在主库写入，从库可能尚未同步
+    with use_primary():
+        stored = StoredFile.objects.filter(pk=stored_file_id).first()
+    if stored is None or stored.thumbnail:
+        return
+    with stored.file.open('rb') as fh:
+        image = Image.open(fh)
+        image.thumbnail(THUMBNAIL_SIZE)
+        buffer = io.BytesIO()
+        image.convert('RGB').save(buffer, format='JPEG', quality=85)
+    stored.thumbnail.save(f'{stored.sha256[:2]}/{stored.sha256}.jpg', ContentFile(buffer.getvalue()), save=False)
+    StoredFile.objects.filter(pk=stored.pk).update(thumbnail=stored.thumbnail.name)
+
+
+def sweep(max_age=None):
+    """删除超过 max_age 秒未推进的未完成会话及其 .part 文件，以及遗留的临时文件（manage.py expire_uploads）"""
+    max_age = expiry() if max_age is None else max_age
+    cutoff = timezone.now() - timedelta(seconds=max_age)
+    stale = UploadSession.objects.filter(stored_file=None, updated_at__lt=cutoff)
+    expired = list(stale.values_list('pk', flat=True))
+    # 重新带上过期条件：查询之后又收到分块的会话不删除
+    stale.filter(pk__in=expired).delete()
+    for pk in expired:
+        path = os.path.join(partial_dir(), f'{pk}.part')
+        if os.path.exists(path) and not UploadSession.objects.filter(pk=pk).exists():
+            os.remove(path)
+
+    # 进程中断时残留的分块临时文件，以及会话已不存在的 .part 文件
+    active = {f'{pk}.part' for pk in UploadSession.objects.filter(stored_file=None).values_list('pk', flat=True)}
+    removed_files = 0
+    deadline = time.time() - max_age
+    with os.scandir(partial_dir()) as entries:
+        for entry in entries:
+            if entry.name in active or not entry.is_file() or entry.stat().st_mtime >= deadline:
+                continue
+            os.remove(entry.path)
+            removed_files += 1
+    return len(expired), removed_files
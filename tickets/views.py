@@ -1,22 +1,51 @@
-from django.shortcuts import render
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db import transaction
+from django.db.models import prefetch_related_objects
+from django.http import Http404, StreamingHttpResponse
+from django.shortcuts import get_object_or_404, render
+from django.utils import timezone
 
 # Create your views here.
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
+from rest_framework.exceptions import APIException, ValidationError
+from rest_framework.filters import OrderingFilter
+from rest_framework.negotiation import BaseContentNegotiation
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated, AllowAny
+from rest_framework.views import APIView
+from ticket_django_backend.routers import preserve_routing
 
-from .models import User, Ticket, QAReview, DevReport, RegressionTest
+from . import analytics, cache as ticket_cache, conditional, export, media, push, sparse, stats, uploads, workflow
+from .models import User, Ticket, QAReview, DevReport, RegressionTest, StoredFile, UploadSession, ticket_history_prefetches
+from .filters import TicketFilterBackend
+from .pagination import TicketCursorPagination, TicketSearchPagination
+from .search import get_search_backend
 from .serializers import (
     UserSerializer,
     UserOutSerializer,
     TicketSerializer,
+    TicketListSerializer,
     TicketCreateSerializer,
     DevReportSerializer,
     QAReviewSerializer,
     RegressionSerializer,
+    UploadStartSerializer,
+    UploadSessionOutSerializer,
+    resolve_users,
 )
 
+# 批量接口单次请求的最大条目数
+BULK_MAX_ITEMS = 500
+
+
+def _is_uuid(value):
+    try:
+        Ticket._meta.pk.to_python(value)
+    except (TypeError, ValueError, DjangoValidationError):
+        return False
+    return value is not None
+
 
 class UserViewSet(viewsets.ModelViewSet):
     queryset = User.objects.all()
@@ -26,6 +55,23 @@ class UserViewSet(viewsets.ModelViewSet):
             return UserOutSerializer
         return UserSerializer
 
+    def _sparse(self):
+        # ?fields= / ?expand=，见 tickets/sparse.py
+        return sparse.FieldSpec.from_request(self.request) if self.request.method == 'GET' else None
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        spec = self._sparse()
+        if spec is not None:
+            queryset = sparse.optimize(queryset, UserOutSerializer(sparse=spec))
+        return queryset
+
+    def get_serializer(self, *args, **kwargs):
+        spec = self._sparse()
+        if spec is not None:
+            kwargs['sparse'] = spec
+        return super().get_serializer(*args, **kwargs)
+
     def get_permissions(self):
         if self.action == 'create':
             return [AllowAny()]
@@ -34,21 +80,117 @@ class UserViewSet(viewsets.ModelViewSet):
 
 
 class TicketViewSet(viewsets.ModelViewSet):
-    queryset = Ticket.objects.select_related('submitter', 'assignee', 'qa_reviewer', 'regressor').prefetch_related('qa_reviews', 'dev_reports').all()
+    queryset = Ticket.objects.with_users()
     permission_classes = [IsAuthenticated]
+    pagination_class = TicketCursorPagination
+    filter_backends = [TicketFilterBackend, OrderingFilter]
+    ordering_fields = ['created_at', 'updated_at', 'discovered_at']
+
+    def _render_detail(self, ticket):
+        prefetch_related_objects([ticket], *ticket_history_prefetches())
+        return TicketSerializer(ticket).data
+
+    def _ticket_data(self, ticket):
+        # 写入历史后重新加载并渲染，同时写入缓存（写穿）
+        ticket = Ticket.objects.with_history().get(pk=ticket.pk)
+        data = TicketSerializer(ticket).data
+        ticket_cache.store('detail', ticket, data)
+        return data
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        etag, last_modified, _ = conditional.freshness(queryset, request)
+        response = conditional.not_modified(request, etag, last_modified)
+        if response is not None:
+            return response
+
+        spec = sparse.FieldSpec.from_request(request, default_fields=TicketListSerializer.Meta.fields)
+        if spec is not None:
+            # 按请求的字段调整查询；表示随参数变化，不经过序列化结果缓存
+            ordering = [field.lstrip('-') for field in self.paginator.get_ordering(request, queryset, self)]
+            queryset = sparse.optimize(queryset, TicketSerializer(sparse=spec), extra=ordering)
+            data = TicketSerializer(self.paginate_queryset(queryset), many=True, sparse=spec).data
+            return conditional.add_headers(self.get_paginated_response(data), etag, last_modified)
+
+        tickets = self.paginate_queryset(queryset)
+        data = ticket_cache.get_or_render_many(
+            'list', tickets, lambda missing: TicketListSerializer(missing, many=True).data
+        )
+        return conditional.add_headers(self.get_paginated_response(data), etag, last_modified)
+
+    def retrieve(self, request, *args, **kwargs):
+        try:
+            pk = Ticket._meta.pk.to_python(kwargs[self.lookup_field])
+        except DjangoValidationError:
+            raise Http404
+        queryset = self.filter_queryset(self.get_queryset()).filter(pk=pk)
+        etag, last_modified, updated_at = conditional.freshness(queryset, request)
+        if updated_at is None:
+            raise Http404
+        response = conditional.not_modified(request, etag, last_modified)
+        if response is not None:
+            return response
+
+        spec = sparse.FieldSpec.from_request(request)
+        if spec is not None:
+            # 稀疏表示不经过缓存，只读取请求的列与关联
+            ticket = get_object_or_404(sparse.optimize(queryset, TicketSerializer(sparse=spec)))
+            self.check_object_permissions(request, ticket)
+            data = TicketSerializer(ticket, sparse=spec).data
+            return conditional.add_headers(Response(data), etag, last_modified)
+
+        # 命中缓存时只需上面的一条聚合查询
+        data = ticket_cache.get('detail', pk, updated_at)
+        if data is None:
+            ticket = self.get_object()
+            data = self._render_detail(ticket)
+            ticket_cache.store('detail', ticket, data)
+        return conditional.add_headers(Response(data), etag, last_modified)
 
     def get_serializer_class(self):
         if self.action in ['create']:
             return TicketCreateSerializer
+        if self.action == 'list':
+            return TicketListSerializer
         return TicketSerializer
 
     def create(self, request, *args, **kwargs):
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
         ticket = serializer.save()
-        out = TicketSerializer(ticket)
-        headers = self.get_success_headers(out.data)
-        return Response(out.data, status=status.HTTP_201_CREATED, headers=headers)
+        data = self._ticket_data(ticket)
+        headers = self.get_success_headers(data)
+        return Response(data, status=status.HTTP_201_CREATED, headers=headers)
+
+    @action(detail=False, methods=['get'], url_path='search')
+    def search(self, request):
+        query = request.query_params.get('q', '').strip()
+        if not query:
+            return Response({'detail': 'Query parameter "q" is required.'}, status=400)
+
+        paginator = TicketSearchPagination()
+        hits = paginator.paginate_queryset(get_search_backend().search(query), request, view=self)
+        tickets = Ticket.objects.with_users().in_bulk(
+            [ticket_id for ticket_id, score in hits]
+        )
+        results = []
+        for ticket_id, score in hits:
+            if ticket_id in tickets:
+                item = TicketListSerializer(tickets[ticket_id]).data
+                item['score'] = score
+                results.append(item)
+        return paginator.get_paginated_response(results)
+
+    @action(detail=False, methods=['get'], url_path='export')
+    def export_tickets(self, request):
+        # 流式导出（与列表相同的筛选参数），?output=ndjson|csv
+        fmt = request.query_params.get('output', 'ndjson')
+        if fmt not in export.FORMATS:
+            return Response({'detail': f'output must be one of {", ".join(export.FORMATS)}.'}, status=400)
+        queryset = self.filter_queryset(self.get_queryset())
+        response = StreamingHttpResponse(preserve_routing(export.stream(fmt, queryset)), content_type=export.CONTENT_TYPES[fmt])
+        response['Content-Disposition'] = f'attachment; filename="tickets.{fmt}"'
+        return response
 
     @action(detail=True, methods=['post'], url_path='dev-report')
     def dev_report(self, request, pk=None):
@@ -60,20 +202,20 @@ class TicketViewSet(viewsets.ModelViewSet):
         if ticket.assignee_id and ticket.assignee_id != request.user.id:
             return Response({'detail': 'Only assignee developer can operate.'}, status=403)
 
-        payload = DevReportSerializer(data=request.data)
+        payload = DevReportSerializer(data=request.data, context={'request': request})
         payload.is_valid(raise_exception=True)
-        data = payload.validated_data
+        data = dict(payload.validated_data)
 
-        # 持久化 DevReport 记录
-        DevReport.objects.create(
-            ticket=ticket,
-            assigned_developer=request.user,
-            **data,
-        )
+        screenshot = data.pop('screenshot_file', None)
+        if screenshot is not None:
+            data['self_test_screenshots'] = screenshot.file.name
 
-        ticket.current_status = 'UNDER_REVIEW'
-        ticket.save(update_fields=['current_status', 'updated_at'])
-        return Response(TicketSerializer(ticket).data)
+        # 持久化 DevReport 记录并流转状态（同一事务）
+        workflow.transition(
+            ticket, 'UNDER_REVIEW',
+            record=lambda: DevReport.objects.create(ticket=ticket, assigned_developer=request.user, **data),
+        )
+        return Response(self._ticket_data(ticket))
 
     @action(detail=True, methods=['post'], url_path='qa-review')
     def qa_review(self, request, pk=None):
@@ -84,27 +226,100 @@ class TicketViewSet(viewsets.ModelViewSet):
 
         payload = QAReviewSerializer(data=request.data)
         payload.is_valid(raise_exception=True)
-        agree = payload.validated_data['agree_to_release']
-        designated = payload.validated_data.get('designated_tester')
-        comment = payload.validated_data.get('comment', '')
-
-        # 持久化 QAReview 记录
-        QAReview.objects.create(
-            ticket=ticket,
-            release_qa=request.user,
-            agree_to_release=agree,
-            designated_tester=designated,
-            comment=comment,
-        )
+        self._apply_qa_review(ticket, request.user, payload.validated_data)
+        return Response(self._ticket_data(ticket))
+
+    @staticmethod
+    def _apply_qa_review(ticket, reviewer, validated_data):
+        agree = validated_data['agree_to_release']
+        designated = validated_data.get('designated_tester')
+
+        # 持久化 QAReview 记录并流转状态（同一事务）
+        def record():
+            QAReview.objects.create(
+                ticket=ticket,
+                release_qa=reviewer,
+                agree_to_release=agree,
+                designated_tester=designated,
+                comment=validated_data.get('comment', ''),
+            )
 
-        ticket.qa_reviewer = request.user
         if agree:
-            ticket.current_status = 'IN_REGRESSION'
-            ticket.regressor = designated or ticket.submitter
+            workflow.transition(ticket, 'IN_REGRESSION', record=record,
+                                qa_reviewer=reviewer, regressor=designated or ticket.submitter)
         else:
-            ticket.current_status = 'IN_MODIFICATION'
-        ticket.save(update_fields=['qa_reviewer', 'current_status', 'regressor', 'updated_at'])
-        return Response(TicketSerializer(ticket).data)
+            workflow.transition(ticket, 'IN_MODIFICATION', record=record, qa_reviewer=reviewer)
+
+    @action(detail=False, methods=['post'], url_path='bulk')
+    def bulk_create(self, request):
+        items = request.data
+        if not isinstance(items, list) or not 0 < len(items) <= BULK_MAX_ITEMS:
+            return Response({'detail': f'Expected a list of 1 to {BULK_MAX_ITEMS} tickets.'}, status=400)
+
+        # 一条 IN 查询解析全部 assignee，逐条校验，再一次性 bulk_create
+        context = self.get_serializer_context()
+        context['users'] = resolve_users(items, 'assignee')
+        results, tickets = [], []
+        for index, item in enumerate(items):
+            serializer = TicketCreateSerializer(data=item, context=context)
+            if serializer.is_valid():
+                ticket = serializer.build(serializer.validated_data)
+                tickets.append(ticket)
+                results.append({'index': index, 'status': 201, 'id': str(ticket.id)})
+            else:
+                results.append({'index': index, 'status': 400, 'errors': serializer.errors})
+
+        with transaction.atomic():
+            Ticket.objects.bulk_create(tickets, batch_size=BULK_MAX_ITEMS)
+            get_search_backend().index_tickets([ticket.id for ticket in tickets])
+            # bulk_create 不发送 post_save，状态日志与统计计数在此一并更新
+            analytics.record_created(tickets)
+            stats.apply(added=[ticket.stat_values() for ticket in tickets])
+            for ticket in tickets:
+                push.publish('ticket.created', ticket)
+
+        return Response(
+            {'created': len(tickets), 'failed': len(items) - len(tickets), 'results': results},
+            status=status.HTTP_201_CREATED if len(tickets) == len(items) else status.HTTP_207_MULTI_STATUS,
+        )
+
+    @action(detail=False, methods=['post'], url_path='bulk-qa-review')
+    def bulk_qa_review(self, request):
+        # QA 批量分诊：items 为 [{id, agree_to_release, comment, designated_tester}, ...]
+        if request.user.role != 'QA':
+            return Response({'detail': 'Only QA can submit review.'}, status=403)
+        items = request.data.get('items') if isinstance(request.data, dict) else None
+        if not isinstance(items, list) or not 0 < len(items) <= BULK_MAX_ITEMS:
+            return Response({'detail': f'Expected "items" with 1 to {BULK_MAX_ITEMS} reviews.'}, status=400)
+
+        context = {'users': resolve_users(items, 'designated_tester')}
+        tickets = self.get_queryset().in_bulk(
+            [item['id'] for item in items if isinstance(item, dict) and _is_uuid(item.get('id'))]
+        )
+        results = []
+        for index, item in enumerate(items):
+            ticket_id = item.get('id') if isinstance(item, dict) else None
+            ticket = tickets.get(Ticket._meta.pk.to_python(ticket_id)) if _is_uuid(ticket_id) else None
+            if ticket is None:
+                results.append({'index': index, 'status': 404, 'detail': 'Ticket not found.'})
+                continue
+            payload = QAReviewSerializer(data=item, context=context)
+            if not payload.is_valid():
+                results.append({'index': index, 'status': 400, 'errors': payload.errors})
+                continue
+            try:
+                self._apply_qa_review(ticket, request.user, payload.validated_data)
+            except APIException as exc:
+                results.append({'index': index, 'status': exc.status_code, 'detail': exc.detail})
+                continue
+            results.append({'index': index, 'status': 200, 'id': str(ticket.id),
+                            'current_status': ticket.current_status})
+
+        failed = sum(1 for result in results if result['status'] != 200)
+        return Response(
+            {'updated': len(items) - failed, 'failed': failed, 'results': results},
+            status=status.HTTP_200_OK if not failed else status.HTTP_207_MULTI_STATUS,
+        )
 
     @action(detail=True, methods=['post'], url_path='regression')
     def regression(self, request, pk=None):
@@ -118,19 +333,142 @@ class TicketViewSet(viewsets.ModelViewSet):
 
         payload = RegressionSerializer(data=request.data)
         payload.is_valid(raise_exception=True)
-        RegressionTest.objects.create(
-            ticket=ticket,
-            assign_tester=request.user,
-            regression_version=payload.validated_data.get('regression_version', ''),
-            passed=payload.validated_data['passed'],
-            report=payload.validated_data.get('report', '')
+        passed = payload.validated_data['passed']
+
+        # 持久化 RegressionTest 记录并流转状态（同一事务）
+        workflow.transition(
+            ticket, 'CLOSED' if passed else 'UNDER_REVIEW',
+            record=lambda: RegressionTest.objects.create(
+                ticket=ticket,
+                assign_tester=request.user,
+                regression_version=payload.validated_data.get('regression_version', ''),
+                passed=passed,
+                report=payload.validated_data.get('report', ''),
+            ),
         )
+        return Response(self._ticket_data(ticket))
 
-        payload = RegressionSerializer(data=request.data)
+
+class UploadViewSet(viewsets.GenericViewSet):
+    """分块上传：POST 创建会话，PUT 追加分块（Upload-Offset 头），GET 查询进度，POST complete 完成"""
+    permission_classes = [IsAuthenticated]
+    serializer_class = UploadSessionOutSerializer
+
+    def get_queryset(self):
+        return UploadSession.objects.select_related('stored_file').filter(owner_id=self.request.user.id)
+
+    def create(self, request):
+        payload = UploadStartSerializer(data=request.data)
         payload.is_valid(raise_exception=True)
-        if payload.validated_data['passed']:
-            ticket.current_status = 'CLOSED'
-        else:
-            ticket.current_status = 'UNDER_REVIEW'
-        ticket.save(update_fields=['current_status', 'updated_at'])
-        return Response(TicketSerializer(ticket).data)
+        try:
+            session = uploads.start(
+                request.user,
+                payload.validated_data['filename'],
+                payload.validated_data['size'],
+                payload.validated_data.get('content_type', ''),
+            )
+        except uploads.UploadError as exc:
+            return Response({'detail': exc.detail}, status=exc.status)
+        return Response(UploadSessionOutSerializer(session).data, status=status.HTTP_201_CREATED)
+
+    def retrieve(self, request, pk=None):
+        return Response(UploadSessionOutSerializer(self.get_object()).data)
+
+    def update(self, request, pk=None):
+        session = self.get_object()
+        try:
+            offset = int(request.headers.get('Upload-Offset', ''))
+            length = int(request.headers.get('Content-Length', ''))
+        except ValueError:
+            return Response({'detail': 'Upload-Offset and Content-Length headers are required.'}, status=400)
+        try:
+            # 直接从请求流按块读取写入，不经过 DRF 解析器，也不在内存中缓冲整个分块
+            uploads.append(session, offset, request._request, length)
+        except uploads.UploadError as exc:
+            return Response({'detail': exc.detail, 'received': session.received}, status=exc.status)
+        return Response(UploadSessionOutSerializer(session).data)
+
+    @action(detail=True, methods=['post'])
+    def complete(self, request, pk=None):
+        session = self.get_object()
+        try:
+            uploads.complete(session)
+        except uploads.UploadError as exc:
+            return Response({'detail': exc.detail, 'received': session.received}, status=exc.status)
+        return Response(UploadSessionOutSerializer(session).data)
+
+
+class MediaNegotiation(BaseContentNegotiation):
+    # 文件接口直接返回 FileResponse，不因 Accept: image/* 等请求头返回 406
+    def select_parser(self, request, parsers):
+        return parsers[0]
+
+    def select_renderer(self, request, renderers, format_suffix=None):
+        return renderers[0], renderers[0].media_type
+
+
+class DevReportScreenshotView(APIView):
+    """开发报告截图：登录用户可查看，文件由 media.serve 下发"""
+    permission_classes = [IsAuthenticated]
+    content_negotiation_class = MediaNegotiation
+
+    def get(self, request, pk):
+        report = get_object_or_404(DevReport.objects.only('id', 'self_test_screenshots'), pk=pk)
+        return media.serve(request, report.self_test_screenshots)
+
+
+class StoredFileView(APIView):
+    """分块上传得到的文件（?thumbnail=1 返回缩略图），仅上传者可访问"""
+    permission_classes = [IsAuthenticated]
+    content_negotiation_class = MediaNegotiation
+
+    def get(self, request, pk):
+        # 同一用户可能多次上传相同内容（去重后指向同一文件），需 distinct
+        stored = get_object_or_404(StoredFile.objects.filter(upload_sessions__owner_id=request.user.id).distinct(), pk=pk)
+        return media.serve(request, stored.thumbnail if request.query_params.get('thumbnail') else stored.file)
+
+
+class StatsView(APIView):
+    """仪表盘统计，读取预聚合的计数表（见 tickets/stats.py）"""
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        return Response(stats.snapshot())
+
+
+class CycleTimeView(APIView):
+    """基于状态变化日志的分位数统计，?after=&before= 限定时间范围，?percentiles=50,90,99"""
+    permission_classes = [IsAuthenticated]
+
+    @staticmethod
+    def _params(request):
+        params = request.query_params
+        since = params.get('after') and TicketFilterBackend._parse_datetime('after', params['after'])
+        until = params.get('before') and TicketFilterBackend._parse_datetime('before', params['before'])
+        try:
+            percentiles = [float(p) for p in params.get('percentiles', '').split(',') if p] \
+                or list(analytics.DEFAULT_PERCENTILES)
+        except ValueError:
+            raise ValidationError({'percentiles': 'Expected comma-separated numbers.'})
+        if not all(0 <= p <= 100 for p in percentiles):
+            raise ValidationError({'percentiles': 'Percentiles must be between 0 and 100.'})
+        return since or None, until or None, percentiles
+
+
+class TimeInStatusView(CycleTimeView):
+    """各状态停留时长（秒）；?include_open=1 时未结束的区间计算到当前时间"""
+
+    def get(self, request):
+        since, until, percentiles = self._params(request)
+        statuses = set(filter(None, request.query_params.get('status', '').split(',')))
+        open_until = timezone.now() if request.query_params.get('include_open') in ('1', 'true') else None
+        sketches = analytics.time_in_status(since, until, statuses=statuses, open_until=open_until)
+        return Response({status: sketch.summary(percentiles) for status, sketch in sorted(sketches.items())})
+
+
+class LeadTimeView(CycleTimeView):
+    """从创建到首次关闭的时长（秒），按关闭时间筛选"""
+
+    def get(self, request):
+        since, until, percentiles = self._params(request)
+        return Response(analytics.lead_time(since, until).summary(percentiles))
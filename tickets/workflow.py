@@ -0,0 +1,76 @@
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+from . import analytics, push, stats
+from .models import Ticket
+
+# 合法的状态流转：当前状态 -> 可到达的状态
+TRANSITIONS = {
+    'OPEN': {'IN_DEVELOPMENT', 'UNDER_REVIEW'},
+    'IN_DEVELOPMENT': {'UNDER_REVIEW'},
+    'UNDER_REVIEW': {'IN_REGRESSION', 'IN_MODIFICATION'},
+    'IN_REGRESSION': {'CLOSED', 'UNDER_REVIEW'},
+    'IN_MODIFICATION': {'UNDER_REVIEW'},
+    'CLOSED': {'REOPENED'},
+    'REOPENED': {'IN_DEVELOPMENT', 'UNDER_REVIEW'},
+}
+
+
+class IllegalTransition(APIException):
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = 'Ticket status does not allow this operation.'
+    default_code = 'illegal_transition'
+
+
+class TransitionConflict(APIException):
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = 'Ticket was modified concurrently, reload and retry.'
+    default_code = 'transition_conflict'
+
+
+def can_transition(from_status, to_status):
+    return to_status in TRANSITIONS.get(from_status, ())
+
+
+def transition(ticket, to_status, record=None, **changes):
+    """将工单从当前状态原子地迁移到 to_status
+
+    乐观锁：仅当数据库中的 version 仍等于读取时的值才更新，否则说明已有并发操作，
+    立即抛出 TransitionConflict（409）而不是阻塞等待。record 在同一事务中写入历史记录，
+    冲突时不会留下多余的历史行。changes 为需要一并更新的其他字段，如 qa_reviewer。
+    """
+    if not can_transition(ticket.current_status, to_status):
+        raise IllegalTransition(
+            f'Cannot move ticket from {ticket.current_status} to {to_status}.'
+        )
+
+    previous = ticket.stat_values()
+    now = timezone.now()
+    with transaction.atomic():
+        updated = Ticket.objects.filter(pk=ticket.pk, version=ticket.version).update(
+            current_status=to_status,
+            version=F('version') + 1,
+            updated_at=now,
+            status_changed_at=now,
+            **changes,
+        )
+        if not updated:
+            raise TransitionConflict()
+        analytics.record(ticket.pk, ticket.current_status, to_status, now)
+        stats.record_transition(ticket, to_status, now)
+        if record is not None:
+            record()
+
+    ticket.current_status = to_status
+    ticket.status_changed_at = now
+    ticket.version += 1
+    ticket.updated_at = now
+    for field, value in changes.items():
+        setattr(ticket, field, value)
+    ticket._loaded_stat_values = ticket.stat_values()
+    # 提交后推送（外层有事务时随外层提交）
+    push.publish('ticket.status_changed', ticket, previous)
+    return ticket